@@ -0,0 +1,65 @@
+"""Concurrent lookups through AsyncPeopleStore on one event loop.
+
+    python -m bench.bench_async --rows 100000 --concurrency 1000 5000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from peopledb import AsyncPeopleStore
+
+from .datasets import remove_db, working_copy
+
+TICK = 0.001
+
+
+async def loop_lag(stop):
+    """Worst delay of a 1 ms timer: how long the event loop was blocked."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - start - TICK)
+    return worst
+
+
+async def run(path, rows, concurrency, lookups):
+    # Cache off so every lookup reaches SQLite.
+    async with AsyncPeopleStore(path, cache_bytes=0) as people:
+        rnd = random.Random(0)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def lookup():
+            async with semaphore:
+                await people.get_person(rnd.randrange(1, rows + 1))
+
+        stop = asyncio.Event()
+        lag = asyncio.create_task(loop_lag(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(lookup() for _ in range(lookups)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        return lookups / elapsed, await lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    args = parser.parse_args()
+
+    path = working_copy(args.rows, args.data_dir)
+    try:
+        print(f"{'concurrency':>11} {'lookups/s':>10} {'max loop lag ms':>16}")
+        for concurrency in args.concurrency:
+            rate, lag = asyncio.run(run(path, args.rows, concurrency, args.lookups))
+            print(f"{concurrency:>11} {rate:>10,.0f} {lag * 1000:>16.2f}")
+    finally:
+        remove_db(path)
+
+
+if __name__ == "__main__":
+    main()
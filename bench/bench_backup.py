@@ -0,0 +1,105 @@
+"""Read and write latency of a live store while an online backup runs.
+
+    python -m bench.bench_backup --rows 1000000 --pause 0.005 0
+
+Runs a mixed client load (point reads plus queued inserts) twice per pause
+setting, once alone and once while backup.backup copies the database, and
+reports p50/p99 latency of each phase plus the backup's duration.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from peopledb import PeopleStore, backup
+
+from .datasets import remove_db, working_copy
+
+
+def percentile(samples, fraction):
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000 if samples else 0.0
+
+
+def load(store, rows, stop, threads):
+    """Run clients until `stop` is set; returns (read latencies, write latencies)."""
+    reads, writes = [], []
+    lock = threading.Lock()
+
+    def client(worker):
+        rnd = random.Random(worker)
+        local_reads, local_writes = [], []
+        n = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            if n % 10:
+                store.get_person(rnd.randrange(1, rows + 1))
+                local_reads.append(time.perf_counter() - start)
+            else:
+                store.add_person("Bench Backup", 40, f"backup{worker}.{n}.{time.time_ns()}@bench.dev")
+                local_writes.append(time.perf_counter() - start)
+            n += 1
+        with lock:
+            reads.extend(local_reads)
+            writes.extend(local_writes)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    return workers, reads, writes
+
+
+def run(path, rows, threads, seconds, pause):
+    # Cache off so every read reaches SQLite.
+    store = PeopleStore(path, cache_bytes=0, instrument=False)
+    store.migrator.wait()
+    directory = tempfile.mkdtemp(prefix="people_backups_")
+    results = {}
+    try:
+        for phase in ("idle", "backup"):
+            stop = threading.Event()
+            workers, reads, writes = load(store, rows, stop, threads)
+            start = time.perf_counter()
+            if phase == "backup":
+                backup.backup(path, directory, pause=pause)
+            elapsed = time.perf_counter() - start
+            time.sleep(max(seconds - elapsed, 0))
+            stop.set()
+            for t in workers:
+                t.join()
+            reads.sort()
+            writes.sort()
+            results[phase] = (elapsed, percentile(reads, 0.5), percentile(reads, 0.99),
+                              percentile(writes, 0.5), percentile(writes, 0.99))
+    finally:
+        store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Minimum length of each phase")
+    parser.add_argument("--pause", type=float, nargs="+", default=[backup.BACKUP_PAUSE, 0.0],
+                        help="Sleep between backup steps")
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    args = parser.parse_args()
+
+    path = working_copy(args.rows, args.data_dir)
+    try:
+        print(f"{'pause':>6} {'phase':<7} {'backup s':>9} {'read p50':>9} {'read p99':>9} "
+              f"{'write p50':>10} {'write p99':>10}")
+        for pause in args.pause:
+            for phase, (elapsed, r50, r99, w50, w99) in run(path, args.rows, args.threads, args.seconds,
+                                                             pause).items():
+                took = f"{elapsed:.1f}" if phase == "backup" else "-"
+                print(f"{pause:>6} {phase:<7} {took:>9} {r50:>9.2f} {r99:>9.2f} {w50:>10.2f} {w99:>10.2f}")
+    finally:
+        remove_db(path)
+
+
+if __name__ == "__main__":
+    main()
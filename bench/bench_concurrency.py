@@ -0,0 +1,72 @@
+"""Reader and writer throughput with several reader threads and one writer.
+
+    python -m bench.bench_concurrency --rows 100000 --readers 4 --seconds 5
+"""
+import argparse
+import os
+import random
+import threading
+import time
+
+from peopledb import PeopleStore, get_profile, profiles
+
+from .datasets import build_people_db
+
+
+def run(path, profile, readers, seconds, rows):
+    store = PeopleStore(path, readers=readers, profile=get_profile(profile))
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        rnd = random.Random(seed)
+        done = 0
+        while not stop.is_set():
+            store.get_people_page(after=(None, rnd.randrange(rows)), page_size=50)
+            done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        done = 0
+        while not stop.is_set():
+            store.add_person("Bench Writer", 42, f"writer{done}@bench.dev")
+            done += 1
+        with lock:
+            counts["writes"] += done
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    store.close()
+    return counts["reads"] / seconds, counts["writes"] / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profiles", nargs="+", choices=list(profiles.PROFILES), default=["rollback", "wal"])
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10}")
+    for profile in args.profiles:
+        path = build_people_db(args.rows)
+        try:
+            reads, writes = run(path, profile, args.readers, args.seconds, args.rows)
+            print(f"{profile:<12} {reads:>10,.0f} {writes:>10,.0f}")
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Peak Python memory of the streaming export vs. the DataFrame + to_csv path.
+
+    python -m bench.bench_export --rows 100000 1000000
+"""
+import argparse
+import os
+import sqlite3
+import time
+import tracemalloc
+
+from peopledb import export
+
+from .datasets import build_people_db
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def dataframe_export(conn):
+    import pandas as pd
+
+    rows = conn.execute(export.EXPORT_QUERY).fetchall()
+    pd.DataFrame(rows, columns=export.EXPORT_COLUMNS).to_csv(index=False)
+
+
+def streaming_export(conn, fmt, batch_size):
+    with export.export_people(conn, fmt, batch_size) as out:
+        out.seek(0, os.SEEK_END)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=export.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--skip-pandas", action="store_true")
+    args = parser.parse_args()
+
+    paths = [("stream csv", lambda c: streaming_export(c, "csv", args.batch_size)),
+             ("stream csv.gz", lambda c: streaming_export(c, "csv.gz", args.batch_size))]
+    if export.parquet_available():
+        paths.append(("stream parquet", lambda c: streaming_export(c, "parquet", args.batch_size)))
+    if not args.skip_pandas:
+        paths.insert(0, ("pandas to_csv", dataframe_export))
+
+    print(f"{'rows':>10}  {'path':<16} {'seconds':>8} {'peak MiB':>9}")
+    for rows in args.rows:
+        path = build_people_db(rows)
+        conn = sqlite3.connect(path)
+        try:
+            for label, fn in paths:
+                elapsed, peak = measure(lambda: fn(conn))
+                print(f"{rows:>10}  {label:<16} {elapsed:>8.2f} {peak:>9.1f}")
+        finally:
+            conn.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Server time and browser payload per rerun: whole result vs. a grid window.
+
+    python -m bench.bench_grid --rows 10000 100000 1000000 --window 50
+
+"full" reads the whole table in the grid's order and encodes it as one Arrow
+table, which is what handing the complete result to st.dataframe costs on
+every rerun. "window" is store.get_people_window at random positions, from
+a cold cache and then while scrolling within cached chunks. Needs pyarrow.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from peopledb import PeopleStore, grid
+
+from .datasets import remove_db, working_copy
+
+
+def payload(table):
+    """Bytes of Arrow IPC the table becomes on its way to the browser."""
+    return len(grid.encode(table.combine_chunks().to_batches()[0])) if table.num_rows else 0
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def run(path, rows, window, repeat, sort):
+    store = PeopleStore(path, cache_bytes=256 * 1024 * 1024, instrument=False)
+    store.migrator.wait()
+    rnd = random.Random(0)
+    try:
+        def full():
+            people = store.pool.read(lambda conn: conn.execute(
+                f"SELECT id, name, age, email FROM people ORDER BY {sort}, id"
+            ).fetchall())
+            return grid.to_table(people)
+
+        full_ms, table = timed(full, 1)
+        full_ms += timed(lambda: payload(table), 1)[0]
+        results = [("full", full_ms, payload(table))]
+
+        starts = [rnd.randrange(rows) for _ in range(repeat)]
+        cold = []
+        for start in starts:
+            store.cache.clear()
+            cold.append(timed(lambda: store.get_people_window(start, sort, size=window), 1)[0])
+        warm = []
+        for start in starts:
+            store.get_people_window(start, sort, size=window)
+            warm.append(timed(lambda: store.get_people_window(start + 1, sort, size=window), 1)[0])
+        size = payload(store.get_people_window(starts[0], sort, size=window))
+        results.append(("window cold", statistics.median(cold), size))
+        results.append(("window warm", statistics.median(warm), size))
+    finally:
+        store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--window", type=int, default=grid.WINDOW_ROWS)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sort", default="name", choices=["id", "name", "age", "email"])
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'path':<12} {'ms':>9} {'payload KiB':>12}")
+    for rows in args.rows:
+        path = working_copy(rows, args.data_dir)
+        try:
+            for name, ms, size in run(path, rows, args.window, args.repeat, args.sort):
+                print(f"{rows:>10,} {name:<12} {ms:>9.2f} {size / 1024:>12,.1f}")
+        finally:
+            remove_db(path)
+
+
+if __name__ == "__main__":
+    main()
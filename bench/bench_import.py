@@ -0,0 +1,106 @@
+"""Bulk import throughput (rows/s) from a CSV file on local disk.
+
+    python -m bench.bench_import --rows 1000000
+
+rows/s covers the load until its rows are committed and every B-tree index
+is in place. With deferred indexes the FTS index is caught up afterwards
+(PeopleStore does it on a background thread, search falls back to LIKE for
+those rows meanwhile); "fts s" is that catch-up, run here right after the
+load. The "store" modes import through PeopleStore.import_people, as the
+Import page does: storage profile PRAGMAs, every migration applied (so the
+unique email index and the change log are live).
+"""
+import argparse
+import csv
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from peopledb import PeopleStore, importer, schema
+
+from .datasets import synthetic_people
+
+# label -> (build FTS index, defer_indexes, through PeopleStore)
+MODES = {
+    "deferred indexes": (False, True, False),
+    "live indexes": (False, False, False),
+    "deferred + fts": (True, True, False),
+    "live + fts": (True, False, False),
+    "store deferred": (True, True, True),
+    "store live": (True, False, True),
+}
+
+
+def write_csv(rows):
+    fd, path = tempfile.mkstemp(prefix=f"people_{rows}_", suffix=".csv")
+    with os.fdopen(fd, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["name", "age", "email"])
+        writer.writerows(synthetic_people(rows))
+    return path
+
+
+def run_store(csv_path, defer_indexes):
+    directory = tempfile.mkdtemp()
+    store = PeopleStore(os.path.join(directory, "people.db"), cache_bytes=0, instrument=False)
+    try:
+        store.migrator.wait()
+        with open(csv_path, "rb") as source:
+            report = store.import_people(source, defer_indexes=defer_indexes)
+        start = time.perf_counter()
+        while store.pool.read(schema.fts_pending):
+            time.sleep(0.05)
+        return report, time.perf_counter() - start
+    finally:
+        store.close()
+        shutil.rmtree(directory)
+
+
+def run(csv_path, fts, defer_indexes, through_store):
+    if through_store:
+        return run_store(csv_path, defer_indexes)
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(db_path)
+    try:
+        schema.ensure_schema(conn)
+        # What the migrations would add, on the empty table.
+        with conn:
+            for index in schema.SECONDARY_INDEXES.values():
+                conn.execute(index)
+            schema.create_stats_tables(conn)
+            if fts:
+                schema.create_fts_index(conn)
+        with open(csv_path, "rb") as source:
+            report = importer.import_people(conn, source, defer_indexes=defer_indexes)
+        start = time.perf_counter()
+        while schema.catch_up_fts(conn):
+            conn.commit()
+        return report, time.perf_counter() - start
+    finally:
+        conn.close()
+        os.remove(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'mode':<18} {'seconds':>8} {'rows/s':>10} {'fts s':>7}")
+    for rows in args.rows:
+        csv_path = write_csv(rows)
+        try:
+            for mode in args.modes:
+                report, fts_seconds = run(csv_path, *MODES[mode])
+                print(f"{rows:>10}  {mode:<18} {report.elapsed:>8.2f} {report.rows_per_second:>10,.0f} "
+                      f"{fts_seconds:>7.2f}")
+        finally:
+            os.remove(csv_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Cost of query instrumentation: the same reads with metrics on and off.
+
+    python -m bench.bench_instrument --rows 100000 --calls 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from peopledb import PeopleStore
+
+from .datasets import remove_db, working_copy
+
+SEARCH_TERMS = ["smith", "grace", "startup.dev", "ol", "42", "zzzq"]
+
+
+def reads(store, rows):
+    return {
+        "get_person": lambda rnd: store.get_person(rnd.randrange(1, rows + 1)),
+        "page": lambda rnd: store.get_people_page(after=(None, rnd.randrange(rows)), page_size=50),
+        "find": lambda rnd: store.find_people(rnd.choice(SEARCH_TERMS)[:3]),
+        "stats": lambda rnd: store.get_stats(),
+    }
+
+
+def run(rows, calls, instrument, data_dir):
+    path = working_copy(rows, data_dir)
+    # No query cache, so every call reaches SQLite through the cursor wrapper.
+    store = PeopleStore(path, cache_bytes=0, instrument=instrument)
+    results = {}
+    try:
+        for name, fn in reads(store, rows).items():
+            rnd = random.Random(0)
+            samples = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                fn(rnd)
+                samples.append(time.perf_counter() - start)
+            results[name] = statistics.median(samples) * 1e6
+    finally:
+        store.close()
+        remove_db(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'op':<11} {'off us':>9} {'on us':>9} {'overhead':>9}")
+    for rows in args.rows:
+        off = run(rows, args.calls, False, args.data_dir)
+        on = run(rows, args.calls, True, args.data_dir)
+        for name in off:
+            print(f"{rows:>10}  {name:<11} {off[name]:>9.1f} {on[name]:>9.1f} {on[name] / off[name] - 1:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
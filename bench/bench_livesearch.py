@@ -0,0 +1,61 @@
+"""SQLite queries and time spent when a term is typed one keystroke at a time.
+
+    python -m bench.bench_livesearch --rows 1000000 --terms "grace k" smith.j
+
+Types each term prefix by prefix, as the browser would report it with no
+debounce at all, and compares plain store.search_people calls with a
+LiveSearch, which narrows complete result sets in memory.
+"""
+import argparse
+import time
+
+from peopledb import LiveSearch, PeopleStore
+
+from .datasets import remove_db, working_copy
+
+
+def typed(term):
+    return [term[:i] for i in range(1, len(term) + 1)]
+
+
+def run(path, terms, limit):
+    # Cache off so every prefix the live search cannot narrow reaches SQLite.
+    store = PeopleStore(path, cache_bytes=0, instrument=False)
+    store.migrator.wait()
+    results = []
+    try:
+        for term in terms:
+            start = time.perf_counter()
+            for prefix in typed(term):
+                store.search_people(prefix, limit)
+            plain_ms = (time.perf_counter() - start) * 1000
+            live = LiveSearch(store, limit)
+            start = time.perf_counter()
+            for prefix in typed(term):
+                live.search(prefix)
+            live_ms = (time.perf_counter() - start) * 1000
+            results.append((term, len(term), plain_ms, live.queries, live_ms))
+    finally:
+        store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--terms", nargs="+", default=["grace k", "smith.j", "startup.io"])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    args = parser.parse_args()
+
+    path = working_copy(args.rows, args.data_dir)
+    try:
+        print(f"{'term':<12} {'plain queries':>13} {'plain ms':>9} {'live queries':>12} {'live ms':>8}")
+        for term, keys, plain_ms, queries, live_ms in run(path, args.terms, args.limit):
+            print(f"{term:<12} {keys:>13} {plain_ms:>9.1f} {queries:>12} {live_ms:>8.1f}")
+    finally:
+        remove_db(path)
+
+
+if __name__ == "__main__":
+    main()
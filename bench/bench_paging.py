@@ -0,0 +1,51 @@
+"""Page fetch latency for keyset pagination at increasing table sizes.
+
+    python -m bench.bench_paging --rows 10000 100000 1000000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+
+from peopledb import paging
+
+from .datasets import build_people_db
+
+
+def page_walk_ms(conn, sort, descending, page_size, pages):
+    """Median time per page while walking `pages` pages from the start."""
+    samples = []
+    cursor = None
+    for _ in range(pages):
+        start = time.perf_counter()
+        _, cursor = paging.fetch_page(conn, sort, descending, cursor, page_size)
+        samples.append(time.perf_counter() - start)
+        if cursor is None:
+            break
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--page-size", type=int, default=paging.DEFAULT_PAGE_SIZE)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'sort':<6} {'order':<5} {'ms/page':>8}")
+    for rows in args.rows:
+        path = build_people_db(rows)
+        conn = sqlite3.connect(path)
+        try:
+            for sort in paging.SORT_COLUMNS:
+                for descending in (False, True):
+                    ms = page_walk_ms(conn, sort, descending, args.page_size, args.pages)
+                    print(f"{rows:>10}  {sort:<6} {'desc' if descending else 'asc':<5} {ms:>8.3f}")
+        finally:
+            conn.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Scan times and file size before and after archiving old rows and vacuuming.
+
+    python -m bench.bench_retention --rows 1000000 --archive 0.5 0.9
+
+For each share, archives that fraction of the oldest rows (by id) with
+PeopleStore.archive_people, then vacuums, and times the paths that scan the
+table: a LIKE search with no match, an AVG(age) aggregate and a CSV export.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from peopledb import PeopleStore, RetentionPolicy, search
+
+from .datasets import remove_db, working_copy
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def measure(store, repeat):
+    def scan(fn):
+        return time_calls(lambda: store.pool.read(fn), repeat)
+
+    return (
+        scan(lambda conn: search.search_like(conn, "zzzq", search.DEFAULT_LIMIT)),
+        scan(lambda conn: conn.execute("SELECT AVG(age) FROM people").fetchone()),
+        time_calls(lambda: store.export_people("csv").close(), repeat),
+        store.space_report()["file_bytes"],
+    )
+
+
+def run(path, rows, share, repeat):
+    archive_path = f"{path}.archive"
+    store = PeopleStore(path, cache_bytes=0, instrument=False, archive_path=archive_path)
+    store.migrator.wait()
+    try:
+        results = [("before", *measure(store, repeat))]
+        start = time.perf_counter()
+        report = store.archive_people(RetentionPolicy(before_id=int(rows * share) + 1))
+        archived = time.perf_counter() - start
+        store.vacuum()
+        results.append((f"after -{report.rows:,}", *measure(store, repeat)))
+        archive_bytes = os.path.getsize(archive_path)
+    finally:
+        store.close()
+        if os.path.exists(archive_path):
+            os.remove(archive_path)
+    return results, archived, archive_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--archive", type=float, nargs="+", default=[0.5, 0.9], help="Share of rows to archive")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    args = parser.parse_args()
+
+    print(f"{'share':>6} {'state':<16} {'like ms':>9} {'avg ms':>9} {'export ms':>10} {'file MiB':>9}")
+    for share in args.archive:
+        path = working_copy(args.rows, args.data_dir)
+        try:
+            results, archived, archive_bytes = run(path, args.rows, share, args.repeat)
+        finally:
+            remove_db(path)
+        for state, like_ms, avg_ms, export_ms, size in results:
+            print(f"{share:>6} {state:<16} {like_ms:>9.1f} {avg_ms:>9.1f} {export_ms:>10.1f} {size / 2**20:>9.1f}")
+        print(f"{'':>6} archived in {archived:.1f}s to a {archive_bytes / 2**20:.1f} MiB archive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare the LIKE table-scan search with the FTS5 trigram search.
+
+    python -m bench.bench_search --rows 10000 1000000 5000000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+
+from peopledb import search
+
+from .datasets import build_people_db
+
+TERMS = ["smith", "grace.k", "startup", "zzzq", "42"]
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(rows, repeat, limit):
+    path = build_people_db(rows)
+    conn = sqlite3.connect(path)
+    results = []
+    try:
+        for term in TERMS:
+            like_ms = time_calls(lambda: search.search_like(conn, term, limit), repeat)
+            fts_ms = time_calls(lambda: search.search(conn, term, limit), repeat)
+            results.append((term, like_ms, fts_ms))
+    finally:
+        conn.close()
+        os.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 5_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=search.DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'term':<10} {'like ms':>10} {'fts ms':>10} {'speedup':>8}")
+    for rows in args.rows:
+        for term, like_ms, fts_ms in run(rows, args.repeat, args.limit):
+            print(f"{rows:>10}  {term:<10} {like_ms:>10.2f} {fts_ms:>10.2f} {like_ms / fts_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Write throughput of ShardedPeopleStore as the shard count grows.
+
+    python -m bench.bench_shards --shards 1 2 4 8 --threads 64 --seconds 5
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from peopledb import get_profile
+from peopledb.sharded import ShardedPeopleStore
+
+
+def run(shards, profile, threads, seconds):
+    directory = tempfile.mkdtemp(prefix=f"people_shards{shards}_")
+    store = ShardedPeopleStore(f"{directory}/people.db", shards=shards, profile=get_profile(profile),
+                               instrument=False)
+    for shard in store.shards:
+        shard.migrator.wait()
+    stop = threading.Event()
+    latencies = []
+    lock = threading.Lock()
+
+    def client(worker):
+        samples = []
+        n = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            store.add_person("Bench", 30, f"w{worker}n{n}@bench.dev")
+            samples.append(time.perf_counter() - start)
+            n += 1
+        with lock:
+            latencies.extend(samples)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    store.close()
+    shutil.rmtree(directory, ignore_errors=True)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+    return len(latencies) / seconds, statistics.median(latencies) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profile", default="wal-durable")
+    args = parser.parse_args()
+
+    print(f"{'shards':>6} {'writes/s':>10} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    baseline = None
+    for shards in args.shards:
+        rate, p50, p99 = run(shards, args.profile, args.threads, args.seconds)
+        baseline = baseline or rate
+        print(f"{shards:>6} {rate:>10,.0f} {rate / baseline:>7.2f}x {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Columnar snapshot vs. SQLite and vs. a list of row tuples.
+
+    python -m bench.bench_snapshot --rows 100000 1000000
+
+Reports memory per row of a fetchall() tuple list and of the snapshot
+(both measured with tracemalloc), then the median time of View-page and
+filter queries served by SQLite and by the snapshot.
+"""
+import argparse
+import sqlite3
+import statistics
+import time
+import tracemalloc
+
+from peopledb import PeopleFilter, filters, paging
+from peopledb.pool import ConnectionPool
+from peopledb.schema import ensure_schema
+from peopledb.migrations import Migrator
+from peopledb.snapshot import PeopleSnapshot
+
+from .datasets import remove_db, working_copy
+
+FILTERS = {
+    "age 30-40 @example.com by name": PeopleFilter(min_age=30, max_age=40, email_domain="example.com", sort="name"),
+    "domain prefix 'st' by email": PeopleFilter(email_domain="st", domain_prefix=True, sort="email"),
+    "name 'gr' by age desc": PeopleFilter(name_prefix="gr", sort="age", descending=True),
+}
+
+
+def traced(fn):
+    tracemalloc.start()
+    try:
+        result = fn()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(rows, repeat, data_dir):
+    path = working_copy(rows, data_dir)
+    pool = ConnectionPool(path)
+    try:
+        with pool.writer() as conn:
+            ensure_schema(conn)
+        Migrator(pool, pause=0).run()
+
+        conn = sqlite3.connect(path)
+        people, tuple_bytes = traced(lambda: conn.execute("SELECT id, name, age, email FROM people").fetchall())
+        del people
+        snapshot = PeopleSnapshot(pool)
+        _, snapshot_bytes = traced(snapshot.load)
+        print(f"{rows:>10} rows: tuples {tuple_bytes / rows:6.1f} B/row, snapshot {snapshot_bytes / rows:6.1f} B/row")
+
+        # A page half way through the table, reached by its keyset cursor.
+        middle = {}
+        for sort in paging.SORT_COLUMNS:
+            row = conn.execute(
+                f"SELECT {sort}, id FROM people ORDER BY {sort}, id LIMIT 1 OFFSET ?", (rows // 2,)
+            ).fetchone()
+            middle[sort] = tuple(row)
+        queries = {
+            f"page by {sort}": (
+                lambda sort=sort: paging.fetch_page(conn, sort, False, middle[sort]),
+                lambda sort=sort: snapshot.fetch_page(sort, False, middle[sort]),
+            )
+            for sort in paging.SORT_COLUMNS
+        }
+        for name, people_filter in FILTERS.items():
+            queries[name] = (
+                lambda f=people_filter: filters.filter_people(conn, f),
+                lambda f=people_filter: snapshot.filter_people(f),
+            )
+        for name, (sql, snap) in queries.items():
+            snap()  # build the cached sort order once
+            sql_ms, snap_ms = median_ms(sql, repeat), median_ms(snap, repeat)
+            print(f"{'':>10}  {name:<32} sqlite {sql_ms:8.2f} ms  snapshot {snap_ms:8.2f} ms")
+        conn.close()
+    finally:
+        pool.close()
+        remove_db(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows, args.repeat, args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Cold start and per-interaction cost of the Streamlit app.
+
+    python -m bench.bench_startup --rows 100000 --output startup.json
+    python -m bench.bench_startup --rows 100000 --compare startup.json
+
+Each measurement runs in a fresh interpreter so module caches start cold.
+Import times cover the data layer and the heavy optional dependencies; the
+app runs (first run, then a rerun of every page) need streamlit installed
+and use its AppTest harness. Save results on one commit and --compare on
+another to see the effect of a change.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from .datasets import remove_db, working_copy
+from .suite import git_commit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["peopledb", "pandas", "pyarrow", "streamlit"]
+
+PAGES = ["➕ Add Person", "📥 Import", "👁️ View All", "✏️ Update", "🗑️ Delete", "🔍 Search"]
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+OPEN_SCRIPT = """
+import time
+start = time.perf_counter()
+from peopledb import PeopleStore
+store = PeopleStore({path!r})
+print(time.perf_counter() - start)
+store.close()
+"""
+
+APP_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+timings = {{}}
+start = time.perf_counter()
+at.run()
+timings["first run"] = time.perf_counter() - start
+for page in {pages!r}:
+    at.sidebar.selectbox[0].select(page)
+    start = time.perf_counter()
+    at.run()
+    timings[page] = time.perf_counter() - start
+    start = time.perf_counter()
+    at.run()
+    timings[page + " (rerun)"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_python(script, cwd=ROOT):
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if result.returncode:
+        return None
+    return result.stdout.strip().splitlines()[-1]
+
+
+def median_seconds(script, repeat):
+    samples = []
+    for _ in range(repeat):
+        out = run_python(script)
+        if out is None:
+            return None
+        samples.append(float(out))
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def measure(rows, repeat, data_dir):
+    results = {}
+    for module in MODULES:
+        seconds = median_seconds(IMPORT_SCRIPT.format(module=module), repeat)
+        if seconds is not None:
+            results[f"import {module}"] = seconds
+    path = working_copy(rows, data_dir)
+    try:
+        results["open store"] = median_seconds(OPEN_SCRIPT.format(path=path), repeat)
+        # The app opens people.db in its working directory.
+        app_dir = tempfile.mkdtemp()
+        try:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    shutil.copy(path + suffix, os.path.join(app_dir, "people.db" + suffix))
+            out = run_python(APP_SCRIPT.format(app=os.path.join(ROOT, "main.py"), pages=PAGES), cwd=app_dir)
+            if out is not None:
+                results.update({f"app {name}": seconds for name, seconds in json.loads(out).items()})
+        finally:
+            shutil.rmtree(app_dir)
+    finally:
+        remove_db(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    results = measure(args.rows, args.repeat, args.data_dir)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        baseline = previous["results"]
+        print(f"Compared with {previous['meta'].get('commit')} ({args.compare}):")
+    print(f"{'step':<32} {'ms':>9} {'before ms':>10}")
+    for name, seconds in results.items():
+        line = f"{name:<32} {seconds * 1000:>9.1f}"
+        if name in baseline:
+            line += f" {baseline[name] * 1000:>10.1f}"
+        print(line)
+    if args.output:
+        meta = {"commit": git_commit(), "rows": args.rows, "python": sys.version.split()[0]}
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
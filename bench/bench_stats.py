@@ -0,0 +1,56 @@
+"""Dashboard statistics: full-scan aggregates vs. the trigger-maintained summary.
+
+    python -m bench.bench_stats --rows 10000 100000 1000000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+
+from peopledb import stats
+
+from .datasets import build_people_db
+
+
+def scan_stats(conn):
+    conn.execute("SELECT COUNT(*) FROM people").fetchone()
+    conn.execute("SELECT AVG(age) FROM people WHERE age IS NOT NULL").fetchone()
+
+
+def summary_stats(conn):
+    stats.read_summary(conn)
+    stats.read_age_histogram(conn)
+    stats.read_email_domains(conn)
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'scan ms':>9} {'summary ms':>11}")
+    for rows in args.rows:
+        path = build_people_db(rows)
+        conn = sqlite3.connect(path)
+        try:
+            scan = median_ms(lambda: scan_stats(conn), args.repeat)
+            summary = median_ms(lambda: summary_stats(conn), args.repeat)
+            print(f"{rows:>10}  {scan:>9.3f} {summary:>11.3f}")
+        finally:
+            conn.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Sustained write throughput: one commit per write vs. the group-commit queue.
+
+    python -m bench.bench_writes --threads 32 --seconds 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from peopledb import PeopleStore, get_profile
+
+INSERT_SQL = "INSERT INTO people (name, age, email) VALUES (?, ?, ?)"
+
+
+def direct_insert(store, worker, n):
+    store.pool.write(lambda conn: conn.execute(INSERT_SQL, ("Bench", 30, f"direct{worker}.{n}@bench.dev")))
+
+
+def queued_insert(store, worker, n):
+    store.add_person("Bench", 30, f"queued{worker}.{n}@bench.dev")
+
+
+def run(mode, profile, threads, seconds):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    store = PeopleStore(path, profile=get_profile(profile))
+    insert = direct_insert if mode == "direct" else queued_insert
+    stop = threading.Event()
+    latencies = []
+    lock = threading.Lock()
+
+    def client(worker):
+        samples = []
+        n = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            # Emails are unique per worker and write: duplicates would fail.
+            insert(store, worker, n)
+            samples.append(time.perf_counter() - start)
+            n += 1
+        with lock:
+            latencies.extend(samples)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    store.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+    return len(latencies) / seconds, statistics.median(latencies) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profiles", nargs="+", default=["wal-durable", "wal"])
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'mode':<7} {'writes/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for profile in args.profiles:
+        for mode in ("direct", "queued"):
+            rate, p50, p99 = run(mode, profile, args.threads, args.seconds)
+            print(f"{profile:<12} {mode:<7} {rate:>10,.0f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import itertools
+import os
+import random
+import shutil
+import sqlite3
+import string
+import tempfile
+
+from peopledb import importer, migrations, schema
+from peopledb.pool import ConnectionPool
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry", "Isla", "Jack",
+    "Karen", "Liam", "Maria", "Noah", "Olivia", "Peter", "Quinn", "Rosa", "Sam", "Tara",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Brown", "Garcia", "Miller", "Davis", "Lopez", "Wilson", "Moore", "Taylor",
+    "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", "Clark", "Lewis", "Young", "King",
+]
+DOMAINS = ["example.com", "mail.com", "corp.io", "school.edu", "startup.dev", "post.org"]
+
+
+def synthetic_people(rows, seed=0):
+    """Yield (name, age, email) tuples with realistic name/domain overlap."""
+    rnd = random.Random(seed)
+    for i in range(rows):
+        first = rnd.choice(FIRST_NAMES)
+        last = rnd.choice(LAST_NAMES)
+        tag = "".join(rnd.choices(string.ascii_lowercase, k=4))
+        age = rnd.randint(0, 100) if rnd.random() > 0.02 else None
+        yield f"{first} {last}", age, f"{first.lower()}.{last.lower()}{i}{tag}@{rnd.choice(DOMAINS)}"
+
+
+def build_people_db(rows, path=None, seed=0, batch=50_000):
+    """Create a populated people.db for benchmarking and return its path.
+
+    Rows go through the bulk importer with deferred indexes; the schema
+    migrations then add the indexes, statistics and FTS index, without
+    pauses, so benchmarks never measure a store whose migrations are still
+    running in the background.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=f"people_{rows}_", suffix=".db")
+        os.close(fd)
+    conn = sqlite3.connect(path)
+    schema.ensure_schema(conn)
+    data = synthetic_people(rows, seed)
+    chunks = ((0, list(itertools.islice(data, batch))) for _ in range(0, rows, batch))
+    importer.import_chunks(conn, chunks, defer_indexes=True)
+    conn.close()
+    migrate(path)
+    return path
+
+
+def migrate(path):
+    """Apply pending schema migrations to a dataset, without pauses."""
+    pool = ConnectionPool(path)
+    try:
+        migrations.Migrator(pool, pause=0).run()
+    finally:
+        pool.close()
+
+
+def remove_db(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def working_copy(rows, data_dir=None):
+    """Return a scratch database with `rows` people that the caller may modify.
+
+    With `data_dir`, generated datasets are kept there as templates and
+    copied for each run, so big tables are only generated once.
+    """
+    if data_dir is None:
+        return build_people_db(rows)
+    os.makedirs(data_dir, exist_ok=True)
+    template = os.path.join(data_dir, f"people_{rows}.db")
+    if not os.path.exists(template):
+        build_people_db(rows, path=template + ".tmp")
+        os.replace(template + ".tmp", template)
+    else:
+        # Templates kept from an older schema.
+        migrate(template)
+    fd, path = tempfile.mkstemp(prefix=f"people_{rows}_", suffix=".db")
+    os.close(fd)
+    shutil.copyfile(template, path)
+    return path
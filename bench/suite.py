@@ -0,0 +1,237 @@
+"""Benchmark every PeopleStore operation at several table sizes.
+
+    python -m bench.suite --rows 10000 100000 1000000 10000000 --output results.json
+    python -m bench.suite --rows 100000 --compare results.json
+
+Each operation runs for --seconds on --threads concurrent client threads and
+is reported as throughput plus p50/p95/p99 latency. Results are written as
+JSON tagged with the git commit so runs can be compared across commits.
+Read operations share one copy of the dataset; every operation that writes
+gets a fresh copy, so no operation is measured on a table another one grew
+or shrank.
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import platform
+import random
+import sqlite3
+import subprocess
+import threading
+import time
+
+from peopledb import PeopleStore, get_profile, profiles
+from peopledb.cache import DEFAULT_MAX_BYTES
+
+from .datasets import remove_db, synthetic_people, working_copy
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+
+SEARCH_TERMS = ["smith", "grace", "startup.dev", "ol", "42", "zzzq"]
+
+BULK_ROWS = 10_000
+
+OPERATIONS = ["add", "bulk_add", "get_all", "page", "update", "delete", "search", "find", "stats"]
+
+# Operations that change the table; each runs on its own copy of the dataset.
+WRITE_OPERATIONS = {"add", "bulk_add", "update", "delete"}
+
+
+def percentile(sorted_samples, q):
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+def bulk_csv(rows):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["name", "age", "email"])
+    writer.writerows(synthetic_people(rows, seed=random.randrange(1 << 30)))
+    return out.getvalue().encode()
+
+
+def operations(store, rows):
+    """name -> (fn(rnd), rows handled per call) for a store holding `rows` people."""
+    payload = bulk_csv(BULK_ROWS)
+    batches = itertools.count()
+
+    def bulk_add(rnd):
+        # A fresh tag in every email, or every call after the first would
+        # import nothing but duplicates.
+        fresh = payload.replace(b"@", f".bulk{next(batches)}@".encode())
+        report = store.import_people(io.BytesIO(fresh))
+        if report.imported != BULK_ROWS:
+            raise RuntimeError(f"bulk_add imported {report.imported:,} of {BULK_ROWS:,} rows")
+
+    return {
+        "add": (lambda rnd: store.add_person("Bench Add", rnd.randint(0, 100), f"add{rnd.getrandbits(64)}@bench.dev"), 1),
+        "bulk_add": (bulk_add, BULK_ROWS),
+        "get_all": (lambda rnd: store.get_all_people(), rows),
+        "page": (lambda rnd: store.get_people_page(after=(None, rnd.randrange(rows)), page_size=50), 50),
+        "update": (
+            lambda rnd: store.update_person(rnd.randrange(1, rows + 1), "Bench Update", 33, f"update{rnd.getrandbits(64)}@bench.dev"), 1
+        ),
+        "delete": (lambda rnd: store.delete_person(rnd.randrange(1, rows + 1)), 1),
+        "search": (lambda rnd: store.search_people(rnd.choice(SEARCH_TERMS)), 1),
+        "find": (lambda rnd: store.find_people(rnd.choice(SEARCH_TERMS)[:3]), 1),
+        "stats": (lambda rnd: store.get_stats(), 1),
+    }
+
+
+def measure(fn, threads, seconds):
+    """Run fn from `threads` clients for `seconds`; each client makes at least one call."""
+    deadline = time.perf_counter() + seconds
+    samples = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rnd = random.Random(seed)
+        local = []
+        while True:
+            start = time.perf_counter()
+            fn(rnd)
+            end = time.perf_counter()
+            local.append(end - start)
+            if end >= deadline:
+                break
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return samples, time.perf_counter() - started
+
+
+def open_copy(rows, args):
+    path = working_copy(rows, args.data_dir)
+    # Unless asked otherwise, disable the query cache so every call reaches SQLite.
+    store = PeopleStore(path, profile=get_profile(args.profile), cache_bytes=DEFAULT_MAX_BYTES if args.cache else 0)
+    return path, store
+
+
+def close_copy(path, store):
+    store.close()
+    remove_db(path)
+
+
+def run_op(store, rows, name, args):
+    # The table's real size, which rows_per_s and the id ranges are based on.
+    table_rows = store.get_stats()[0]
+    fn, rows_per_call = operations(store, table_rows)[name]
+    samples, elapsed = measure(fn, args.threads, args.seconds)
+    samples.sort()
+    return {
+        "rows": rows,
+        "table_rows": table_rows,
+        "op": name,
+        "calls": len(samples),
+        "calls_per_s": len(samples) / elapsed,
+        "rows_per_s": len(samples) * rows_per_call / elapsed,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def run_size(rows, ops, args):
+    results = []
+    shared = None
+    try:
+        for name in ops:
+            if name in WRITE_OPERATIONS:
+                copy = open_copy(rows, args)
+                try:
+                    results.append(run_op(copy[1], rows, name, args))
+                finally:
+                    close_copy(*copy)
+            else:
+                shared = shared or open_copy(rows, args)
+                results.append(run_op(shared[1], rows, name, args))
+            print_result(results[-1])
+    finally:
+        if shared:
+            close_copy(*shared)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_header():
+    print(f"{'rows':>10}  {'op':<9} {'calls/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+
+def print_result(r, baseline=None):
+    line = (
+        f"{r['rows']:>10}  {r['op']:<9} {r['calls_per_s']:>10,.1f} "
+        f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}"
+    )
+    if baseline:
+        line += (
+            f"   calls/s {r['calls_per_s'] / baseline['calls_per_s']:.2f}x,"
+            f" p99 {r['p99_ms'] / baseline['p99_ms']:.2f}x"
+        )
+    print(line)
+
+
+def compare(results, path):
+    with open(path) as f:
+        previous = json.load(f)
+    baseline = {(r["rows"], r["op"]): r for r in previous["results"]}
+    print(f"\nCompared with {previous['meta'].get('commit')} ({path}):")
+    print_header()
+    for r in results:
+        print_result(r, baseline.get((r["rows"], r["op"])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--profile", choices=list(profiles.PROFILES), default=profiles.DEFAULT_PROFILE)
+    parser.add_argument("--cache", action="store_true", help="Keep the query cache enabled")
+    parser.add_argument("--data-dir", help="Keep generated datasets here and reuse them")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "threads": args.threads,
+        "seconds": args.seconds,
+        "profile": args.profile,
+        "cache": args.cache,
+    }
+    print_header()
+    results = []
+    for rows in args.rows:
+        results += run_size(rows, args.ops, args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import time
+
 import streamlit as st
-import sqlite3
-import pandas as pd
+
+from peopledb import DuplicateEmailError, PeopleFilter, SearchCancelled, grid
+from peopledb.export import EXPORT_FORMATS, parquet_available
+from peopledb.importer import defer_indexes_by_default
+from resources import dataframe, get_store, live_search, live_search_box, page_style, people_table
 
 # ---------- Page Configuration ----------
 st.set_page_config(
@@ -11,229 +16,62 @@ st.set_page_config(
 )
 
 # ---------- Custom CSS Styling ----------
-st.markdown("""
-<style>
-    /* Import modern font */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Global styles */
-    .stApp {
-        font-family: 'Inter', sans-serif;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    /* Main container */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-        background: rgba(255, 255, 255, 0.95);
-        border-radius: 20px;
-        box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-        backdrop-filter: blur(10px);
-        margin: 2rem auto;
-        max-width: 1200px;
-    }
-    
-    /* Title styling */
-    .main-title {
-        text-align: center;
-        color: #2c3e50;
-        font-size: 3rem;
-        font-weight: 700;
-        margin-bottom: 2rem;
-        text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.1);
-        background: linear-gradient(135deg, #667eea, #764ba2);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    /* Sidebar styling */
-    .css-1d391kg {
-        background: linear-gradient(180deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    .css-1d391kg .css-1544g2n {
-        background: transparent;
-        color: white;
-    }
-    
-    .css-1d391kg .css-1544g2n:hover {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 10px;
-    }
-    
-    /* Section headers */
-    .section-header {
-        color: #2c3e50;
-        font-size: 2rem;
-        font-weight: 600;
-        margin-bottom: 1.5rem;
-        padding-bottom: 0.5rem;
-        border-bottom: 3px solid #667eea;
-        text-align: center;
-    }
-    
-    /* Form styling */
-    .stForm {
-        background: #f8f9fa;
-        padding: 2rem;
-        border-radius: 15px;
-        box-shadow: 0 10px 30px rgba(0, 0, 0, 0.1);
-        border: 1px solid #e9ecef;
-    }
-    
-    /* Input fields */
-    .stTextInput input, .stNumberInput input {
-        border: 2px solid #e9ecef;
-        border-radius: 10px;
-        padding: 0.75rem;
-        font-size: 1rem;
-        transition: all 0.3s ease;
-    }
-    
-    .stTextInput input:focus, .stNumberInput input:focus {
-        border-color: #667eea;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
-    }
-    
-    /* Buttons */
-    .stButton button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        padding: 0.75rem 2rem;
-        border-radius: 10px;
-        font-weight: 600;
-        font-size: 1rem;
-        transition: all 0.3s ease;
-        box-shadow: 0 5px 15px rgba(102, 126, 234, 0.3);
-    }
-    
-    .stButton button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 25px rgba(102, 126, 234, 0.4);
-    }
-    
-    /* Success/Warning/Info messages */
-    .stAlert {
-        border-radius: 10px;
-        border: none;
-        box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* Data table styling */
-    .stDataFrame {
-        background: white;
-        border-radius: 15px;
-        overflow: hidden;
-        box-shadow: 0 10px 30px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* Select box styling */
-    .stSelectbox > div > div {
-        border-radius: 10px;
-        border: 2px solid #e9ecef;
-    }
-    
-    /* Sidebar selectbox */
-    .css-1d391kg .stSelectbox > div > div {
-        background: rgba(255, 255, 255, 0.1);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        color: white;
-    }
-    
-    /* Card styling for stats */
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        color: white;
-        text-align: center;
-        box-shadow: 0 10px 30px rgba(0, 0, 0, 0.1);
-        margin: 1rem 0;
-    }
-    
-    .metric-value {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin-bottom: 0.5rem;
-    }
-    
-    .metric-label {
-        font-size: 1rem;
-        font-weight: 500;
-        opacity: 0.9;
-    }
-    
-    /* Animation for form submission */
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(20px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .fade-in {
-        animation: fadeIn 0.5s ease-out;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(page_style(), unsafe_allow_html=True)
 
 # ---------- Database setup ----------
-conn = sqlite3.connect('people.db', check_same_thread=False)
-c = conn.cursor()
+store = get_store()
 
-c.execute('''
-    CREATE TABLE IF NOT EXISTS people (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        age INTEGER,
-        email TEXT
-    )
-''')
-conn.commit()
+SEARCH_LIMIT = 100
+PAGE_SIZES = [25, 50, 100, 250]
+SORT_OPTIONS = {"ID": "id", "Name": "name", "Age": "age", "Email": "email"}
+DUPLICATE_OPTIONS = {
+    "Skip rows whose email already exists": "skip",
+    "Overwrite the existing person": "update",
+    "Keep the existing person, filling in a missing age": "merge",
+}
 
-# ---------- Database functions ----------
-def add_person(name, age, email):
-    c.execute("INSERT INTO people (name, age, email) VALUES (?, ?, ?)", (name, age, email))
-    conn.commit()
+def format_person(person):
+    return f"ID: {person[0]} - {person[1]} ({person[3]})"
 
-def get_all_people():
-    c.execute("SELECT * FROM people")
-    return c.fetchall()
+def person_picker(label, key):
+    """Typeahead selection by ID or name/email prefix; returns the chosen person or None."""
+    query = st.text_input("🔎 Find by ID, name or email", key=f"{key}_query", placeholder="Start typing...")
+    candidates = store.find_people(query)
+    if not candidates:
+        st.warning("🔍 No matching people. Try a different ID, name or email.")
+        return None
+    labels = {p[0]: format_person(p) for p in candidates}
+    selected_id = st.selectbox(label, list(labels), format_func=labels.get, key=f"{key}_id")
+    return store.get_person(selected_id)
 
-def update_person(person_id, name, age, email):
-    c.execute("UPDATE people SET name = ?, age = ?, email = ? WHERE id = ?", (name, age, email, person_id))
-    conn.commit()
+def show_search_results(results):
+    if results:
+        if len(results) >= SEARCH_LIMIT:
+            st.success(f"✅ Showing the {SEARCH_LIMIT} best matches. Refine your search to narrow it down.")
+        else:
+            st.success(f"✅ Found {len(results)} matching record(s)")
+        st.dataframe(people_table(results), use_container_width=True, hide_index=True)
+    else:
+        st.warning("🔍 No matching records found. Try a different search term.")
 
-def delete_person(person_id):
-    c.execute("DELETE FROM people WHERE id = ?", (person_id,))
-    conn.commit()
+# ---------- Streamlit UI ----------
+st.markdown('<h1 class="main-title">👥 People Database Manager</h1>', unsafe_allow_html=True)
 
-def search_people(search_term):
-    like_term = f"%{search_term}%"
-    c.execute("""
-        SELECT * FROM people
-        WHERE name LIKE ? OR
-              age LIKE ? OR
-              email LIKE ?
-    """, (like_term, like_term, like_term))
-    return c.fetchall()
+# Sidebar menu; the query profiler is only listed when opened with ?admin=1
+menu = ["➕ Add Person", "📥 Import", "👁️ View All", "✏️ Update", "🗑️ Delete", "🔍 Search"]
+if st.query_params.get("admin") == "1":
+    menu.append("🛠️ Query Profiler")
+choice = st.sidebar.selectbox("📋 Navigation Menu", menu)
 
-def get_stats():
-    c.execute("SELECT COUNT(*) FROM people")
-    total_people = c.fetchone()[0]
-    
-    c.execute("SELECT AVG(age) FROM people WHERE age IS NOT NULL")
-    avg_age = c.fetchone()[0]
-    avg_age = round(avg_age, 1) if avg_age else 0
-    
-    return total_people, avg_age
+# Attribute every query made during this rerun to the current page
+db_run = store.metrics.start_run(choice)
 
-# ---------- Streamlit UI ----------
-st.markdown('<h1 class="main-title">👥 People Database Manager</h1>', unsafe_allow_html=True)
+def rerun():
+    store.metrics.finish_run(db_run)
+    st.rerun()
 
 # Display stats
-total_people, avg_age = get_stats()
+total_people, avg_age = store.get_stats()
 col1, col2, col3 = st.columns(3)
 
 with col1:
@@ -262,10 +100,6 @@ with col3:
 
 st.markdown("---")
 
-# Sidebar menu
-menu = ["➕ Add Person", "👁️ View All", "✏️ Update", "🗑️ Delete", "🔍 Search"]
-choice = st.sidebar.selectbox("📋 Navigation Menu", menu)
-
 if choice == "➕ Add Person":
     st.markdown('<h2 class="section-header">Add New Person</h2>', unsafe_allow_html=True)
     
@@ -284,110 +118,344 @@ if choice == "➕ Add Person":
         
         if submitted:
             if name and email:
-                add_person(name, age, email)
-                st.success(f"🎉 Successfully added {name} to the database!")
-                st.balloons()
+                try:
+                    store.add_person(name, age, email)
+                except DuplicateEmailError as e:
+                    st.error(f"⚠️ {e}")
+                else:
+                    st.success(f"🎉 Successfully added {name} to the database!")
+                    st.balloons()
             else:
                 st.error("⚠️ Please fill in all required fields (Name and Email)")
 
+elif choice == "📥 Import":
+    st.markdown('<h2 class="section-header">Import People</h2>', unsafe_allow_html=True)
+    
+    st.info("📄 Upload a CSV (optionally gzipped) or Parquet file with **name**, **age** and **email** columns.")
+    import_types = ["csv", "gz"] + (["parquet"] if parquet_available() else [])
+    uploaded = st.file_uploader("📁 Choose a file", type=import_types)
+    defer_indexes = st.checkbox(
+        "⚡ Rebuild indexes after the import (faster for large files)",
+        value=uploaded is not None and defer_indexes_by_default(uploaded.size, total_people),
+        help="Drops the sort indexes during the load and rebuilds them once at the end; "
+             "new rows join the full-text index in the background shortly after."
+    )
+    on_duplicate = DUPLICATE_OPTIONS[st.selectbox("👥 Duplicate emails", list(DUPLICATE_OPTIONS))]
+    
+    if uploaded and st.button("📥 Import", use_container_width=True):
+        import_format = {"gz": "csv.gz", "parquet": "parquet"}.get(uploaded.name.rsplit(".", 1)[-1].lower(), "csv")
+        progress_bar = st.progress(0.0, text="Starting import...")
+        
+        def show_progress(report):
+            if report.total:
+                fraction = report.read / report.total
+            else:
+                fraction = uploaded.tell() / max(uploaded.size, 1)
+            progress_bar.progress(min(fraction, 1.0), text=f"Read {report.read:,} rows...")
+        
+        try:
+            report = store.import_people(
+                uploaded, import_format, defer_indexes=defer_indexes, progress=show_progress,
+                on_duplicate=on_duplicate
+            )
+        except ValueError as e:
+            progress_bar.empty()
+            st.error(f"⚠️ {e}")
+        else:
+            progress_bar.progress(1.0, text="Import finished")
+            st.success(
+                f"🎉 Imported {report.imported:,} people in {report.elapsed:.1f}s "
+                f"({report.rows_per_second:,.0f} rows/s)"
+            )
+            if report.duplicates:
+                st.info(f"👥 {report.duplicates:,} row(s) had an email that already exists.")
+            if report.rejected_count:
+                st.warning(f"⚠️ {report.rejected_count:,} row(s) were rejected.")
+                st.download_button(
+                    label="📥 Download error report",
+                    data=report.errors_csv(),
+                    file_name="import_errors.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+
 elif choice == "👁️ View All":
     st.markdown('<h2 class="section-header">All People in Database</h2>', unsafe_allow_html=True)
     
-    people = get_all_people()
-    if people:
-        df = pd.DataFrame(people, columns=['ID', 'Name', 'Age', 'Email'])
-        st.dataframe(df, use_container_width=True, hide_index=True)
+    if total_people:
+        with st.expander("📊 Statistics"):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**🎂 Age distribution**")
+                ages = dataframe(store.get_age_histogram(), columns=['Age', 'People'])
+                st.bar_chart(ages, x='Age', y='People')
+            with col2:
+                st.markdown("**📧 Top email domains**")
+                domains = dataframe(store.get_email_domains(), columns=['Domain', 'People'])
+                st.dataframe(domains, use_container_width=True, hide_index=True)
+            null_counts = store.get_null_counts()
+            st.caption(f"Missing ages: {null_counts['age']:,} · Missing emails: {null_counts['email']:,}")
         
-        # Download option
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download as CSV",
-            data=csv,
-            file_name="people_database.csv",
-            mime="text/csv",
-            use_container_width=True
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_label = st.selectbox("↕️ Sort by", list(SORT_OPTIONS))
+        with col2:
+            descending = st.selectbox("🔃 Order", ["Ascending", "Descending"]) == "Descending"
+        with col3:
+            page_size = st.selectbox("📄 Rows per page", PAGE_SIZES, index=1)
+        
+        with st.expander("🔎 Filters"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                age_range = st.slider("🎂 Age range", 0, 120, (0, 120))
+            with col2:
+                email_domain = st.text_input("📧 Email domain", placeholder="example.com")
+                domain_prefix = st.checkbox("Match domain prefix")
+            with col3:
+                name_prefix = st.text_input("👤 Name starts with", placeholder="Gr...")
+        people_filter = PeopleFilter(
+            min_age=age_range[0] if age_range[0] > 0 else None,
+            max_age=age_range[1] if age_range[1] < 120 else None,
+            email_domain=email_domain or None,
+            domain_prefix=domain_prefix,
+            name_prefix=name_prefix or None,
+            sort=SORT_OPTIONS[sort_label],
+            descending=descending,
+            limit=page_size,
         )
+        
+        if people_filter.is_empty and grid.arrow_available():
+            # Only the rows in view are read (from cached Arrow chunks) and sent
+            first_row = st.number_input(
+                "⬇️ First row", min_value=1, max_value=total_people, step=page_size,
+                help="Step by a page with − and +, or type a row number to jump to it."
+            )
+            window = store.get_people_window(
+                first_row - 1, sort=SORT_OPTIONS[sort_label], descending=descending, size=page_size
+            )
+            st.dataframe(window, use_container_width=True, hide_index=True)
+            st.caption(f"Rows {first_row:,}–{first_row + window.num_rows - 1:,} of {total_people:,}")
+        elif people_filter.is_empty:
+            # Keyset cursors of the pages visited so far; reset when the ordering changes
+            view_key = (SORT_OPTIONS[sort_label], descending, page_size)
+            if st.session_state.get("view_key") != view_key:
+                st.session_state.view_key = view_key
+                st.session_state.view_cursors = [None]
+            cursors = st.session_state.view_cursors
+            
+            people, next_cursor = store.get_people_page(
+                sort=SORT_OPTIONS[sort_label],
+                descending=descending,
+                after=cursors[-1],
+                page_size=page_size,
+            )
+            st.dataframe(people_table(people), use_container_width=True, hide_index=True)
+            
+            page_count = max(1, -(-total_people // page_size))
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("⬅️ Previous", use_container_width=True, disabled=len(cursors) == 1):
+                    cursors.pop()
+                    rerun()
+            with col2:
+                st.markdown(
+                    f"<div style='text-align: center;'>Page {len(cursors)} of {page_count}</div>",
+                    unsafe_allow_html=True
+                )
+            with col3:
+                if st.button("Next ➡️", use_container_width=True, disabled=next_cursor is None):
+                    cursors.append(next_cursor)
+                    rerun()
+        else:
+            people = store.filter_people(people_filter)
+            if len(people) >= page_size:
+                st.success(f"✅ Showing the first {page_size} matches. Narrow the filters to see others.")
+            else:
+                st.success(f"✅ Found {len(people)} matching record(s)")
+            st.dataframe(people_table(people), use_container_width=True, hide_index=True)
+        
+        # Download option: streamed from the database in batches on demand
+        formats = {"CSV": "csv", "CSV (gzip)": "csv.gz"}
+        if parquet_available():
+            formats["Parquet"] = "parquet"
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            export_format = formats[st.selectbox("💾 Export format", list(formats))]
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            prepare = st.button("📦 Prepare download", use_container_width=True)
+        if prepare:
+            extension, mime = EXPORT_FORMATS[export_format]
+            with store.export_people(export_format) as exported:
+                st.download_button(
+                    label="📥 Download",
+                    data=exported.read(),
+                    file_name=f"people_database.{extension}",
+                    mime=mime,
+                    use_container_width=True
+                )
     else:
         st.info("📭 No people in the database yet. Add some people to get started!")
 
 elif choice == "✏️ Update":
     st.markdown('<h2 class="section-header">Update Person Information</h2>', unsafe_allow_html=True)
     
-    people = get_all_people()
-    if people:
-        # Create a more user-friendly display for selection
-        people_display = [f"ID: {p[0]} - {p[1]} ({p[3]})" for p in people]
-        selected_display = st.selectbox("👤 Select Person to Update", people_display)
+    if total_people:
+        selected_person = person_picker("👤 Select Person to Update", "update")
         
-        if selected_display:
-            selected_id = int(selected_display.split(":")[1].split(" -")[0])
-            selected_person = next((p for p in people if p[0] == selected_id), None)
+        if selected_person:
+            selected_id = selected_person[0]
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                new_name = st.text_input("👤 Name", value=selected_person[1])
+                new_age = st.number_input("🎂 Age", min_value=0, max_value=120, value=selected_person[2])
             
-            if selected_person:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    new_name = st.text_input("👤 Name", value=selected_person[1])
-                    new_age = st.number_input("🎂 Age", min_value=0, max_value=120, value=selected_person[2])
-                
-                with col2:
-                    new_email = st.text_input("📧 Email", value=selected_person[3])
-                    st.markdown("<br>", unsafe_allow_html=True)
-                
-                if st.button("💾 Update Person", use_container_width=True):
-                    update_person(selected_id, new_name, new_age, new_email)
+            with col2:
+                new_email = st.text_input("📧 Email", value=selected_person[3])
+                st.markdown("<br>", unsafe_allow_html=True)
+            
+            if st.button("💾 Update Person", use_container_width=True):
+                try:
+                    store.update_person(selected_id, new_name, new_age, new_email)
+                except DuplicateEmailError as e:
+                    st.error(f"⚠️ {e}")
+                else:
                     st.success("✅ Person updated successfully!")
-                    st.rerun()
+                    rerun()
     else:
         st.info("📭 No people in the database to update.")
 
 elif choice == "🗑️ Delete":
     st.markdown('<h2 class="section-header">Delete Person</h2>', unsafe_allow_html=True)
     
-    people = get_all_people()
-    if people:
-        people_display = [f"ID: {p[0]} - {p[1]} ({p[3]})" for p in people]
-        selected_display = st.selectbox("👤 Select Person to Delete", people_display)
+    if total_people:
+        selected_person = person_picker("👤 Select Person to Delete", "delete")
         
-        if selected_display:
-            selected_id = int(selected_display.split(":")[1].split(" -")[0])
-            selected_person = next((p for p in people if p[0] == selected_id), None)
+        if selected_person:
+            selected_id = selected_person[0]
+            st.warning(f"⚠️ Are you sure you want to delete **{selected_person[1]}**?")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("🗑️ Yes, Delete", use_container_width=True):
+                    store.delete_person(selected_id)
+                    st.success("✅ Person deleted successfully!")
+                    rerun()
             
-            if selected_person:
-                st.warning(f"⚠️ Are you sure you want to delete **{selected_person[1]}**?")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("🗑️ Yes, Delete", use_container_width=True):
-                        delete_person(selected_id)
-                        st.success("✅ Person deleted successfully!")
-                        st.rerun()
-                
-                with col2:
-                    if st.button("❌ Cancel", use_container_width=True):
-                        st.info("Delete operation cancelled.")
+            with col2:
+                if st.button("❌ Cancel", use_container_width=True):
+                    st.info("Delete operation cancelled.")
     else:
         st.info("📭 No people in the database to delete.")
 
 elif choice == "🔍 Search":
     st.markdown('<h2 class="section-header">Search People</h2>', unsafe_allow_html=True)
     
-    search_term = st.text_input("🔍 Enter search term", placeholder="Search by name, age, or email...")
+    placeholder = "Name or email, or an age like 42, 30-40 or >65..."
+    if st.toggle("⚡ Search as you type", value=True):
+        search_term = live_search_box(placeholder, key="live_search_term")
+        if search_term:
+            try:
+                results = live_search(SEARCH_LIMIT).search(search_term)
+            except SearchCancelled:
+                # A newer term from this session took over; its rerun draws the results.
+                store.metrics.finish_run(db_run)
+                st.stop()
+            show_search_results(results)
+    else:
+        search_term = st.text_input("🔍 Enter search term", placeholder=placeholder)
+        
+        col1, col2 = st.columns([3, 1])
+        with col2:
+            search_button = st.button("🔍 Search", use_container_width=True)
+        
+        if search_button and search_term:
+            show_search_results(store.search_people(search_term, limit=SEARCH_LIMIT))
+        elif search_button:
+            st.error("⚠️ Please enter a search term.")
+
+elif choice == "🛠️ Query Profiler":
+    st.markdown('<h2 class="section-header">Query Profiler</h2>', unsafe_allow_html=True)
+    metrics = store.metrics
     
     col1, col2 = st.columns([3, 1])
+    with col1:
+        st.caption(f"Queries slower than {metrics.slow_ms:g} ms are logged with their query plan.")
     with col2:
-        search_button = st.button("🔍 Search", use_container_width=True)
+        if st.button("🧹 Reset", use_container_width=True):
+            metrics.reset()
     
-    if search_button and search_term:
-        results = search_people(search_term)
-        if results:
-            st.success(f"✅ Found {len(results)} matching record(s)")
-            df = pd.DataFrame(results, columns=['ID', 'Name', 'Age', 'Email'])
-            st.dataframe(df, use_container_width=True, hide_index=True)
+    summary = metrics.summary()
+    if summary:
+        st.markdown("**⏱️ Queries by total time**")
+        df = dataframe(summary)
+        df["pages"] = df["pages"].map(lambda pages: ", ".join(str(p) for p in pages))
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        
+        shape = st.selectbox("📊 Latency histogram for", [row["query"] for row in summary])
+        histogram = dataframe(metrics.histogram(shape), columns=["Latency", "Calls"])
+        st.bar_chart(histogram, x="Latency", y="Calls")
+    else:
+        st.info("📭 No queries recorded yet.")
+    
+    if metrics.run_log:
+        st.markdown("**🔁 DB time per rerun**")
+        runs = dataframe([
+            {
+                "Started": time.strftime("%H:%M:%S", time.localtime(run.started)),
+                "Page": run.page,
+                "Queries": run.queries,
+                "DB ms": run.seconds * 1000,
+                "Rerun ms": run.elapsed * 1000,
+            }
+            for run in reversed(metrics.run_log)
+        ])
+        st.dataframe(runs, use_container_width=True, hide_index=True)
+    
+    st.markdown("**🐢 Slow queries**")
+    if metrics.slow_log:
+        for entry in reversed(metrics.slow_log):
+            with st.expander(f"{entry['ms']:,.1f} ms · {entry['page']} · {entry['query'][:80]}"):
+                st.code(entry["query"], language="sql")
+                st.caption(f"{entry['rows']:,} row(s)")
+                if entry["plan"]:
+                    st.code(entry["plan"])
+    else:
+        st.caption("None so far.")
+    
+    st.markdown("**💽 Storage**")
+    space = store.space_report()
+    st.caption(
+        f"File {space['file_bytes'] / 2**20:,.1f} MiB · WAL {space['wal_bytes'] / 2**20:,.1f} MiB · "
+        f"free {space['free_bytes'] / 2**20:,.1f} MiB ({space['free_share']:.1%}) · "
+        f"auto_vacuum {space['auto_vacuum']}"
+    )
+    if st.button("📏 Measure fragmentation", help="Reads every page of the database file"):
+        fragmentation = store.space_report(fragmentation=True)["fragmentation"]
+        if fragmentation is None:
+            st.info("This SQLite build has no dbstat table to measure fragmentation with.")
         else:
-            st.warning("🔍 No matching records found. Try a different search term.")
-    elif search_button:
-        st.error("⚠️ Please enter a search term.")
+            df = dataframe(sorted(fragmentation.items(), key=lambda item: -item[1]),
+                           columns=["Table or index", "Out-of-order pages"])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+# ---------- Schema migrations ----------
+if store.migrator.running:
+    for step in store.migrator.progress.values():
+        if not step["done"]:
+            share = f" · {step['last_id'] / step['max_id']:.0%}" if step["max_id"] else ""
+            st.sidebar.caption(f"🛠️ Migrating schema to v{step['version']} ({step['migration']}){share}")
+elif store.migrator.error:
+    st.sidebar.warning(f"⚠️ Schema migration stopped: {store.migrator.error}")
+
+# ---------- Cache statistics ----------
+cache_info = store.cache.info()
+st.sidebar.markdown("---")
+st.sidebar.caption(
+    f"⚡ Query cache: {cache_info['hits']:,} hits · {cache_info['misses']:,} misses · "
+    f"{cache_info['entries']:,} entries ({cache_info['bytes'] / 2**20:.1f} MiB)"
+)
 
 # ---------- Footer ----------
 st.markdown("---")
@@ -398,4 +466,6 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+store.metrics.finish_run(db_run)
+
 # ---------- End ----------
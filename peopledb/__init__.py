@@ -0,0 +1,14 @@
+from .aio import AsyncPeopleStore
+from .dedupe import DuplicateEmailError
+from .filters import PeopleFilter
+from .livesearch import LiveSearch
+from .profiles import StorageProfile, get_profile, load_profile
+from .retention import RetentionPolicy
+from .search import SearchCancelled
+from .sharded import ShardedPeopleStore
+from .store import DB_PATH, PeopleStore
+
+__all__ = [
+    "AsyncPeopleStore", "DB_PATH", "DuplicateEmailError", "LiveSearch", "PeopleFilter", "PeopleStore",
+    "RetentionPolicy", "SearchCancelled", "ShardedPeopleStore", "StorageProfile", "get_profile", "load_profile",
+]
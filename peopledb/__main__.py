@@ -0,0 +1,279 @@
+"""Command-line tools for a people database.
+
+    python -m peopledb export people.db people.csv
+    python -m peopledb changes people.db --since 0 > changes.jsonl
+    python -m peopledb changes people.db --since 1500 --format batches --batch-size 500
+    python -m peopledb compact-changes people.db --keep 100000
+    python -m peopledb find-duplicates people.db --threshold 0.9 > pairs.jsonl
+    python -m peopledb backup people.db backups/ --keep 14
+    python -m peopledb restore backups/ people.db --snapshot 20261017T120000123456Z
+    python -m peopledb check people.db
+    python -m peopledb check backups/ --full
+    python -m peopledb archive people.db --before-id 500000 --min-age 90
+    python -m peopledb archived people.archive.db > archived.jsonl
+    python -m peopledb space people.db --fragmentation
+    python -m peopledb vacuum people.db
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+
+from . import backup, changes, dedupe, export, retention, space
+from .filters import PeopleFilter
+from .store import DB_PATH, PeopleStore
+
+
+def open_store(path):
+    store = PeopleStore(path, cache_bytes=0, instrument=False)
+    # The change log is created by a migration.
+    store.migrator.wait()
+    return store
+
+
+def cmd_export(args):
+    store = open_store(args.path)
+    try:
+        seq, data = store.export_with_seq(args.format)
+    finally:
+        store.close()
+    with data, open(args.out, "wb") as out:
+        shutil.copyfileobj(data, out)
+    # The cursor to continue from with `changes --since`.
+    print(seq)
+
+
+def cmd_changes(args):
+    store = open_store(args.path)
+    try:
+        since = args.since
+        for batch in store.iter_changes(since, args.batch_size):
+            if args.format == "jsonl":
+                changes.write_json_lines(batch, sys.stdout)
+            else:
+                next_seq = batch[-1][0]
+                print(json.dumps({"since": since, "next": next_seq, "changes": changes.as_dicts(batch)}))
+                since = next_seq
+    except changes.ChangesCompactedError as exc:
+        sys.exit(str(exc))
+    finally:
+        store.close()
+
+
+def cmd_compact_changes(args):
+    store = open_store(args.path)
+    try:
+        removed = store.compact_changes(through=args.through, keep=args.keep)
+        print(f"Removed {removed:,} change-log entries", file=sys.stderr)
+    finally:
+        store.close()
+
+
+def cmd_find_duplicates(args):
+    store = open_store(args.path)
+    try:
+        found = store.find_duplicates(args.threshold, args.window)
+        print(f"Found {found:,} candidate pairs", file=sys.stderr)
+        for score, a_id, a_name, a_email, b_id, b_name, b_email in store.get_duplicates(limit=args.limit):
+            print(json.dumps({
+                "score": score,
+                "a": {"id": a_id, "name": a_name, "email": a_email},
+                "b": {"id": b_id, "name": b_name, "email": b_email},
+            }))
+    finally:
+        store.close()
+
+
+def cmd_backup(args):
+    def show(remaining, total):
+        print(f"\rCopied {total - remaining:,}/{total:,} pages", end="", file=sys.stderr)
+
+    snapshot = backup.backup(args.path, args.directory, keep=args.keep, step_pages=args.step_pages,
+                             pause=args.pause, progress=show)
+    print(f"\nSnapshot {snapshot.name}: {snapshot.size:,} bytes, "
+          f"{snapshot.new_chunks}/{len(snapshot.chunks)} new chunks", file=sys.stderr)
+
+
+def cmd_restore(args):
+    try:
+        snapshot = backup.restore(args.directory, args.path, args.snapshot, args.source)
+    except backup.BackupError as exc:
+        sys.exit(str(exc))
+    print(f"Restored {args.path} from snapshot {snapshot.name}", file=sys.stderr)
+
+
+def cmd_check(args):
+    """Check a database file, or every snapshot in a backup directory."""
+    if os.path.isdir(args.path):
+        store = backup.BackupStore(args.path)
+        results = [
+            (f"{snapshot.name} ({snapshot.source})", store.verify(snapshot, quick=not args.full))
+            for snapshot in store.snapshots()
+        ]
+    else:
+        conn = sqlite3.connect(f"file:{args.path}?mode=ro", uri=True)
+        try:
+            results = [(args.path, backup.integrity_check(conn, quick=not args.full))]
+        finally:
+            conn.close()
+    failed = False
+    for name, problems in results:
+        print(f"{name}: {'ok' if not problems else problems[0]}")
+        for problem in problems[1:]:
+            print(f"    {problem}")
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+def cmd_archive(args):
+    people_filter = None
+    if args.min_age is not None or args.max_age is not None or args.domain or args.name_prefix:
+        people_filter = PeopleFilter(min_age=args.min_age, max_age=args.max_age, email_domain=args.domain,
+                                     name_prefix=args.name_prefix)
+    policy = retention.RetentionPolicy(match=people_filter, before_id=args.before_id)
+    try:
+        policy.clauses()
+    except ValueError as exc:
+        sys.exit(str(exc))
+    store = PeopleStore(args.path, cache_bytes=0, instrument=False, archive_path=args.archive)
+    try:
+        report = store.archive_people(policy, batch_rows=args.batch_rows)
+        print(f"Archived {report.rows:,} people in {report.batches} batches to {store.archive_path} "
+              f"({report.elapsed:.1f}s)", file=sys.stderr)
+        if report.recovered:
+            print(f"Removed {report.recovered:,} already archived by an interrupted run", file=sys.stderr)
+    finally:
+        store.close()
+
+
+def cmd_archived(args):
+    archive = retention.open_archive(args.path)
+    try:
+        for _, _, rows in retention.iter_archived(archive):
+            for person_id, name, age, email in rows:
+                print(json.dumps({"id": person_id, "name": name, "age": age, "email": email}))
+    finally:
+        archive.close()
+
+
+def cmd_space(args):
+    conn = sqlite3.connect(f"file:{args.path}?mode=ro", uri=True)
+    try:
+        report = space.space_report(conn, args.fragmentation)
+    finally:
+        conn.close()
+    print(f"File: {report['file_bytes']:,} bytes ({report['pages']:,} pages of {report['page_size']:,}), "
+          f"WAL: {report['wal_bytes']:,} bytes")
+    print(f"Free: {report['free_bytes']:,} bytes ({report['free_share']:.1%}), "
+          f"auto_vacuum: {report['auto_vacuum']}")
+    if args.fragmentation:
+        if report["fragmentation"] is None:
+            print("Fragmentation: unavailable (SQLite built without dbstat)")
+        else:
+            for name, share in sorted(report["fragmentation"].items(), key=lambda item: -item[1]):
+                print(f"    {share:6.1%}  {name}")
+
+
+def cmd_vacuum(args):
+    store = open_store(args.path)
+    try:
+        before = store.space_report()["file_bytes"]
+        if args.incremental:
+            freed = store.incremental_vacuum(pages=args.pages)
+            print(f"Returned {freed:,} free pages", file=sys.stderr)
+        else:
+            store.vacuum()
+        after = store.space_report()["file_bytes"]
+        print(f"{before:,} -> {after:,} bytes", file=sys.stderr)
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m peopledb", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dump = commands.add_parser("export", help="Export every person; prints the change-log seq it reflects")
+    dump.add_argument("path", nargs="?", default=DB_PATH)
+    dump.add_argument("out")
+    dump.add_argument("--format", choices=list(export.EXPORT_FORMATS), default="csv")
+    dump.set_defaults(run=cmd_export)
+
+    stream = commands.add_parser("changes", help="Stream changes after a cursor")
+    stream.add_argument("path", nargs="?", default=DB_PATH)
+    stream.add_argument("--since", type=int, default=0, help="Last seq already applied")
+    stream.add_argument("--format", choices=["jsonl", "batches"], default="jsonl")
+    stream.add_argument("--batch-size", type=int, default=changes.DEFAULT_BATCH_SIZE)
+    stream.set_defaults(run=cmd_changes)
+
+    compact = commands.add_parser("compact-changes", help="Delete old change-log entries")
+    compact.add_argument("path", nargs="?", default=DB_PATH)
+    limit = compact.add_mutually_exclusive_group(required=True)
+    limit.add_argument("--through", type=int, help="Delete entries up to this seq")
+    limit.add_argument("--keep", type=int, help="Keep only the newest N entries")
+    compact.set_defaults(run=cmd_compact_changes)
+
+    duplicates = commands.add_parser("find-duplicates", help="Find people with similar names at one email domain")
+    duplicates.add_argument("path", nargs="?", default=DB_PATH)
+    duplicates.add_argument("--threshold", type=float, default=dedupe.DEFAULT_THRESHOLD,
+                            help="Minimum name similarity, 0-1")
+    duplicates.add_argument("--window", type=int, default=dedupe.DEFAULT_WINDOW,
+                            help="Neighbours each row is compared with")
+    duplicates.add_argument("--limit", type=int, default=None, help="Print at most N pairs, best first")
+    duplicates.set_defaults(run=cmd_find_duplicates)
+
+    snapshot = commands.add_parser("backup", help="Snapshot a live database into a backup directory")
+    snapshot.add_argument("path")
+    snapshot.add_argument("directory")
+    snapshot.add_argument("--keep", type=int, default=backup.DEFAULT_KEEP, help="Snapshots to keep")
+    snapshot.add_argument("--step-pages", type=int, default=backup.BACKUP_STEP_PAGES)
+    snapshot.add_argument("--pause", type=float, default=backup.BACKUP_PAUSE, help="Seconds between steps")
+    snapshot.set_defaults(run=cmd_backup)
+
+    restore = commands.add_parser("restore", help="Replace a database with a snapshot")
+    restore.add_argument("directory")
+    restore.add_argument("path")
+    restore.add_argument("--snapshot", help="Snapshot name (default: newest of --source)")
+    restore.add_argument("--source", help="Database the snapshots were taken of (default: path)")
+    restore.set_defaults(run=cmd_restore)
+
+    check = commands.add_parser("check", help="Integrity-check a database or a backup directory")
+    check.add_argument("path")
+    check.add_argument("--full", action="store_true", help="PRAGMA integrity_check instead of quick_check")
+    check.set_defaults(run=cmd_check)
+
+    archive = commands.add_parser("archive", help="Move people matching a retention policy to an archive database")
+    archive.add_argument("path", nargs="?", default=DB_PATH)
+    archive.add_argument("--archive", help="Archive database (default: <name>.archive.db)")
+    archive.add_argument("--before-id", type=int, help="Only people with a lower id (inserted earlier)")
+    archive.add_argument("--min-age", type=int)
+    archive.add_argument("--max-age", type=int)
+    archive.add_argument("--domain", help="Email domain")
+    archive.add_argument("--name-prefix")
+    archive.add_argument("--batch-rows", type=int, default=retention.ARCHIVE_BATCH_ROWS)
+    archive.set_defaults(run=cmd_archive)
+
+    archived = commands.add_parser("archived", help="Print archived people as JSON lines")
+    archived.add_argument("path")
+    archived.set_defaults(run=cmd_archived)
+
+    report = commands.add_parser("space", help="Report file size, free pages and fragmentation")
+    report.add_argument("path", nargs="?", default=DB_PATH)
+    report.add_argument("--fragmentation", action="store_true", help="Also measure fragmentation (reads every page)")
+    report.set_defaults(run=cmd_space)
+
+    vacuum = commands.add_parser("vacuum", help="Rebuild the file compactly, or return free pages")
+    vacuum.add_argument("path", nargs="?", default=DB_PATH)
+    vacuum.add_argument("--incremental", action="store_true",
+                        help="Only return free pages (needs auto_vacuum=incremental); does not block the app")
+    vacuum.add_argument("--pages", type=int, default=space.VACUUM_STEP_PAGES)
+    vacuum.set_defaults(run=cmd_vacuum)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from . import changes, paging, search
+from .pool import DEFAULT_READERS
+from .store import DB_PATH, PeopleStore
+
+# Rows fetched per round trip to the thread pool by the streaming iterators.
+DEFAULT_STREAM_BATCH = 1_000
+
+
+class AsyncPeopleStore:
+    """asyncio front end to a PeopleStore.
+
+    Reads run on a thread pool with one worker per pooled reader connection,
+    so a worker never waits for a connection and the event loop never runs
+    SQLite itself; excess calls queue in the executor. Writes go to the
+    store's group-commit queue and are awaited without occupying a worker.
+
+        async with AsyncPeopleStore("people.db") as people:
+            person = await people.get_person(42)
+            async for row in people.iter_people(sort="name"):
+                ...
+
+    Keyword arguments other than `workers` are passed to PeopleStore.
+    """
+
+    def __init__(self, path=DB_PATH, workers=None, store=None, **options):
+        readers = options.setdefault("readers", DEFAULT_READERS)
+        self.store = store or PeopleStore(path, **options)
+        self._owns_store = store is None
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or max(readers, 1), thread_name_prefix="peopledb-async"
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+        if self._owns_store:
+            # Flushes the write queue and closes connections; may block.
+            await asyncio.get_running_loop().run_in_executor(None, self.store.close)
+
+    def _run(self, fn, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    # ---------- Writes ----------
+    async def add_person(self, name, age, email, on_duplicate=None):
+        return await asyncio.wrap_future(
+            self.store.add_person(name, age, email, wait=False, on_duplicate=on_duplicate)
+        )
+
+    async def update_person(self, person_id, name, age, email):
+        return await asyncio.wrap_future(self.store.update_person(person_id, name, age, email, wait=False))
+
+    async def delete_person(self, person_id):
+        return await asyncio.wrap_future(self.store.delete_person(person_id, wait=False))
+
+    # ---------- Reads ----------
+    async def get_person(self, person_id):
+        return await self._run(self.store.get_person, person_id)
+
+    async def get_people_page(self, sort="id", descending=False, after=None, page_size=paging.DEFAULT_PAGE_SIZE):
+        return await self._run(self.store.get_people_page, sort, descending, after, page_size)
+
+    async def filter_people(self, people_filter):
+        return await self._run(self.store.filter_people, people_filter)
+
+    async def search_people(self, search_term, limit=search.DEFAULT_LIMIT):
+        return await self._run(self.store.search_people, search_term, limit)
+
+    async def find_people(self, query, limit=search.PICKER_LIMIT):
+        return await self._run(self.store.find_people, query, limit)
+
+    async def get_stats(self):
+        return await self._run(self.store.get_stats)
+
+    async def get_null_counts(self):
+        return await self._run(self.store.get_null_counts)
+
+    async def get_age_histogram(self):
+        return await self._run(self.store.get_age_histogram)
+
+    async def get_email_domains(self, limit=10):
+        return await self._run(self.store.get_email_domains, limit)
+
+    # ---------- Streaming ----------
+    async def iter_people(self, sort="id", descending=False, batch_size=DEFAULT_STREAM_BATCH):
+        """Yield every person in sort order, one keyset page per round trip.
+
+        No connection is held between pages, so a slow consumer never ties up
+        a reader. Pages bypass the query cache.
+        """
+        after = None
+        while True:
+            rows, after = await self._run(
+                self.store.pool.read,
+                lambda conn, after=after: paging.fetch_page(conn, sort, descending, after, batch_size),
+            )
+            for row in rows:
+                yield row
+            if after is None:
+                return
+
+    async def iter_changes(self, since=0, batch_size=changes.DEFAULT_BATCH_SIZE):
+        """Yield batches of change-log entries after `since` until caught up."""
+        while True:
+            batch = await self._run(self.store.changes_since, since, batch_size)
+            if not batch:
+                return
+            yield batch
+            since = batch[-1][0]
@@ -0,0 +1,117 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# Total estimated size of cached results.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Results bigger than this share of the budget are returned uncached, so one
+# full-table read cannot evict everything else.
+MAX_ENTRY_SHARE = 0.25
+
+# Large lists are sized from a sample of their items.
+SIZE_SAMPLE = 100
+
+
+def estimate_size(value):
+    """Approximate deep size in bytes of a query result (lists/tuples of scalars)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)) and value:
+        if len(value) > SIZE_SAMPLE:
+            step = len(value) // SIZE_SAMPLE
+            sample = value[::step][:SIZE_SAMPLE]
+            size += sum(estimate_size(v) for v in sample) * len(value) // len(sample)
+        else:
+            size += sum(estimate_size(v) for v in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return size
+
+
+class QueryCache:
+    """LRU cache of read results, invalidated whenever the table changes.
+
+    The table version combines a counter that this process's writers bump()
+    after every commit with `external_version()`, which should change when
+    another process commits (PRAGMA data_version). Any change drops every
+    entry: all cached reads are over the one `people` table.
+    """
+
+    def __init__(self, external_version=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.external_version = external_version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._counter = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bump(self):
+        """Record a committed write; cached results are stale from now on."""
+        with self._lock:
+            self._counter += 1
+            self._clear()
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self.bytes = 0
+
+    def _current_version(self):
+        external = self.external_version() if self.external_version else None
+        return self._counter, external
+
+    def version(self):
+        """Opaque token that changes whenever the table may have changed."""
+        with self._lock:
+            return self._current_version()
+
+    def get(self, key, compute):
+        """Return the cached result for `key`, calling compute() on a miss."""
+        with self._lock:
+            version = self._current_version()
+            if version != self._version:
+                self._clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = compute()
+        size = estimate_size(value)
+        with self._lock:
+            # A write that committed while computing makes the result stale.
+            if version == self._current_version() and size <= self.max_bytes * MAX_ENTRY_SHARE:
+                if key in self._entries:
+                    self.bytes -= self._entries.pop(key)[1]
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.bytes -= evicted
+                    self.evictions += 1
+        return value
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
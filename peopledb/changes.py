@@ -0,0 +1,70 @@
+# Reading and compacting the `people_changes` log (see schema.py).
+#
+# A consumer keeps the `seq` of the last change it applied and asks for
+# everything after it; each batch is one primary-key range read, so a sync
+# costs what changed, not the size of the table. Compaction deletes old
+# entries; a consumer whose cursor falls before the oldest remaining entry
+# gets ChangesCompactedError and has to start again from a full export.
+#
+# A new consumer starts from export.export_with_seq (PeopleStore.
+# export_with_seq), which returns the table and the seq it reflects from
+# one read transaction, and then follows changes after that seq. Starting
+# from seq 0 instead is only complete if the log goes back to an empty
+# table: on a database created before the log existed, it starts at the
+# migration that added it.
+import json
+
+DEFAULT_BATCH_SIZE = 1_000
+
+# Entries deleted per transaction while compacting.
+COMPACT_BATCH = 10_000
+
+CHANGE_FIELDS = ("seq", "op", "id", "name", "age", "email")
+
+
+class ChangesCompactedError(ValueError):
+    pass
+
+
+def last_seq(conn):
+    """Sequence number of the newest change ever logged, 0 if none."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'people_changes'").fetchone()
+    return row[0] if row else 0
+
+
+def read_changes(conn, since=0, limit=DEFAULT_BATCH_SIZE):
+    """Up to `limit` changes with seq > `since`, oldest first, as tuples in CHANGE_FIELDS order."""
+    # Read before the rows: a change committed in between then shows up in
+    # `rows` instead of looking like a gap.
+    newest = last_seq(conn)
+    rows = conn.execute(
+        "SELECT seq, op, id, name, age, email FROM people_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+        (since, limit),
+    ).fetchall()
+    # Sequence numbers have no gaps, so a missing successor means compaction.
+    if (rows and rows[0][0] != since + 1) or (not rows and since < newest):
+        raise ChangesCompactedError(
+            f"Changes after {since} have been compacted away; resync from a full export "
+            "(export_with_seq) and continue from the seq it returns"
+        )
+    return rows
+
+
+def as_dicts(changes):
+    return [dict(zip(CHANGE_FIELDS, change)) for change in changes]
+
+
+def write_json_lines(changes, out):
+    for change in as_dicts(changes):
+        out.write(json.dumps(change) + "\n")
+
+
+def compact_changes(conn, through):
+    """Delete up to COMPACT_BATCH entries with seq <= `through`; returns how many.
+
+    Call repeatedly (each call in its own transaction) until it returns 0.
+    """
+    return conn.execute(
+        "DELETE FROM people_changes WHERE seq IN (SELECT seq FROM people_changes WHERE seq <= ? ORDER BY seq LIMIT ?)",
+        (through, COMPACT_BATCH),
+    ).rowcount
@@ -0,0 +1,271 @@
+# Exact and near-duplicate people.
+#
+# Exact duplicates share an email key (schema.EMAIL_KEY) and are kept out by
+# a unique index: an insert that collides raises, is skipped, or updates the
+# existing row depending on the `on_duplicate` policy. Near duplicates, the
+# same person under two addresses at one domain, are only reported: the batch
+# job below compares names of neighbouring rows within each email domain and
+# stores candidate pairs in `people_duplicates` for review.
+import difflib
+import re
+import sqlite3
+import time
+from collections import deque
+
+from . import schema
+
+# What to do when an inserted row's email key is already taken:
+#   error  - raise DuplicateEmailError
+#   skip   - keep the existing row untouched
+#   update - overwrite the existing row's name, age and email
+#   merge  - keep the existing row, filling in its age if missing
+ON_DUPLICATE = ("error", "skip", "update", "merge")
+
+# Bulk imports never raise on a duplicate; they count it instead.
+IMPORT_ON_DUPLICATE = ("skip", "update", "merge")
+
+UNIQUE_INDEX = "people_email_unique_idx"
+
+INSERT_SQL = "INSERT INTO people (name, age, email) VALUES (?, ?, ?)"
+
+UPSERT_ACTIONS = {
+    "skip": "DO NOTHING",
+    "update": "DO UPDATE SET name = excluded.name, age = excluded.age, email = excluded.email",
+    "merge": "DO UPDATE SET age = COALESCE(people.age, excluded.age)",
+}
+
+# Rows checked per migration transaction while removing existing duplicates.
+MERGE_BATCH_ROWS = 5_000
+
+# Near-duplicate search: a pair is reported when the similarity of the two
+# normalized names reaches DEFAULT_THRESHOLD. Each row is compared with the
+# DEFAULT_WINDOW rows before it in each neighbour order, so the cost grows
+# linearly with the table and memory stays at one window.
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_WINDOW = 8
+
+# Sort keys within a domain. Ordering by name finds typos late in a name;
+# ordering by email catches the ones early in it when the mailbox matches.
+NEIGHBOUR_ORDERS = ("lower(name)", "lower(email)")
+
+# Candidate pairs written per transaction.
+PAIR_BATCH = 10_000
+
+_WORD = re.compile(r"\w+")
+
+
+class DuplicateEmailError(ValueError):
+    pass
+
+
+def check_policy(on_duplicate, allowed=ON_DUPLICATE):
+    if on_duplicate not in allowed:
+        raise ValueError(f"Unknown duplicate policy {on_duplicate!r}; expected one of {list(allowed)}")
+    return on_duplicate
+
+
+def email_key(email):
+    """The email key as SQLite computes it, None for rows that have none."""
+    if email is None:
+        return None
+    # SQLite's trim() only strips spaces and lower() only folds ASCII.
+    key = schema.ascii_lower(str(email).strip(" "))
+    return key or None
+
+
+def is_enforced(conn):
+    """Whether the unique index exists yet; until then inserts are unchecked."""
+    return schema.index_exists(conn, UNIQUE_INDEX)
+
+
+def insert_sql(on_duplicate, enforced=True):
+    if not enforced or on_duplicate == "error":
+        return INSERT_SQL
+    return f"{INSERT_SQL} ON CONFLICT ({schema.EMAIL_KEY}) WHERE {schema.HAS_EMAIL_KEY} {UPSERT_ACTIONS[on_duplicate]}"
+
+
+def _raise_duplicate(exc, email):
+    if getattr(exc, "sqlite_errorname", None) == "SQLITE_CONSTRAINT_UNIQUE":
+        raise DuplicateEmailError(f"Someone with the email {email!r} already exists") from exc
+    raise exc
+
+
+# ---------- Writes ----------
+
+def insert_person(conn, name, age, email, on_duplicate="error"):
+    """Insert a person, resolving an email collision per `on_duplicate`.
+
+    Returns the id of the new row, or of the existing row it collided with.
+    """
+    sql = insert_sql(on_duplicate, is_enforced(conn))
+    try:
+        row = conn.execute(f"{sql} RETURNING id", (name, age, email)).fetchone()
+    except sqlite3.IntegrityError as exc:
+        _raise_duplicate(exc, email)
+    if row is None:
+        # Skipped: return the row that is already there.
+        return lookup_email(conn, email)
+    return row[0]
+
+
+def lookup_email(conn, email):
+    """Id of the person whose email key matches `email`'s, or None."""
+    row = conn.execute(
+        f"SELECT id FROM people WHERE {schema.EMAIL_KEY} = lower(trim(?)) AND {schema.HAS_EMAIL_KEY}",
+        (email,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def update_person(conn, person_id, name, age, email):
+    try:
+        return conn.execute(
+            "UPDATE people SET name = ?, age = ?, email = ? WHERE id = ?", (name, age, email, person_id)
+        ).rowcount
+    except sqlite3.IntegrityError as exc:
+        _raise_duplicate(exc, email)
+
+
+def fold_rows(rows, on_duplicate):
+    """Collapse (name, age, email) rows sharing an email key the way the
+    upsert would, keeping the position of the first occurrence."""
+    folded = []
+    positions = {}
+    for row in rows:
+        key = email_key(row[2])
+        if key is None:
+            folded.append(row)
+        elif key not in positions:
+            positions[key] = len(folded)
+            folded.append(row)
+        elif on_duplicate == "update":
+            folded[positions[key]] = row
+        elif on_duplicate == "merge":
+            name, age, email = folded[positions[key]]
+            if age is None:
+                folded[positions[key]] = (name, row[1], email)
+    return folded
+
+
+# ---------- Migration ----------
+
+class MergeDuplicateEmails:
+    """Migration step that moves every row whose email key is already used by
+    a lower id into `people_merged`, a batch of ids per transaction, and then
+    builds the unique index.
+
+    The last transaction holds the write lock while it sweeps the whole table
+    once more, catching rows whose email was edited behind the cursor, so the
+    index build cannot fail on a duplicate written meanwhile.
+    """
+
+    DUPLICATES = f'''
+        SELECT id, kept_id FROM (
+            SELECT p.id, (
+                SELECT MIN(id) FROM people WHERE {schema.EMAIL_KEY} = p.key AND {schema.HAS_EMAIL_KEY}
+            ) AS kept_id
+            FROM (
+                SELECT id, {schema.EMAIL_KEY} AS key FROM people
+                WHERE id > ? AND id <= ? AND {schema.HAS_EMAIL_KEY}
+            ) AS p
+        )
+        WHERE kept_id < id
+    '''
+
+    def __init__(self, batch_rows=MERGE_BATCH_ROWS):
+        self.batch_rows = batch_rows
+
+    def apply(self, conn, last_id):
+        upper = conn.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM people WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, self.batch_rows),
+        ).fetchone()[0]
+        if upper is None:
+            self._merge(conn, 0, 2 ** 63 - 1)
+            conn.execute(schema.PEOPLE_EMAIL_UNIQUE_INDEX)
+            conn.execute("DROP INDEX IF EXISTS people_email_key_idx")
+            return None
+        return upper, self._merge(conn, last_id, upper)
+
+    def _merge(self, conn, lower, upper):
+        duplicates = conn.execute(self.DUPLICATES, (lower, upper)).fetchall()
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO people_merged (id, kept_id, name, age, email, merged_at) "
+            "SELECT id, ?, name, age, email, ? FROM people WHERE id = ?",
+            [(kept_id, now, person_id) for person_id, kept_id in duplicates],
+        )
+        conn.executemany("DELETE FROM people WHERE id = ?", [(person_id,) for person_id, _ in duplicates])
+        return len(duplicates)
+
+    def max_id(self, conn):
+        return conn.execute("SELECT MAX(id) FROM people").fetchone()[0] or 0
+
+
+# ---------- Near duplicates ----------
+
+def name_key(name):
+    """Lowercased words in sorted order, so "Smith, John" matches "John Smith"."""
+    return " ".join(sorted(_WORD.findall(name.lower())))
+
+
+def name_similarity(a, b, threshold=0.0):
+    """Similarity of two name keys from 0 to 1; 0 once it is known to be below `threshold`."""
+    if a == b:
+        return 1.0
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    # The cheap upper bounds rule out most neighbours before the real ratio.
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+def iter_near_duplicates(conn, threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW):
+    """Yield (a_id, b_id, score) for people at one email domain with similar names.
+
+    Sorted-neighbourhood blocking: the domain is the block, and within it each
+    row is only compared with the `window` rows before it in each of
+    NEIGHBOUR_ORDERS. SQLite does the sorting (spilling to temporary files on
+    large tables), so memory use does not depend on the table size. A pair may
+    be yielded once per order.
+    """
+    domain = schema.EMAIL_DOMAIN.format(email="email")
+    for order in NEIGHBOUR_ORDERS:
+        rows = conn.execute(
+            f"SELECT {domain}, id, name FROM people WHERE instr(email, '@') > 0 ORDER BY 1, {order}, id"
+        )
+        recent = deque(maxlen=window)
+        current = None
+        for row_domain, person_id, name in rows:
+            if row_domain != current:
+                recent.clear()
+                current = row_domain
+            key = name_key(name)
+            for other_id, other_key in recent:
+                score = name_similarity(key, other_key, threshold)
+                if score >= threshold:
+                    yield min(person_id, other_id), max(person_id, other_id), round(score, 4)
+            recent.append((person_id, key))
+
+
+def save_pairs(conn, pairs):
+    return conn.executemany(
+        "INSERT INTO people_duplicates (a_id, b_id, score) VALUES (?, ?, ?) "
+        "ON CONFLICT (a_id, b_id) DO UPDATE SET score = max(score, excluded.score)",
+        pairs,
+    ).rowcount
+
+
+def read_duplicates(conn, limit=100):
+    """Candidate pairs with both people still present, best match first."""
+    return conn.execute(
+        """
+        SELECT d.score, a.id, a.name, a.email, b.id, b.name, b.email
+        FROM people_duplicates AS d
+        JOIN people AS a ON a.id = d.a_id
+        JOIN people AS b ON b.id = d.b_id
+        ORDER BY d.score DESC, d.a_id, d.b_id
+        LIMIT ?
+        """,
+        (-1 if limit is None else limit,),
+    ).fetchall()
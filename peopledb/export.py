@@ -0,0 +1,107 @@
+import csv
+import gzip
+import io
+import tempfile
+from functools import lru_cache
+from importlib.util import find_spec
+
+from .changes import last_seq
+
+# Rows pulled from the cursor per fetchmany(); peak export memory scales
+# with this, not with the size of the table.
+DEFAULT_BATCH_SIZE = 10_000
+
+# Exports are buffered in memory up to this size, then spill to disk.
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+EXPORT_COLUMNS = ["ID", "Name", "Age", "Email"]
+
+EXPORT_QUERY = "SELECT id, name, age, email FROM people ORDER BY id"
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+@lru_cache(maxsize=None)
+def parquet_available():
+    # Checked on every rerun of the app; finding pyarrow is much cheaper than
+    # importing it, which only happens once a Parquet file is actually used.
+    return find_spec("pyarrow") is not None
+
+
+def iter_batches(conn, sql=EXPORT_QUERY, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def write_csv(batches, out, compress=False):
+    """Write row batches as CSV to the binary file `out`."""
+    raw = gzip.GzipFile(fileobj=out, mode="wb") if compress else out
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows(rows)
+    text.flush()
+    # Leave `out` open for the caller; only the gzip wrapper is finished here.
+    text.detach()
+    if compress:
+        raw.close()
+
+
+def write_parquet(batches, out):
+    """Write row batches as one Parquet row group per batch (needs pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (EXPORT_COLUMNS[0], pa.int64()),
+        (EXPORT_COLUMNS[1], pa.string()),
+        (EXPORT_COLUMNS[2], pa.int64()),
+        (EXPORT_COLUMNS[3], pa.string()),
+    ])
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in batches:
+            columns = [list(col) for col in zip(*rows)]
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+
+def export_people(conn, fmt="csv", batch_size=DEFAULT_BATCH_SIZE):
+    """Stream the people table into a spooled temp file, rewound for reading."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+b")
+    batches = iter_batches(conn, batch_size=batch_size)
+    if fmt == "parquet":
+        write_parquet(batches, out)
+    else:
+        write_csv(batches, out, compress=fmt == "csv.gz")
+    out.seek(0)
+    return out
+
+
+def export_with_seq(conn, fmt="csv", batch_size=DEFAULT_BATCH_SIZE):
+    """export_people plus the change-log seq the file reflects, as (seq, file).
+
+    Both are read in one transaction, so a consumer that loads the file and
+    then applies changes after `seq` misses nothing and applies nothing twice.
+    """
+    started = not conn.in_transaction
+    if started:
+        conn.execute("BEGIN")
+    try:
+        return last_seq(conn), export_people(conn, fmt, batch_size)
+    finally:
+        if started:
+            conn.rollback()
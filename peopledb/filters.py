@@ -0,0 +1,95 @@
+# Structured filters for the View page. A PeopleFilter compiles to one
+# parameterized SELECT whose predicates and ORDER BY use exactly the indexed
+# expressions from schema.py, so SQLite can seek instead of scanning.
+from dataclasses import dataclass
+
+from .schema import EMAIL_DOMAIN, ascii_lower
+from .search import MAX_CHAR, age_range_clause
+
+DEFAULT_LIMIT = 100
+
+# Sort column -> indexed expression it orders by.
+SORT_EXPRESSIONS = {
+    "id": "id",
+    "name": "name COLLATE NOCASE",
+    "age": "age",
+    "email": "lower(email)",
+}
+
+DOMAIN_EXPRESSION = EMAIL_DOMAIN.format(email="email")
+
+
+@dataclass(frozen=True)
+class PeopleFilter:
+    """Immutable, so it doubles as a query-cache key."""
+
+    min_age: int | None = None
+    max_age: int | None = None
+    # Matched against the part of the email after the "@", ASCII letters lower-cased.
+    email_domain: str | None = None
+    domain_prefix: bool = False
+    name_prefix: str | None = None
+    sort: str = "id"
+    descending: bool = False
+    limit: int = DEFAULT_LIMIT
+
+    @property
+    def is_empty(self):
+        return self.min_age is None and self.max_age is None and not self.email_domain and not self.name_prefix
+
+
+def _prefix_range(expression, prefix):
+    return f"{expression} >= ? AND {expression} < ?", (prefix, prefix + MAX_CHAR)
+
+
+def filter_clauses(people_filter):
+    """(where clauses, params) for the predicates of `people_filter`, ignoring
+    its sort and limit; both empty when it matches everyone."""
+    f = people_filter
+    if f.min_age is not None and f.max_age is not None and f.min_age > f.max_age:
+        raise ValueError(f"Empty age range {f.min_age}-{f.max_age}")
+    where = []
+    params = []
+    clause, values = age_range_clause(f.min_age, f.max_age)
+    if clause:
+        where.append(clause)
+        params += values
+    # Folded like SQLite's lower() in DOMAIN_EXPRESSION: ASCII letters only.
+    domain = ascii_lower((f.email_domain or "").strip().lstrip("@"))
+    if domain:
+        if f.domain_prefix:
+            clause, values = _prefix_range(DOMAIN_EXPRESSION, domain)
+            where.append(clause)
+            params += values
+        else:
+            where.append(f"{DOMAIN_EXPRESSION} = ?")
+            params.append(domain)
+    name = (f.name_prefix or "").strip()
+    if name:
+        clause, values = _prefix_range("name COLLATE NOCASE", name)
+        where.append(clause)
+        params += values
+    return where, params
+
+
+def compile_filter(people_filter):
+    """Return (sql, params) for `people_filter`."""
+    f = people_filter
+    if f.sort not in SORT_EXPRESSIONS:
+        raise ValueError(f"Cannot sort by {f.sort!r}; expected one of {tuple(SORT_EXPRESSIONS)}")
+    where, params = filter_clauses(f)
+    direction = "DESC" if f.descending else "ASC"
+    order = f"{SORT_EXPRESSIONS[f.sort]} {direction}"
+    if f.sort != "id":
+        order += f", id {direction}"
+    sql = "SELECT id, name, age, email FROM people"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(f.limit)
+    return sql, tuple(params)
+
+
+def filter_people(conn, people_filter):
+    sql, params = compile_filter(people_filter)
+    return conn.execute(sql, params).fetchall()
@@ -0,0 +1,112 @@
+# Arrow-backed windows over the whole people table, for a scrolling grid.
+#
+# A result is cut into chunks of CHUNK_ROWS rows in the grid's sort order.
+# Each chunk is read from SQLite with a keyset query and converted straight
+# from the cursor's tuples into one Arrow record batch, with no DataFrame in
+# between, then kept in the query cache as Arrow IPC bytes: bytes are sized
+# exactly by the cache, and reading them back is zero-copy. A rerun then
+# only slices the WINDOW_ROWS rows in view out of one or two cached chunks,
+# so what it costs, and what is sent to the browser, depends on the
+# viewport rather than on the size of the table.
+from functools import lru_cache
+from importlib.util import find_spec
+
+from . import paging
+
+# Rows per record batch: the unit of reading from SQLite and of caching.
+CHUNK_ROWS = 1000
+
+# Rows shown at a time.
+WINDOW_ROWS = 50
+
+GRID_COLUMNS = ["ID", "Name", "Age", "Email"]
+
+
+@lru_cache(maxsize=None)
+def arrow_available():
+    # Checked on every rerun; pyarrow itself is only imported to build a chunk.
+    return find_spec("pyarrow") is not None
+
+
+@lru_cache(maxsize=None)
+def schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        (GRID_COLUMNS[0], pa.int64()),
+        (GRID_COLUMNS[1], pa.string()),
+        (GRID_COLUMNS[2], pa.int64()),
+        (GRID_COLUMNS[3], pa.string()),
+    ])
+
+
+def to_batch(rows):
+    """An Arrow record batch of (id, name, age, email) rows."""
+    import pyarrow as pa
+
+    columns = [list(col) for col in zip(*rows)] if rows else [[] for _ in GRID_COLUMNS]
+    return pa.RecordBatch.from_arrays(columns, schema=schema())
+
+
+def to_table(rows):
+    """An Arrow table of (id, name, age, email) rows, e.g. for st.dataframe."""
+    import pyarrow as pa
+
+    return pa.Table.from_batches([to_batch(rows)])
+
+
+def encode(batch):
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def decode(data):
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(data).read_next_batch()
+
+
+def chunk_cursor(conn, sort, descending, chunk, chunk_rows=CHUNK_ROWS):
+    """Keyset cursor of the row just before `chunk`; None for the first chunk.
+
+    Skips through the sort index with OFFSET, which only reads index
+    entries; callers that already hold the previous chunk use its last row.
+    """
+    if sort not in paging.SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by {sort!r}; expected one of {paging.SORT_COLUMNS}")
+    if chunk == 0:
+        return None
+    # NULLs come first ascending and last descending, as in paging.fetch_page.
+    direction = "DESC" if descending else "ASC"
+    row = conn.execute(
+        f"SELECT {sort}, id FROM people ORDER BY {sort} {direction}, id {direction} LIMIT 1 OFFSET ?",
+        (chunk * chunk_rows - 1,),
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def fetch_chunk(conn, sort, descending, chunk, after=None, chunk_rows=CHUNK_ROWS):
+    """Return (encoded batch, cursor of its last row) for one chunk.
+
+    `after` is the cursor ending the previous chunk, when known.
+    """
+    if after is None:
+        after = chunk_cursor(conn, sort, descending, chunk, chunk_rows)
+        if after is None and chunk:
+            return encode(to_batch([])), None
+    rows, _ = paging.fetch_page(conn, sort, descending, after, chunk_rows)
+    last = (rows[-1][paging.SORT_COLUMNS.index(sort)], rows[-1][0]) if rows else None
+    return encode(to_batch(rows)), last
+
+
+def window(chunks, start, first_chunk, size=WINDOW_ROWS, chunk_rows=CHUNK_ROWS):
+    """The `size` rows from row `start` as an Arrow table, given the decoded
+    record batches of consecutive chunks beginning with `first_chunk`."""
+    import pyarrow as pa
+
+    table = pa.Table.from_batches(chunks, schema=schema())
+    return table.slice(start - first_chunk * chunk_rows, size)
@@ -0,0 +1,358 @@
+import csv
+import gzip
+import io
+import itertools
+import operator
+import sqlite3
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import dataclass, field
+
+from . import dedupe, schema
+
+# Rows read and validated together.
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Rows written per transaction; each commit is one fsync.
+DEFAULT_COMMIT_ROWS = 100_000
+
+# Rejected rows kept for the error report; the rest are only counted.
+MAX_REPORTED_ERRORS = 10_000
+
+MAX_AGE = 120
+
+IMPORT_FORMATS = ("csv", "csv.gz", "parquet")
+
+# CREATE INDEX sorts the table in memory runs of up to the page cache's size
+# and merges them through temp files. Runs of a few MiB merged on disk sort
+# about a third faster than the few large in-memory runs the storage
+# profiles' cache_size and temp_store=MEMORY give, so rebuilds use these.
+INDEX_BUILD_PRAGMAS = {"cache_size": -2000, "temp_store": 1}
+
+# Bytes per row of a typical people CSV, for guessing a file's row count.
+CSV_ROW_BYTES = 40
+
+
+@dataclass
+class RejectedRow:
+    line: int
+    values: tuple
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    imported: int = 0
+    # Valid rows whose email was already present, in the table or the file.
+    duplicates: int = 0
+    rejected_count: int = 0
+    rejected: list = field(default_factory=list)
+    total: int | None = None
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line, values, reason):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_ERRORS:
+            self.rejected.append(RejectedRow(line, values, reason))
+
+    def errors_csv(self):
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["Line", "Name", "Age", "Email", "Reason"])
+        for row in self.rejected:
+            writer.writerow([row.line, *row.values, row.reason])
+        return out.getvalue()
+
+
+# ---------- Readers ----------
+# Each reader yields (first_line, rows) chunks, rows being raw
+# (name, age, email) tuples. Line numbers count the header as line 1.
+
+def _column_positions(header):
+    columns = [str(col).strip().lower() for col in header]
+    if "name" not in columns:
+        raise ValueError("Import file needs a 'name' column")
+    return [columns.index(col) if col in columns else None for col in ("name", "age", "email")]
+
+
+def read_csv_chunks(fileobj, chunk_size=DEFAULT_CHUNK_SIZE, compressed=False):
+    """Read a binary CSV file object in chunks; any `id` column is ignored."""
+    if compressed:
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = _column_positions(header)
+        # Missing optional columns read from a padding cell past the header.
+        pad = len(header)
+        pick = operator.itemgetter(*(pad if i is None else i for i in positions))
+        filler = [""] * (pad + 1)
+        line = 2
+        while True:
+            rows = []
+            for row in itertools.islice(reader, chunk_size):
+                if len(row) <= pad:
+                    row += filler[len(row):]
+                rows.append(pick(row))
+            if not rows:
+                break
+            yield line, rows
+            line += len(rows)
+    finally:
+        # Don't close the caller's file along with the wrapper.
+        text.detach()
+
+
+def read_parquet_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(source)
+    names = parquet.schema_arrow.names
+    positions = _column_positions(names)
+    line = 2
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=[names[i] for i in positions if i is not None]):
+        columns = [batch.column(names[i]).to_pylist() if i is not None else [None] * batch.num_rows
+                   for i in positions]
+        yield line, list(zip(*columns))
+        line += batch.num_rows
+
+
+def parquet_row_count(source):
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(source).metadata.num_rows
+
+
+# ---------- Validation ----------
+AGE_ERROR = f"Age must be a whole number between 0 and {MAX_AGE}"
+REQUIRED_ERROR = "Name and Email are required"
+
+
+def _parse_age(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            value = float(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError
+        value = int(value)
+    if not 0 <= value <= MAX_AGE:
+        raise ValueError
+    return value
+
+
+def validate_chunk(chunk, report):
+    """Return the insertable (name, age, email) rows; record the rest in `report`."""
+    first_line, raw_rows = chunk
+    rows = []
+    append = rows.append
+    for offset, (name, age, email) in enumerate(raw_rows):
+        if name.__class__ is str:
+            name = name.strip()
+        if email.__class__ is str:
+            email = email.strip()
+        if not name or not email:
+            report.reject(first_line + offset, (name, age, email), REQUIRED_ERROR)
+            continue
+        # Fast path for the common case of a plain digit string or an int.
+        if age.__class__ is str and age.isascii() and age.isdigit() and len(age) < 4:
+            value = int(age)
+        elif age.__class__ is int:
+            value = age
+        elif age is None:
+            append((name, None, email))
+            continue
+        else:
+            try:
+                value = _parse_age(age)
+            except (TypeError, ValueError):
+                report.reject(first_line + offset, (name, age, email), AGE_ERROR)
+                continue
+            append((name, value, email))
+            continue
+        if value > MAX_AGE or value < 0:
+            report.reject(first_line + offset, (name, age, email), AGE_ERROR)
+            continue
+        append((name, value, email))
+    return rows
+
+
+# ---------- Writer ----------
+
+def defer_indexes_by_default(file_bytes, table_rows):
+    """Whether rebuilding the indexes after loading a file of `file_bytes`
+    likely beats maintaining them row by row: when it at least doubles the table."""
+    return file_bytes / CSV_ROW_BYTES >= table_rows
+
+
+@contextmanager
+def _pragmas(conn, settings):
+    previous = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in settings}
+    for name, value in settings.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+
+def _begin_batch(conn, triggers):
+    conn.execute("BEGIN IMMEDIATE")
+    # Per-row insert triggers (FTS, running stats) are replaced by one
+    # set-based statement each over the batch's id range. They are restored
+    # before commit, so other connections never see them missing.
+    for name in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM people").fetchone()[0]
+
+
+def _commit_batch(conn, triggers, first_id, defer_fts=False):
+    for name in triggers:
+        ddl, catchup = schema.BULK_INSERT_TRIGGERS[name]
+        # Rows inside an open pending range are left to the FTS catch-up,
+        # whether this load opened it or a concurrent deferred one did.
+        if name == "people_fts_ai" and (
+            schema.defer_fts(conn, first_id) if defer_fts else schema.fts_range_open(conn)
+        ):
+            catchup = []
+        for statement in catchup:
+            conn.execute(statement, (first_id,))
+        conn.execute(ddl)
+    conn.commit()
+
+
+def _count_batch(conn, report, pending, first_id):
+    inserted = conn.execute("SELECT COUNT(*) FROM people WHERE id > ?", (first_id,)).fetchone()[0]
+    report.imported += inserted
+    report.duplicates += pending - inserted
+
+
+def _writer(conn):
+    if isinstance(conn, sqlite3.Connection):
+        return lambda: nullcontext(conn)
+    return conn
+
+
+def import_chunks(conn, chunks, commit_rows=DEFAULT_COMMIT_ROWS, defer_indexes=False, progress=None,
+                  report=None, on_duplicate="skip"):
+    """Validate and insert chunks of raw rows, committing every `commit_rows`.
+
+    `conn` is a connection, or a function returning a context manager that
+    yields one, such as ConnectionPool.writer; that is entered for each batch
+    and left between batches, so other writes are not held up for the whole
+    load.
+    With `defer_indexes` the secondary indexes are dropped for the load and rebuilt
+    once at the end, which is much faster for loads into a small table, and
+    the new rows are left out of the FTS index for schema.catch_up_fts to
+    add after the load (search covers them meanwhile).
+    `on_duplicate` is one of dedupe.IMPORT_ON_DUPLICATE and decides what
+    happens to rows whose email is already taken. `progress(report)` is called
+    after every chunk.
+    """
+    dedupe.check_policy(on_duplicate, dedupe.IMPORT_ON_DUPLICATE)
+    report = report or ImportReport()
+    writer = _writer(conn)
+    with writer() as conn:
+        if conn.in_transaction:
+            conn.commit()
+        triggers = [name for name in schema.BULK_INSERT_TRIGGERS if schema.trigger_exists(conn, name)]
+        enforced = dedupe.is_enforced(conn)
+        defer_fts = defer_indexes and "people_fts_ai" in triggers and schema.can_defer_fts(conn)
+        if defer_indexes:
+            with conn:
+                for name in schema.SECONDARY_INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+    insert_sql = dedupe.insert_sql(on_duplicate, enforced)
+    # An upsert that updates a row inserted earlier in the same batch would
+    # fire the update triggers for a row the catch-up statements have not
+    # added yet, so such rows are folded together in memory first, and a
+    # chunk colliding with an earlier chunk of the batch starts a new batch.
+    fold = enforced and on_duplicate != "skip"
+    batch_keys = set()
+    start = time.perf_counter()
+    held = ExitStack()
+    pending = 0
+    first_id = None
+
+    def commit():
+        nonlocal pending, first_id
+        _count_batch(conn, report, pending, first_id)
+        _commit_batch(conn, triggers, first_id, defer_fts)
+        held.close()
+        pending, first_id = 0, None
+        batch_keys.clear()
+
+    try:
+        for chunk in chunks:
+            report.read += len(chunk[1])
+            rows = validate_chunk(chunk, report)
+            if rows and fold:
+                folded = dedupe.fold_rows(rows, on_duplicate)
+                report.duplicates += len(rows) - len(folded)
+                rows = folded
+                keys = {dedupe.email_key(row[2]) for row in rows}
+                keys.discard(None)
+                if first_id is not None and not batch_keys.isdisjoint(keys):
+                    commit()
+                batch_keys |= keys
+            if rows:
+                if first_id is None:
+                    conn = held.enter_context(writer())
+                    first_id = _begin_batch(conn, triggers)
+                conn.executemany(insert_sql, rows)
+                pending += len(rows)
+            if pending >= commit_rows:
+                commit()
+            report.elapsed = time.perf_counter() - start
+            if progress:
+                progress(report)
+        if first_id is not None:
+            commit()
+    except BaseException:
+        if first_id is not None:
+            conn.rollback()
+        raise
+    finally:
+        held.close()
+        with writer() as conn:
+            if defer_fts:
+                with conn:
+                    schema.close_fts_range(conn)
+            if defer_indexes:
+                with _pragmas(conn, INDEX_BUILD_PRAGMAS), conn:
+                    for index in schema.SECONDARY_INDEXES.values():
+                        conn.execute(index)
+        report.elapsed = time.perf_counter() - start
+    return report
+
+
+def import_people(conn, source, fmt="csv", chunk_size=DEFAULT_CHUNK_SIZE, commit_rows=DEFAULT_COMMIT_ROWS,
+                  defer_indexes=False, progress=None, on_duplicate="skip"):
+    """Bulk-load people from a CSV (optionally gzipped) or Parquet file object.
+
+    Through PeopleStore, about 48,000 rows/s with `defer_indexes` and 17,000
+    with live indexes on one core at 1M rows (see bench/bench_import.py).
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format {fmt!r}; expected one of {list(IMPORT_FORMATS)}")
+    report = ImportReport()
+    if fmt == "parquet":
+        report.total = parquet_row_count(source)
+        chunks = read_parquet_chunks(source, chunk_size)
+    else:
+        chunks = read_csv_chunks(source, chunk_size, compressed=fmt == "csv.gz")
+    return import_chunks(conn, chunks, commit_rows, defer_indexes, progress, report, on_duplicate)
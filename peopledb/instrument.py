@@ -0,0 +1,309 @@
+import bisect
+import contextvars
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Queries at least this slow (ms) go to the slow-query log with their plan.
+SLOW_QUERY_MS = 100.0
+SLOW_LOG_SIZE = 200
+RUN_LOG_SIZE = 100
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open.
+BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_current_run = contextvars.ContextVar("peopledb_run", default=None)
+
+
+@lru_cache(maxsize=1024)
+def query_shape(sql):
+    """Collapse whitespace so the same statement always maps to one key."""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class ShapeStats:
+    __slots__ = ("calls", "seconds", "rows", "max_seconds", "buckets", "pages")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.pages = {}
+
+    def percentile_ms(self, q):
+        """Estimate from the histogram: upper bound of the bucket holding the q-th call."""
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_seconds * 1000
+        return 0.0
+
+
+class Run:
+    """DB work done during one unit of work, such as one Streamlit rerun."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.seconds = 0.0
+        self.queries = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._token = None
+        self._start = 0.0
+
+    def add(self, seconds):
+        # Writes may be recorded from the write-queue thread.
+        with self._lock:
+            self.seconds += seconds
+            self.queries += 1
+
+
+class QueryMetrics:
+    """Aggregates per-query-shape timings reported by instrumented cursors."""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log_size=SLOW_LOG_SIZE, run_log_size=RUN_LOG_SIZE):
+        self.slow_ms = slow_ms
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.run_log = deque(maxlen=run_log_size)
+        self._shapes = {}
+        self._lock = threading.Lock()
+        # Statements reported by garbage-collected cursors, recorded later.
+        self._abandoned = deque()
+
+    def record(self, conn, sql, params, seconds, rows):
+        self._record_abandoned()
+        self._record(conn, sql, params, seconds, rows)
+
+    def record_abandoned(self, sql, params, seconds, rows):
+        """Report a statement from Cursor.__del__. Only appends to a deque:
+        a finalizer must not query, and may run while this thread holds
+        `_lock`. It is recorded, without a plan, by the next call to record,
+        summary or histogram."""
+        self._abandoned.append((sql, params, seconds, rows))
+
+    def _record_abandoned(self):
+        while self._abandoned:
+            try:
+                sql, params, seconds, rows = self._abandoned.popleft()
+            except IndexError:
+                break
+            self._record(None, sql, params, seconds, rows)
+
+    def _record(self, conn, sql, params, seconds, rows):
+        shape = query_shape(sql)
+        run = _current_run.get()
+        page = run.page if run else None
+        if run:
+            run.add(seconds)
+        ms = seconds * 1000
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                stats = self._shapes[shape] = ShapeStats()
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.rows += max(rows, 0)
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+            stats.pages[page] = stats.pages.get(page, 0) + 1
+        if ms >= self.slow_ms:
+            self.slow_log.append({
+                "time": time.time(),
+                "query": shape,
+                "ms": ms,
+                "rows": rows,
+                "page": page,
+                "plan": explain(conn, sql, params) if conn is not None else None,
+            })
+
+    def summary(self):
+        """Per-shape stats, most total time first."""
+        self._record_abandoned()
+        with self._lock:
+            items = list(self._shapes.items())
+        rows = []
+        for shape, s in items:
+            rows.append({
+                "query": shape,
+                "calls": s.calls,
+                "total_ms": s.seconds * 1000,
+                "mean_ms": s.seconds * 1000 / s.calls,
+                "p50_ms": s.percentile_ms(0.50),
+                "p95_ms": s.percentile_ms(0.95),
+                "p99_ms": s.percentile_ms(0.99),
+                "max_ms": s.max_seconds * 1000,
+                "rows": s.rows,
+                "pages": dict(s.pages),
+            })
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def histogram(self, shape):
+        """[(bucket label, calls)] for one query shape."""
+        self._record_abandoned()
+        with self._lock:
+            stats = self._shapes.get(shape)
+            buckets = list(stats.buckets) if stats else [0] * (len(BUCKETS_MS) + 1)
+        labels = [f"≤{b:g} ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g} ms"]
+        return list(zip(labels, buckets))
+
+    def reset(self):
+        self._abandoned.clear()
+        with self._lock:
+            self._shapes.clear()
+        self.slow_log.clear()
+        self.run_log.clear()
+
+    def start_run(self, page):
+        """Attribute queries made from here on in this context to `page`."""
+        run = Run(page)
+        run._token = _current_run.set(run)
+        run._start = time.perf_counter()
+        return run
+
+    def finish_run(self, run):
+        run.elapsed = time.perf_counter() - run._start
+        try:
+            _current_run.reset(run._token)
+        except ValueError:
+            # Finished from a different context; just stop tracking it here.
+            _current_run.set(None)
+        self.run_log.append(run)
+
+    @contextmanager
+    def track(self, page):
+        """start_run/finish_run around a block, including writes it queues."""
+        run = self.start_run(page)
+        try:
+            yield run
+        finally:
+            self.finish_run(run)
+
+
+def explain(conn, sql, params):
+    """EXPLAIN QUERY PLAN for `sql` as text, or None if it has no plan."""
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    try:
+        # A plain cursor, so the plan lookup isn't recorded itself.
+        rows = conn.cursor(sqlite3.Cursor).execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+    except sqlite3.Error:
+        return None
+    return "\n".join(row[-1] for row in rows)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Times execute plus every fetch, reporting one record per statement
+    once its results are exhausted (or it is re-executed or closed)."""
+
+    def _start(self, sql, params):
+        self._finish()
+        self._sql = sql
+        self._params = params
+        self._seconds = 0.0
+        self._rows = 0
+
+    def _finish(self):
+        sql = getattr(self, "_sql", None)
+        if sql is not None:
+            self._sql = None
+            self.connection.metrics.record(self.connection, sql, self._params, self._seconds, self._rows)
+
+    def execute(self, sql, params=()):
+        self._start(sql, params)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._seconds += time.perf_counter() - start
+            if self.description is None:
+                # No result set: the statement is done.
+                self._rows = self.rowcount
+                self._finish()
+
+    def executemany(self, sql, seq_of_params):
+        self._start(sql, None)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self._seconds += time.perf_counter() - start
+            self._rows = self.rowcount
+            self._finish()
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        self._seconds += time.perf_counter() - start
+        return result
+
+    def __next__(self):
+        try:
+            row = self._timed_fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        self._rows += 1
+        return row
+
+    def fetchone(self):
+        row = self._timed_fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed_fetch(super().fetchmany, size)
+        self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed_fetch(super().fetchall)
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Statements whose results were never fully fetched, such as a
+        # single fetchone(), report here without touching the connection.
+        try:
+            sql = getattr(self, "_sql", None)
+            if sql is not None:
+                self._sql = None
+                self.connection.metrics.record_abandoned(sql, self._params, self._seconds, self._rows)
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements are reported to `self.metrics`."""
+
+    metrics = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
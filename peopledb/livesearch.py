@@ -0,0 +1,87 @@
+# Search as you type, for one user.
+#
+# The browser debounces keystrokes, so only a term the user paused on reaches
+# the server, but a slow LIKE scan can still be running when the next one
+# arrives. A LiveSearch keeps at most one query in flight: each new term
+# supersedes the previous one, whose query then stops at its next progress
+# check (see search.cancellable) and raises SearchCancelled. And when a term
+# only extends the previous one ("ann" -> "anna") and that result set was
+# complete, the new results are a subset of it and are filtered in memory
+# without touching SQLite. Only terms that search.search answers the same way
+# are narrowed: a short LIKE term and a longer FTS term fold case differently.
+import threading
+
+from . import search
+from .schema import ascii_lower
+
+# search.search_path -> case folding that path applies.
+FOLDS = {"like": ascii_lower, "fts": str.lower}
+
+
+def contains(row, term, fold=str.lower):
+    """Whether `term` occurs in the row's name or email, ignoring case as `fold` does."""
+    term = fold(term)
+    return term in fold(row[1]) or term in fold(row[3] or "")
+
+
+class LiveSearch:
+    """Incremental search over a store for a single user session.
+
+    Not meant to be shared between users: starting a search cancels the one
+    in flight. Counters record how each search was answered.
+    """
+
+    def __init__(self, store, limit=search.DEFAULT_LIMIT):
+        self.store = store
+        self.limit = limit
+        self.queries = 0
+        self.narrowed = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+        self._generation = 0
+        # (term, store version, rows) of the last search that finished.
+        self._last = None
+
+    def search(self, term):
+        """Results for `term`; raises SearchCancelled if a newer search started meanwhile."""
+        term = term.strip()
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            last = self._last
+        version = self.store.version()
+        rows = self._narrow(last, term, version)
+        if rows is not None:
+            self.narrowed += 1
+        else:
+            try:
+                rows = self.store.search_people(
+                    term, self.limit, cancelled=lambda: self._generation != generation
+                )
+            except search.SearchCancelled:
+                self.cancelled += 1
+                raise
+            self.queries += 1
+        with self._lock:
+            if generation == self._generation:
+                self._last = (term, version, rows)
+        return rows
+
+    def _narrow(self, last, term, version):
+        """Filter the previous results when they are known to contain the new ones."""
+        if last is None:
+            return None
+        last_term, last_version, rows = last
+        fts_enabled = self.store.fts_enabled
+        path = search.search_path(term, fts_enabled)
+        if (
+            version != last_version
+            or len(rows) >= self.limit
+            or not last_term
+            or path not in FOLDS
+            or search.search_path(last_term, fts_enabled) != path
+            or FOLDS[path](last_term) not in FOLDS[path](term)
+        ):
+            return None
+        # Kept in the previous ranking order.
+        return [row for row in rows if contains(row, term, FOLDS[path])]
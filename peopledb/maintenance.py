@@ -0,0 +1,53 @@
+import threading
+import time
+
+
+class MaintenanceScheduler:
+    """Runs periodic jobs on a daemon thread.
+
+    Jobs are (name, interval_seconds, fn) and each runs at most once per
+    interval. A job given as (name, interval_seconds, fn, True) only runs
+    while is_idle() returns True; until then it is retried every tick. A
+    failing job is recorded in `errors` and retried on its next turn instead
+    of stopping the thread.
+    """
+
+    def __init__(self, jobs, tick=1.0, is_idle=None):
+        self.jobs = [(job[0], job[1], job[2], len(job) > 3 and job[3]) for job in jobs if job[1]]
+        self.tick = tick
+        self.is_idle = is_idle
+        self.last_run = {}
+        self.errors = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.jobs and self._thread is None:
+            now = time.monotonic()
+            self.last_run = {name: now for name, *_ in self.jobs}
+            self._thread = threading.Thread(target=self._run, name="peopledb-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_pending(self, now=None):
+        now = time.monotonic() if now is None else now
+        for name, interval, fn, idle_only in self.jobs:
+            if now - self.last_run.get(name, 0) < interval:
+                continue
+            if idle_only and self.is_idle is not None and not self.is_idle():
+                continue
+            try:
+                fn()
+                self.errors.pop(name, None)
+            except Exception as exc:
+                self.errors[name] = exc
+            self.last_run[name] = time.monotonic()
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            self.run_pending()
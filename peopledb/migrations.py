@@ -0,0 +1,316 @@
+# Versioned schema changes applied while the app keeps serving.
+#
+# schema.ensure_schema() creates the baseline schema (user_version 0). Every
+# later change is a Migration appended to MIGRATIONS with the next version.
+# Its steps run one short write transaction at a time on the pool's writer,
+# interleaved with the app's own writes, and each transaction also records
+# the step's progress in `schema_migrations`, so a crash or restart resumes
+# from the last committed batch. PRAGMA user_version is set once every step
+# of a migration has finished.
+import threading
+import time
+from dataclasses import dataclass
+
+from . import dedupe, schema
+
+# Rows updated per backfill transaction: small enough that the write queue
+# never waits long behind a batch.
+DEFAULT_BATCH_ROWS = 5_000
+
+# Pause between batches so reads and queued writes get the writer in between.
+BATCH_PAUSE = 0.01
+
+MIGRATIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER NOT NULL,
+        step INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        last_id INTEGER NOT NULL DEFAULT 0,
+        rows INTEGER NOT NULL DEFAULT 0,
+        done INTEGER NOT NULL DEFAULT 0,
+        started REAL,
+        finished REAL,
+        PRIMARY KEY (version, step)
+    )
+'''
+
+
+# ---------- Steps ----------
+# A step's apply(conn, last_id) does one transaction's worth of work inside
+# the transaction the migrator opened, returning (last_id, rows) for the
+# next call or None once the step is complete.
+
+class Statements:
+    """DDL that is quick at any table size, such as ADD COLUMN, CREATE TABLE
+    or CREATE TRIGGER, run together in one transaction."""
+
+    def __init__(self, *statements):
+        self.statements = statements
+
+    def apply(self, conn, last_id):
+        for statement in self.statements:
+            conn.execute(statement)
+        return None
+
+
+class CreateIndex:
+    """Build one index.
+
+    SQLite builds an index in a single statement, so this step cannot be
+    batched. Under WAL readers carry on during the build; writes queue behind
+    it. Prefer adding indexes before large backfills, not after.
+    """
+
+    def __init__(self, ddl):
+        self.ddl = ddl
+
+    def apply(self, conn, last_id):
+        conn.execute(self.ddl)
+        return None
+
+
+class IfTableExists:
+    """Run `step` only on databases that have `table`, such as the optional
+    FTS index."""
+
+    def __init__(self, table, step):
+        self.table = table
+        self.step = step
+
+    def apply(self, conn, last_id):
+        if not schema.table_exists(conn, self.table):
+            return None
+        return self.step.apply(conn, last_id)
+
+
+class Call:
+    """Run fn(conn) once, for schema work that is more than fixed DDL but
+    still one short transaction, such as schema.create_fts_index."""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def apply(self, conn, last_id):
+        self.fn(conn)
+        return None
+
+
+class CatchUpFts:
+    """Index the ids schema.create_fts_index left pending, schema.FTS_CATCHUP_ROWS
+    per transaction; search covers them with LIKE meanwhile."""
+
+    def apply(self, conn, last_id):
+        covered = schema.catch_up_fts(conn)
+        if not covered:
+            return None
+        return last_id + covered, covered
+
+    def max_id(self, conn):
+        pending = schema.fts_pending(conn)
+        return pending[1] if pending else 0
+
+
+class Backfill:
+    """Run `UPDATE table SET assignments` over the table in id order, a
+    batch of `batch_rows` ids per transaction.
+
+    Rows inserted while the backfill runs are covered once the cursor reaches
+    them; rows inserted afterwards must be handled by the writer itself, e.g.
+    through a trigger created in an earlier Statements step.
+    """
+
+    def __init__(self, table, assignments, where=None, batch_rows=DEFAULT_BATCH_ROWS):
+        self.table = table
+        self.assignments = assignments
+        self.where = where
+        self.batch_rows = batch_rows
+
+    def apply(self, conn, last_id):
+        upper = conn.execute(
+            f"SELECT MAX(id) FROM (SELECT id FROM {self.table} WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, self.batch_rows),
+        ).fetchone()[0]
+        if upper is None:
+            return None
+        sql = f"UPDATE {self.table} SET {self.assignments} WHERE id > ? AND id <= ?"
+        if self.where:
+            sql += f" AND ({self.where})"
+        rows = conn.execute(sql, (last_id, upper)).rowcount
+        return upper, rows
+
+    def max_id(self, conn):
+        return conn.execute(f"SELECT MAX(id) FROM {self.table}").fetchone()[0] or 0
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    steps: list
+
+
+MIGRATIONS = [
+    Migration(1, "change_log", [
+        Statements(schema.PEOPLE_CHANGES_TABLE, *schema.PEOPLE_CHANGES_TRIGGERS.values()),
+    ]),
+    Migration(2, "unique_email", [
+        Statements(schema.PEOPLE_MERGED_TABLE, schema.PEOPLE_DUPLICATES_TABLE),
+        CreateIndex(schema.PEOPLE_EMAIL_KEY_INDEX),
+        dedupe.MergeDuplicateEmails(),
+    ]),
+    Migration(3, "deferred_fts", [
+        Statements(schema.PEOPLE_FTS_PENDING_TABLE),
+        IfTableExists("people_fts", Statements(
+            "DROP TRIGGER IF EXISTS people_fts_ad",
+            "DROP TRIGGER IF EXISTS people_fts_au",
+            schema.PEOPLE_FTS_TRIGGERS["people_fts_ad"],
+            schema.PEOPLE_FTS_TRIGGERS["people_fts_au"],
+        )),
+    ]),
+    Migration(4, "deferred_fts_inserts", [
+        IfTableExists("people_fts", Statements(
+            "DROP TRIGGER IF EXISTS people_fts_ai",
+            schema.PEOPLE_FTS_TRIGGERS["people_fts_ai"],
+        )),
+    ]),
+    # Databases created before migrations existed already have these objects;
+    # for them the next three are no-ops.
+    Migration(5, "secondary_indexes", [CreateIndex(ddl) for ddl in schema.SECONDARY_INDEXES.values()]),
+    # Seeding is one aggregate scan, like an index build.
+    Migration(6, "running_stats", [Call(schema.create_stats_tables)]),
+    Migration(7, "fts_index", [Call(schema.create_fts_index), CatchUpFts()]),
+]
+
+
+# ---------- Runner ----------
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn, migrations=MIGRATIONS):
+    current = schema_version(conn)
+    return [m for m in migrations if m.version > current]
+
+
+class Migrator:
+    """Applies pending migrations on the pool's writer, one batch at a time.
+
+    start() runs them on a daemon thread so the app can serve meanwhile;
+    run() applies them on the calling thread. stop() lets the current batch
+    commit and leaves the rest for the next start. `progress` maps
+    (version, step) to a dict describing each step seen so far.
+    """
+
+    def __init__(self, pool, migrations=MIGRATIONS, on_commit=None, pause=BATCH_PAUSE):
+        versions = [m.version for m in migrations]
+        if versions != sorted(set(versions)) or (versions and versions[0] < 1):
+            raise ValueError(f"Migration versions must be unique, ascending and >= 1, got {versions}")
+        self.pool = pool
+        self.migrations = migrations
+        self.on_commit = on_commit
+        self.pause = pause
+        self.progress = {}
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def pending(self):
+        return self.pool.read(lambda conn: pending_migrations(conn, self.migrations))
+
+    def start(self):
+        if self._thread is None and self.migrations and self.pending():
+            self._thread = threading.Thread(target=self._run, name="peopledb-migrations", daemon=True)
+            self._thread.start()
+
+    def wait(self):
+        """Block until the background run, if any, has finished."""
+        if self._thread is not None:
+            self._thread.join()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            self.run()
+        except Exception as exc:
+            # Left for the app to report; the next start resumes from here.
+            self.error = exc
+
+    def run(self):
+        """Apply every pending migration; returns False if stopped before the end."""
+        self.pool.write(lambda conn: conn.execute(MIGRATIONS_TABLE))
+        for migration in self.pending():
+            for index, step in enumerate(migration.steps):
+                if not self._run_step(migration, index, step):
+                    return False
+            self.pool.write(lambda conn: conn.execute(f"PRAGMA user_version = {migration.version:d}"))
+        return True
+
+    def _run_step(self, migration, index, step):
+        key = (migration.version, index)
+        state = self.pool.read(lambda conn: conn.execute(
+            "SELECT last_id, rows, done FROM schema_migrations WHERE version = ? AND step = ?", key
+        ).fetchone())
+        last_id, rows, done = state or (0, 0, 0)
+        progress = self.progress[key] = {
+            "version": migration.version,
+            "migration": migration.name,
+            "step": index,
+            "kind": type(step).__name__,
+            "last_id": last_id,
+            "max_id": None,
+            "rows": rows,
+            "done": bool(done),
+        }
+        if done:
+            return True
+        if state is None:
+            self.pool.write(lambda conn: conn.execute(
+                "INSERT OR IGNORE INTO schema_migrations (version, step, name, started) VALUES (?, ?, ?, ?)",
+                (*key, migration.name, time.time()),
+            ))
+        if hasattr(step, "max_id"):
+            progress["max_id"] = self.pool.read(step.max_id)
+        while not progress["done"]:
+            if self._stop.is_set():
+                return False
+            self.pool.write(lambda conn: self._apply_batch(conn, key, step, progress))
+            if self.on_commit:
+                self.on_commit()
+            if not progress["done"] and self.pause:
+                time.sleep(self.pause)
+        return True
+
+    def _apply_batch(self, conn, key, step, progress):
+        conn.execute("BEGIN IMMEDIATE")
+        # Re-read the cursor inside the transaction: another process may be
+        # migrating the same database.
+        last_id, rows, done = conn.execute(
+            "SELECT last_id, rows, done FROM schema_migrations WHERE version = ? AND step = ?", key
+        ).fetchone()
+        result = None if done else step.apply(conn, last_id)
+        if result is None:
+            conn.execute(
+                "UPDATE schema_migrations SET done = 1, finished = ? WHERE version = ? AND step = ?",
+                (time.time(), *key),
+            )
+            progress["done"] = True
+        else:
+            last_id, batch_rows = result
+            rows += batch_rows
+            conn.execute(
+                "UPDATE schema_migrations SET last_id = ?, rows = ? WHERE version = ? AND step = ?",
+                (last_id, rows, *key),
+            )
+        progress["last_id"] = last_id
+        progress["rows"] = rows
+
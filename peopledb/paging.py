@@ -0,0 +1,64 @@
+# Keyset ("seek") pagination: each page starts strictly after the sort key of
+# the previous page's last row, so fetching page N costs the same as page 1
+# instead of growing with an OFFSET.
+
+SORT_COLUMNS = ("id", "name", "age", "email")
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def _segments(sort, descending):
+    # SQLite orders NULLs first ascending and last descending. Row-value
+    # comparisons against NULL are unknown, so a nullable sort column is read
+    # as two index ranges: the NULL rows (ordered by id) and the rest.
+    if sort == "id":
+        return ("value",)
+    return ("value", "null") if descending else ("null", "value")
+
+
+def _segment_query(sort, segment, descending, cursor, limit):
+    op = "<" if descending else ">"
+    direction = "DESC" if descending else "ASC"
+    if sort == "id" or segment == "null":
+        where = [] if sort == "id" else [f"{sort} IS NULL"]
+        order = f"id {direction}"
+        params = ()
+        if cursor is not None:
+            where.append(f"id {op} ?")
+            params = (cursor[1],)
+    else:
+        where = [f"{sort} IS NOT NULL"]
+        order = f"{sort} {direction}, id {direction}"
+        params = ()
+        if cursor is not None:
+            where.append(f"({sort}, id) {op} (?, ?)")
+            params = tuple(cursor)
+    sql = "SELECT id, name, age, email FROM people"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return f"{sql} ORDER BY {order} LIMIT ?", params + (limit,)
+
+
+def fetch_page(conn, sort="id", descending=False, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """Return (rows, next_cursor); next_cursor is None on the last page.
+
+    `after` is the cursor returned with the previous page, a (value, id) pair.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by {sort!r}; expected one of {SORT_COLUMNS}")
+    segments = _segments(sort, descending)
+    start = 0
+    if after is not None:
+        start = segments.index("null" if sort != "id" and after[0] is None else "value")
+    rows = []
+    for i, segment in enumerate(segments[start:]):
+        cursor = after if i == 0 else None
+        sql, params = _segment_query(sort, segment, descending, cursor, page_size + 1 - len(rows))
+        rows.extend(conn.execute(sql, params).fetchall())
+        if len(rows) > page_size:
+            break
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, (last[SORT_COLUMNS.index(sort)], last[0])
@@ -0,0 +1,156 @@
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .instrument import InstrumentedConnection
+
+DEFAULT_READERS = 4
+
+# How long SQLite itself waits on a lock before raising SQLITE_BUSY (seconds).
+BUSY_TIMEOUT = 5.0
+
+# Retries on top of the busy timeout, with exponential backoff and jitter.
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+def is_busy(exc):
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED)
+    message = str(exc)
+    return "locked" in message or "busy" in message
+
+
+def retry_busy(fn, retries=BUSY_RETRIES, backoff=BUSY_BACKOFF):
+    """Call fn(), retrying with backoff while the database is busy."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except sqlite3.OperationalError as exc:
+            if attempt == retries or not is_busy(exc):
+                raise
+            time.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+
+
+class ConnectionPool:
+    """One writer connection plus a fixed set of read-only connections.
+
+    SQLite allows a single writer at a time, so writes are serialized on a
+    lock in-process instead of contending inside SQLite. Each reader
+    connection is checked out by one thread at a time, so concurrent sessions
+    never share a cursor. An in-memory database only exists on its own
+    connection, so there reads go through the writer.
+
+    With `metrics` (an instrument.QueryMetrics), every statement run on the
+    writer and readers is timed and recorded there.
+    """
+
+    def __init__(self, path, readers=DEFAULT_READERS, busy_timeout=BUSY_TIMEOUT, profile=None,
+                 metrics=None):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.profile = profile
+        self.metrics = metrics
+        self._closed = False
+        self._writer = self._connect(writer=True)
+        self._write_lock = threading.RLock()
+        self._readers = queue.Queue()
+        self._monitor = None
+        self._monitor_lock = threading.Lock()
+        if path != ":memory:":
+            # Sees every commit made through any other connection, including
+            # this pool's writer, via PRAGMA data_version.
+            self._monitor = self._connect(writer=False, instrument=False)
+            for _ in range(readers):
+                conn = self._connect(writer=False)
+                conn.execute("PRAGMA query_only = ON")
+                self._readers.put(conn)
+            self._reader_count = readers
+        else:
+            self._reader_count = 0
+
+    def _connect(self, writer, instrument=True):
+        if instrument and self.metrics is not None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False,
+                                   factory=InstrumentedConnection)
+            conn.metrics = self.metrics
+        else:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+        if self.profile is not None:
+            self.profile.apply(conn, writer=writer)
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Exclusive use of the writer connection."""
+        with self._write_lock:
+            yield self._writer
+
+    @contextmanager
+    def reader(self):
+        """Exclusive use of a read-only connection for the duration of the block."""
+        if not self._reader_count:
+            with self.writer() as conn:
+                yield conn
+            return
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            # Never hand the next thread a connection with an open read transaction.
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def read(self, fn):
+        """Run fn(conn) on a reader, retrying while the database is busy."""
+        def attempt():
+            with self.reader() as conn:
+                return fn(conn)
+        return retry_busy(attempt)
+
+    def write(self, fn):
+        """Run fn(conn) in one transaction on the writer, retrying while busy."""
+        def attempt():
+            with self.writer() as conn:
+                with conn:
+                    return fn(conn)
+        return retry_busy(attempt)
+
+    def data_version(self):
+        """Changes whenever any connection, in this process or another, commits."""
+        if self._monitor is None:
+            # Nothing outside this pool can write to an in-memory database.
+            return None
+        with self._monitor_lock:
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def checkpoint(self):
+        """Copy committed WAL frames back into the database without blocking readers."""
+        with self.writer() as conn:
+            return conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+
+    def optimize(self):
+        with self.writer() as conn:
+            conn.execute("PRAGMA optimize")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        with self._write_lock:
+            self._writer.close()
+        if self._monitor is not None:
+            with self._monitor_lock:
+                self._monitor.close()
+        for _ in range(self._reader_count):
+            self._readers.get().close()
@@ -0,0 +1,117 @@
+import json
+import os
+
+# Storage profiles: the PRAGMAs every connection is opened with, plus how often
+# the background maintenance checkpoints the WAL, runs PRAGMA optimize, returns
+# free pages to the filesystem, archives rows under the store's retention
+# policy (if any) and, when the store has a backup directory, takes a snapshot.
+# Optimize, vacuum and archival wait until no write has committed for
+# idle_seconds.
+#
+# Pick one with PEOPLEDB_STORAGE_PROFILE=<name>, or point
+# PEOPLEDB_STORAGE_CONFIG at a JSON file (default: ./storage.json if present):
+#
+#     {"profile": "wal", "pragmas": {"cache_size": -131072}, "checkpoint_interval": 30}
+#
+# Keys other than "profile" override the chosen profile's settings.
+
+PROFILE_ENV = "PEOPLEDB_STORAGE_PROFILE"
+CONFIG_ENV = "PEOPLEDB_STORAGE_CONFIG"
+DEFAULT_CONFIG_FILE = "storage.json"
+
+# Applied once on the writer; the rest are per-connection settings.
+PERSISTENT_PRAGMAS = ("journal_mode",)
+
+PROFILES = {
+    # SQLite's own defaults: rollback journal, readers block the committing writer.
+    "rollback": {
+        "pragmas": {},
+        "checkpoint_interval": None,
+        "optimize_interval": None,
+        # A backup's long read transaction would block every commit here.
+        "backup_interval": None,
+        "vacuum_interval": None,
+        "archive_interval": None,
+        "idle_seconds": None,
+    },
+    # WAL lets readers run alongside the writer. synchronous=NORMAL only syncs
+    # at checkpoints, so a power loss can drop the last commits but never
+    # corrupts the database.
+    "wal": {
+        "pragmas": {
+            "journal_mode": "wal",
+            "synchronous": "normal",
+            "cache_size": -32768,
+            "mmap_size": 256 * 1024 * 1024,
+            "temp_store": "memory",
+        },
+        "checkpoint_interval": 60,
+        "optimize_interval": 3600,
+        "backup_interval": 24 * 3600,
+        "vacuum_interval": 600,
+        "archive_interval": 3600,
+        "idle_seconds": 30,
+    },
+    # WAL with an fsync on every commit.
+    "wal-durable": {
+        "pragmas": {
+            "journal_mode": "wal",
+            "synchronous": "full",
+            "cache_size": -32768,
+            "mmap_size": 256 * 1024 * 1024,
+            "temp_store": "memory",
+        },
+        "checkpoint_interval": 60,
+        "optimize_interval": 3600,
+        "backup_interval": 24 * 3600,
+        "vacuum_interval": 600,
+        "archive_interval": 3600,
+        "idle_seconds": 30,
+    },
+}
+
+DEFAULT_PROFILE = "wal"
+
+
+class StorageProfile:
+    def __init__(self, name, pragmas, checkpoint_interval=None, optimize_interval=None, backup_interval=None,
+                 vacuum_interval=None, archive_interval=None, idle_seconds=None):
+        self.name = name
+        self.pragmas = dict(pragmas)
+        self.checkpoint_interval = checkpoint_interval
+        self.optimize_interval = optimize_interval
+        self.backup_interval = backup_interval
+        self.vacuum_interval = vacuum_interval
+        self.archive_interval = archive_interval
+        self.idle_seconds = idle_seconds
+
+    def __repr__(self):
+        return f"StorageProfile({self.name!r}, {self.pragmas!r})"
+
+    def apply(self, conn, writer=True):
+        """Set the profile's PRAGMAs on a freshly opened connection."""
+        for pragma, value in self.pragmas.items():
+            if pragma in PERSISTENT_PRAGMAS and not writer:
+                continue
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def get_profile(name, **overrides):
+    if name not in PROFILES:
+        raise ValueError(f"Unknown storage profile {name!r}; expected one of {list(PROFILES)}")
+    settings = {**PROFILES[name], **overrides}
+    settings["pragmas"] = {**PROFILES[name]["pragmas"], **overrides.get("pragmas", {})}
+    return StorageProfile(name, **settings)
+
+
+def load_profile(environ=None):
+    """Resolve the storage profile from the environment and config file."""
+    environ = os.environ if environ is None else environ
+    config = {}
+    path = environ.get(CONFIG_ENV)
+    if path or os.path.exists(DEFAULT_CONFIG_FILE):
+        with open(path or DEFAULT_CONFIG_FILE) as f:
+            config = json.load(f)
+    name = environ.get(PROFILE_ENV) or config.pop("profile", DEFAULT_PROFILE)
+    config.pop("profile", None)
+    return get_profile(name, **config)
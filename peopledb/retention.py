@@ -0,0 +1,150 @@
+# Retention: moving cold people out of the hot table into an archive.
+#
+# A RetentionPolicy selects rows by a PeopleFilter's predicates and/or an id
+# cutoff (ids only grow, so a low id is an old row). Each archive_batch moves
+# up to ARCHIVE_BATCH_ROWS of them to a separate archive database as one
+# zlib-compressed JSON block. Inside the write transaction on the main
+# database it deletes the rows with RETURNING, commits the block to the
+# archive, and only then lets the delete commit: a crash in between leaves
+# the rows in both files, and recover() deletes them from `people` on the
+# next run. If the delete fails to commit because the database is busy, the
+# write is retried. The retry deletes the same rows and replaces the block
+# the failed attempt left in the archive, so nothing is archived twice.
+# Deletes go through the usual triggers, so statistics, FTS and the change
+# log (as 'delete' entries) stay in step.
+import json
+import os
+import sqlite3
+import time
+import zlib
+from dataclasses import asdict, dataclass
+
+from .filters import PeopleFilter, filter_clauses
+
+# Rows moved per transaction; the writer is held for about this many deletes.
+ARCHIVE_BATCH_ROWS = 1000
+
+# Sleep between batches so queued app writes get the writer.
+ARCHIVE_PAUSE = 0.01
+
+# Archived rows are cold: compress them well.
+ARCHIVE_COMPRESS_LEVEL = 9
+
+ARCHIVE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS archived_people (
+        batch INTEGER PRIMARY KEY AUTOINCREMENT,
+        archived_at REAL NOT NULL,
+        policy TEXT NOT NULL,
+        first_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+'''
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """People to archive: those matching `match` (its sort and limit are
+    ignored) and, with `before_id`, inserted before that id."""
+
+    match: PeopleFilter | None = None
+    before_id: int | None = None
+
+    def clauses(self):
+        where, params = filter_clauses(self.match) if self.match else ([], [])
+        if self.before_id is not None:
+            where.append("id < ?")
+            params.append(self.before_id)
+        if not where:
+            raise ValueError("A retention policy needs a filter or a before_id; it would archive everyone")
+        return where, params
+
+    def describe(self):
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+@dataclass
+class ArchiveReport:
+    rows: int = 0
+    batches: int = 0
+    # Rows found in the archive and still in `people` after an interrupted run.
+    recovered: int = 0
+    elapsed: float = 0.0
+
+
+def archive_path(path):
+    """people.db -> people.archive.db"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.archive{ext or '.db'}"
+
+
+def open_archive(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    with conn:
+        conn.execute(ARCHIVE_TABLE)
+    return conn
+
+
+def encode_rows(rows):
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), ARCHIVE_COMPRESS_LEVEL)
+
+
+def decode_rows(data):
+    return [tuple(row) for row in json.loads(zlib.decompress(data))]
+
+
+def recover(conn, archive):
+    """Delete rows of the newest archived batch that are still in `people`.
+
+    Runs in the caller's write transaction; returns the number deleted.
+    """
+    last = archive.execute("SELECT data FROM archived_people ORDER BY batch DESC LIMIT 1").fetchone()
+    if last is None:
+        return 0
+    ids = [row[0] for row in decode_rows(last[0])]
+    return conn.execute(
+        f"DELETE FROM people WHERE id IN ({','.join('?' * len(ids))})", ids
+    ).rowcount
+
+
+def archive_batch(conn, archive, policy, batch_rows=ARCHIVE_BATCH_ROWS):
+    """Move up to `batch_rows` matching people to the archive, oldest first.
+
+    Runs in the caller's write transaction on `conn`, which must commit only
+    after this returns; returns the number of rows moved.
+    """
+    where, params = policy.clauses()
+    rows = conn.execute(
+        "DELETE FROM people WHERE id IN "
+        f"(SELECT id FROM people WHERE {' AND '.join(where)} ORDER BY id LIMIT ?) "
+        "RETURNING id, name, age, email",
+        (*params, batch_rows),
+    ).fetchall()
+    if not rows:
+        return 0
+    rows.sort()
+    block = (time.time(), policy.describe(), len(rows), encode_rows(rows), rows[0][0], rows[-1][0])
+    with archive:
+        # A retry, after the delete failed to commit, finds its own block.
+        replaced = archive.execute(
+            "UPDATE archived_people SET archived_at = ?, policy = ?, rows = ?, data = ? "
+            "WHERE batch = (SELECT MAX(batch) FROM archived_people) AND first_id = ? AND last_id = ?",
+            block,
+        ).rowcount
+        if not replaced:
+            archive.execute(
+                "INSERT INTO archived_people (archived_at, policy, rows, data, first_id, last_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                block,
+            )
+    return len(rows)
+
+
+def iter_archived(archive, after_batch=0):
+    """Yield (batch, archived_at, rows) for every archived batch after `after_batch`."""
+    cursor = archive.execute(
+        "SELECT batch, archived_at, data FROM archived_people WHERE batch > ? ORDER BY batch", (after_batch,)
+    )
+    for batch, archived_at, data in cursor:
+        yield batch, archived_at, decode_rows(data)
@@ -0,0 +1,445 @@
+import sqlite3
+import string
+
+# ---------- Base table ----------
+PEOPLE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS people (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        age INTEGER,
+        email TEXT
+    )
+'''
+
+# ---------- Sort indexes ----------
+# Back keyset pagination on each sortable column; the implicit rowid
+# suffix gives the (column, id) order the page cursor relies on.
+PEOPLE_SORT_INDEXES = {
+    "people_name_idx": "CREATE INDEX IF NOT EXISTS people_name_idx ON people (name)",
+    "people_age_idx": "CREATE INDEX IF NOT EXISTS people_age_idx ON people (age)",
+    "people_email_idx": "CREATE INDEX IF NOT EXISTS people_email_idx ON people (email)",
+}
+
+# ---------- Lookup indexes ----------
+# Case-insensitive prefix lookups for the typeahead person picker.
+PEOPLE_LOOKUP_INDEXES = {
+    "people_name_nocase_idx": "CREATE INDEX IF NOT EXISTS people_name_nocase_idx ON people (name COLLATE NOCASE)",
+    "people_email_lower_idx": "CREATE INDEX IF NOT EXISTS people_email_lower_idx ON people (lower(email))",
+}
+
+# ---------- Filter indexes ----------
+# Expression indexes for filters.PeopleFilter; queries must spell the
+# expression exactly the same way for SQLite to use them.
+EMAIL_DOMAIN = "lower(substr({email}, instr({email}, '@') + 1))"
+
+# SQLite's lower() and COLLATE NOCASE fold ASCII letters only; Python code
+# that reproduces their results must not use str.lower().
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def ascii_lower(text):
+    return text.translate(_ASCII_LOWER)
+
+PEOPLE_FILTER_INDEXES = {
+    "people_email_domain_idx": (
+        "CREATE INDEX IF NOT EXISTS people_email_domain_idx ON people "
+        f"({EMAIL_DOMAIN.format(email='email')})"
+    ),
+}
+
+# Every B-tree index on `people`, created by migration 5; bulk loads may drop
+# and rebuild these.
+SECONDARY_INDEXES = {**PEOPLE_SORT_INDEXES, **PEOPLE_LOOKUP_INDEXES, **PEOPLE_FILTER_INDEXES}
+
+# ---------- Full-text search index ----------
+# External-content FTS5 table: it stores only the trigram index, the rows
+# themselves stay in `people` and are joined back by rowid.
+PEOPLE_FTS_TABLE = '''
+    CREATE VIRTUAL TABLE people_fts USING fts5(
+        name,
+        email,
+        content='people',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+'''
+
+# Deleting an entry that is not in the index corrupts an external-content
+# table, so the delete and update triggers skip rows in the pending range
+# (see below): catching up indexes their current values. The insert trigger
+# skips them too, for rows other writers add while a load's range is open.
+FTS_INDEXED = "NOT EXISTS (SELECT 1 FROM people_fts_pending WHERE {id} > after_id AND {id} <= through_id)"
+
+PEOPLE_FTS_TRIGGERS = {
+    "people_fts_ai": f'''
+    CREATE TRIGGER IF NOT EXISTS people_fts_ai AFTER INSERT ON people
+    WHEN {FTS_INDEXED.format(id="new.id")} BEGIN
+        INSERT INTO people_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    ''',
+    "people_fts_ad": f'''
+    CREATE TRIGGER IF NOT EXISTS people_fts_ad AFTER DELETE ON people
+    WHEN {FTS_INDEXED.format(id="old.id")} BEGIN
+        INSERT INTO people_fts (people_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+    END
+    ''',
+    "people_fts_au": f'''
+    CREATE TRIGGER IF NOT EXISTS people_fts_au AFTER UPDATE OF name, email ON people
+    WHEN {FTS_INDEXED.format(id="old.id")} BEGIN
+        INSERT INTO people_fts (people_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO people_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    ''',
+}
+
+PEOPLE_FTS_CATCHUP = [
+    "INSERT INTO people_fts (rowid, name, email) SELECT id, name, email FROM people WHERE id > ?",
+]
+
+# Indexing trigrams costs more than inserting the rows, so a bulk load with
+# deferred indexes leaves the ids it added out of the index and records them
+# here: ids in (after_id, through_id] are not indexed yet. catch_up_fts()
+# indexes them a batch at a time after the load; meanwhile search answers
+# that range with LIKE. While the load runs, through_id is FTS_OPEN_RANGE:
+# it releases the writer between batches, and rows other writers insert in
+# between are left for the catch-up as well, so the range stays contiguous.
+PEOPLE_FTS_PENDING_TABLE = '''
+    CREATE TABLE IF NOT EXISTS people_fts_pending (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        after_id INTEGER NOT NULL,
+        through_id INTEGER NOT NULL
+    )
+'''
+
+FTS_OPEN_RANGE = 2**63 - 1
+
+# Ids indexed per catch_up_fts() transaction.
+FTS_CATCHUP_ROWS = 50_000
+
+# ---------- Running statistics ----------
+# Aggregates kept up to date by triggers so the dashboard never scans `people`.
+
+PEOPLE_STATS_TABLES = [
+    '''
+    CREATE TABLE people_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total INTEGER NOT NULL,
+        age_count INTEGER NOT NULL,
+        age_sum INTEGER NOT NULL,
+        email_null INTEGER NOT NULL
+    )
+    ''',
+    # Ages in buckets of ten years: bucket 3 holds ages 30-39.
+    '''
+    CREATE TABLE people_age_buckets (
+        bucket INTEGER PRIMARY KEY,
+        count INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE people_email_domains (
+        domain TEXT PRIMARY KEY,
+        count INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''',
+]
+
+
+def _stats_delta(row, sign):
+    """Trigger statements adding (sign=+1) or removing (sign=-1) one row."""
+    domain = EMAIL_DOMAIN.format(email=f"{row}.email")
+    statements = [
+        f"""UPDATE people_stats SET
+                age_count = age_count {sign} ({row}.age IS NOT NULL),
+                age_sum = age_sum {sign} COALESCE({row}.age, 0),
+                email_null = email_null {sign} ({row}.email IS NULL)
+            WHERE id = 1;""",
+        f"""INSERT INTO people_age_buckets (bucket, count)
+            SELECT {row}.age / 10, {sign}1 WHERE {row}.age IS NOT NULL
+            ON CONFLICT (bucket) DO UPDATE SET count = count {sign} 1;""",
+        f"""INSERT INTO people_email_domains (domain, count)
+            SELECT {domain}, {sign}1 WHERE instr({row}.email, '@') > 0
+            ON CONFLICT (domain) DO UPDATE SET count = count {sign} 1;""",
+    ]
+    if sign == "-":
+        statements += [
+            "DELETE FROM people_age_buckets WHERE count = 0;",
+            "DELETE FROM people_email_domains WHERE count = 0;",
+        ]
+    return "\n        ".join(statements)
+
+
+PEOPLE_STATS_TRIGGERS = {
+    "people_stats_ai": f'''
+    CREATE TRIGGER IF NOT EXISTS people_stats_ai AFTER INSERT ON people BEGIN
+        UPDATE people_stats SET total = total + 1 WHERE id = 1;
+        {_stats_delta("new", "+")}
+    END
+    ''',
+    "people_stats_ad": f'''
+    CREATE TRIGGER IF NOT EXISTS people_stats_ad AFTER DELETE ON people BEGIN
+        UPDATE people_stats SET total = total - 1 WHERE id = 1;
+        {_stats_delta("old", "-")}
+    END
+    ''',
+    "people_stats_au": f'''
+    CREATE TRIGGER IF NOT EXISTS people_stats_au AFTER UPDATE OF age, email ON people BEGIN
+        {_stats_delta("old", "-")}
+        {_stats_delta("new", "+")}
+    END
+    ''',
+}
+
+# Set-based equivalent of people_stats_ai for every row with id > ?.
+PEOPLE_STATS_CATCHUP = [
+    """
+    UPDATE people_stats SET
+        total = total + batch.row_count,
+        age_count = age_count + batch.ages,
+        age_sum = age_sum + batch.age_total,
+        email_null = email_null + batch.missing_emails
+    FROM (
+        SELECT COUNT(*) AS row_count, COUNT(age) AS ages, COALESCE(SUM(age), 0) AS age_total,
+               COALESCE(SUM(email IS NULL), 0) AS missing_emails
+        FROM people WHERE id > ?
+    ) AS batch
+    WHERE id = 1
+    """,
+    """
+    INSERT INTO people_age_buckets (bucket, count)
+    SELECT age / 10, COUNT(*) FROM people WHERE id > ? AND age IS NOT NULL GROUP BY age / 10
+    ON CONFLICT (bucket) DO UPDATE SET count = count + excluded.count
+    """,
+    f"""
+    INSERT INTO people_email_domains (domain, count)
+    SELECT {EMAIL_DOMAIN.format(email="email")}, COUNT(*) FROM people
+    WHERE id > ? AND instr(email, '@') > 0 GROUP BY 1
+    ON CONFLICT (domain) DO UPDATE SET count = count + excluded.count
+    """,
+]
+
+# ---------- Change log ----------
+# One row per insert, update or delete on `people`, in commit order; updates
+# and inserts carry the new values, deletes the old ones. AUTOINCREMENT keeps
+# `seq` increasing even after old entries are removed. Created by migration 1.
+PEOPLE_CHANGES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS people_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        name TEXT,
+        age INTEGER,
+        email TEXT
+    )
+'''
+
+PEOPLE_CHANGES_TRIGGERS = {
+    "people_changes_ai": '''
+    CREATE TRIGGER IF NOT EXISTS people_changes_ai AFTER INSERT ON people BEGIN
+        INSERT INTO people_changes (op, id, name, age, email) VALUES ('insert', new.id, new.name, new.age, new.email);
+    END
+    ''',
+    "people_changes_au": '''
+    CREATE TRIGGER IF NOT EXISTS people_changes_au AFTER UPDATE OF id, name, age, email ON people BEGIN
+        INSERT INTO people_changes (op, id, name, age, email) SELECT 'delete', old.id, old.name, old.age, old.email
+            WHERE old.id != new.id;
+        INSERT INTO people_changes (op, id, name, age, email)
+            VALUES (CASE WHEN old.id = new.id THEN 'update' ELSE 'insert' END, new.id, new.name, new.age, new.email);
+    END
+    ''',
+    "people_changes_ad": '''
+    CREATE TRIGGER IF NOT EXISTS people_changes_ad AFTER DELETE ON people BEGIN
+        INSERT INTO people_changes (op, id, name, age, email) VALUES ('delete', old.id, old.name, old.age, old.email);
+    END
+    ''',
+}
+
+PEOPLE_CHANGES_CATCHUP = [
+    "INSERT INTO people_changes (op, id, name, age, email) "
+    "SELECT 'insert', id, name, age, email FROM people WHERE id > ? ORDER BY id",
+]
+
+# ---------- Email uniqueness ----------
+# A person is identified by their email, compared case-insensitively and
+# ignoring surrounding blanks; rows without an email are never duplicates.
+# The unique index is built by migration 2 once existing duplicates have been
+# moved to `people_merged`; inserts spell the key the same way in their
+# ON CONFLICT target (see dedupe.py).
+EMAIL_KEY = "lower(trim(email))"
+HAS_EMAIL_KEY = "trim(email) != ''"
+
+PEOPLE_EMAIL_UNIQUE_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS people_email_unique_idx ON people "
+    f"({EMAIL_KEY}) WHERE {HAS_EMAIL_KEY}"
+)
+
+# Non-unique version used only while migration 2 looks for duplicates.
+PEOPLE_EMAIL_KEY_INDEX = (
+    "CREATE INDEX IF NOT EXISTS people_email_key_idx ON people "
+    f"({EMAIL_KEY}) WHERE {HAS_EMAIL_KEY}"
+)
+
+# Rows removed as exact duplicates, with the id of the row that was kept.
+PEOPLE_MERGED_TABLE = '''
+    CREATE TABLE IF NOT EXISTS people_merged (
+        id INTEGER PRIMARY KEY,
+        kept_id INTEGER NOT NULL,
+        name TEXT,
+        age INTEGER,
+        email TEXT,
+        merged_at REAL NOT NULL
+    )
+'''
+
+# Near-duplicate candidates from the last dedupe.find_near_duplicates run.
+PEOPLE_DUPLICATES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS people_duplicates (
+        a_id INTEGER NOT NULL,
+        b_id INTEGER NOT NULL,
+        score REAL NOT NULL,
+        PRIMARY KEY (a_id, b_id)
+    ) WITHOUT ROWID
+'''
+
+# ---------- Bulk loads ----------
+# AFTER INSERT triggers that bulk loads swap for set-based statements over the
+# new id range: name -> (trigger DDL, catch-up statements taking `id > ?`).
+BULK_INSERT_TRIGGERS = {
+    "people_fts_ai": (PEOPLE_FTS_TRIGGERS["people_fts_ai"], PEOPLE_FTS_CATCHUP),
+    "people_stats_ai": (PEOPLE_STATS_TRIGGERS["people_stats_ai"], PEOPLE_STATS_CATCHUP),
+    "people_changes_ai": (PEOPLE_CHANGES_TRIGGERS["people_changes_ai"], PEOPLE_CHANGES_CATCHUP),
+}
+
+
+def table_exists(conn, name):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def trigger_exists(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ? AND type = 'trigger'", (name,)).fetchone()
+    return row is not None
+
+
+def index_exists(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ? AND type = 'index'", (name,)).fetchone()
+    return row is not None
+
+
+def fts_pending(conn):
+    """The (after_id, through_id) range missing from the FTS index, or None."""
+    return conn.execute("SELECT after_id, through_id FROM people_fts_pending").fetchone()
+
+
+def can_defer_fts(conn):
+    """Whether the FTS triggers tolerate a pending range (see FTS_INDEXED);
+    older databases get them from a migration."""
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'people_fts_ai' AND type = 'trigger'").fetchone()
+    return row is not None and "people_fts_pending" in row[0]
+
+
+def fts_range_open(conn):
+    """Whether a bulk load is currently leaving new rows out of the FTS index."""
+    pending = fts_pending(conn)
+    return pending is not None and pending[1] == FTS_OPEN_RANGE
+
+
+def defer_fts(conn, after_id):
+    """Leave ids after `after_id` out of the FTS index by opening a pending
+    range that covers them. Returns False, changing nothing, if a closed
+    range of older ids is in the way. Runs in the caller's transaction."""
+    pending = fts_pending(conn)
+    if pending is None:
+        conn.execute("INSERT INTO people_fts_pending VALUES (1, ?, ?)", (after_id, FTS_OPEN_RANGE))
+    elif pending[1] == after_id:
+        conn.execute("UPDATE people_fts_pending SET through_id = ?", (FTS_OPEN_RANGE,))
+    elif pending[1] != FTS_OPEN_RANGE:
+        return False
+    return True
+
+
+def close_fts_range(conn):
+    """End an open pending range at the newest id, once a load is over.
+    Runs in the caller's transaction."""
+    conn.execute(
+        "UPDATE people_fts_pending SET through_id = (SELECT COALESCE(MAX(id), 0) FROM people) WHERE through_id = ?",
+        (FTS_OPEN_RANGE,),
+    )
+    conn.execute("DELETE FROM people_fts_pending WHERE through_id <= after_id")
+
+
+def catch_up_fts(conn, batch_rows=FTS_CATCHUP_ROWS):
+    """Index up to `batch_rows` ids of the pending range; returns how many
+    ids were covered, 0 once none are pending. An open range is caught up
+    to the newest id and stays open. Runs in the caller's transaction."""
+    pending = fts_pending(conn)
+    if pending is None:
+        return 0
+    after_id, through_id = pending
+    upper = min(after_id + batch_rows, through_id)
+    if through_id == FTS_OPEN_RANGE:
+        upper = min(upper, conn.execute("SELECT COALESCE(MAX(id), 0) FROM people").fetchone()[0])
+        if upper <= after_id:
+            return 0
+    conn.execute(
+        "INSERT INTO people_fts (rowid, name, email) SELECT id, name, email FROM people WHERE id > ? AND id <= ?",
+        (after_id, upper),
+    )
+    if upper == through_id:
+        conn.execute("DELETE FROM people_fts_pending")
+    else:
+        conn.execute("UPDATE people_fts_pending SET after_id = ?", (upper,))
+    return upper - after_id
+
+
+def create_fts_index(conn):
+    """Create the trigram index and its sync triggers (migration 7). Rows
+    that already exist are recorded as pending, for catch_up_fts to index a
+    batch at a time. Runs in the caller's transaction.
+
+    Returns False when this SQLite build has no FTS5/trigram support; callers
+    then stay on the plain LIKE search path.
+    """
+    if table_exists(conn, "people_fts"):
+        return True
+    try:
+        conn.execute(PEOPLE_FTS_TABLE)
+    except sqlite3.OperationalError:
+        return False
+    for trigger in PEOPLE_FTS_TRIGGERS.values():
+        conn.execute(trigger)
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM people").fetchone()[0]
+    if last_id:
+        conn.execute("INSERT INTO people_fts_pending VALUES (1, 0, ?)", (last_id,))
+    return True
+
+
+def create_stats_tables(conn):
+    """Create the running-statistics tables and seed them from existing rows
+    (migration 6). Runs in the caller's transaction."""
+    if table_exists(conn, "people_stats"):
+        return
+    for table in PEOPLE_STATS_TABLES:
+        conn.execute(table)
+    for trigger in PEOPLE_STATS_TRIGGERS.values():
+        conn.execute(trigger)
+    conn.execute("INSERT INTO people_stats VALUES (1, 0, 0, 0, 0)")
+    for statement in PEOPLE_STATS_CATCHUP:
+        conn.execute(statement, (0,))
+
+
+def ensure_schema(conn):
+    """Create the baseline tables if missing. Everything else, indexes
+    included, is added by migrations (see migrations.py), so opening an
+    existing database never waits on a table scan."""
+    if not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+        # auto_vacuum can only change before the first table is created (or
+        # through a VACUUM, which is instant on an empty file); incremental
+        # mode lets maintenance give deleted rows' pages back (see space.py).
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    with conn:
+        conn.execute(PEOPLE_TABLE)
+        conn.execute(PEOPLE_FTS_PENDING_TABLE)
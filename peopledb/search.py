@@ -0,0 +1,215 @@
+import re
+import sqlite3
+
+from .schema import ascii_lower, fts_pending
+
+# Minimum term length the trigram tokenizer can answer from the index.
+MIN_FTS_TERM = 3
+
+DEFAULT_LIMIT = 100
+
+# bm25 ranking costs a few microseconds per match, so for very common terms
+# only the first RANK_WINDOW matches are scored. This bounds a search at
+# roughly constant cost regardless of how many rows share the term.
+RANK_WINDOW = 2000
+
+
+def fts_query(term):
+    # Quote the term so FTS5 treats it as one literal substring, not syntax.
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_fts(conn, term, limit=DEFAULT_LIMIT):
+    """Ranked substring search over name/email through the trigram index."""
+    return conn.execute("""
+        SELECT p.id, p.name, p.age, p.email
+        FROM (
+            SELECT rowid, rank FROM people_fts
+            WHERE people_fts MATCH ?
+            LIMIT ?
+        ) f
+        JOIN people p ON p.id = f.rowid
+        ORDER BY f.rank
+        LIMIT ?
+    """, (fts_query(term), max(limit, RANK_WINDOW), limit)).fetchall()
+
+
+def like_pattern(term):
+    """A LIKE pattern (with ESCAPE '\\') matching `term` as a literal substring."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_like(conn, term, limit=DEFAULT_LIMIT, id_range=None):
+    """Table-scan substring search over name/email, used when no index is
+    available; with `id_range` (after_id, through_id), over those ids only.
+
+    LIKE folds the case of ASCII letters only, unlike the trigram index (see
+    search_path).
+    """
+    like_term = like_pattern(term)
+    if id_range is None:
+        return conn.execute("""
+            SELECT id, name, age, email FROM people
+            WHERE name LIKE ? ESCAPE '\\' OR
+                  email LIKE ? ESCAPE '\\'
+            LIMIT ?
+        """, (like_term, like_term, limit)).fetchall()
+    return conn.execute("""
+        SELECT id, name, age, email FROM people
+        WHERE id > ? AND id <= ? AND (name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')
+        LIMIT ?
+    """, (*id_range, like_term, like_term, limit)).fetchall()
+
+
+# ---------- Age terms ----------
+# "42", "30-40", ">65", "<=18": matched as numbers on the indexed age column
+# rather than as text, where "3" would also match 13 and 30-39.
+AGE_TERM = re.compile(r"(\d+)\s*-\s*(\d+)|([<>]=?)\s*(\d+)|(\d+)")
+
+
+def parse_age_term(term):
+    """Return the inclusive (min_age, max_age) a term asks for, or None for text terms.
+
+    Either bound may be None for an open range.
+    """
+    match = AGE_TERM.fullmatch(term)
+    if match is None:
+        return None
+    low, high, op, bound, exact = match.groups()
+    if exact is not None:
+        return int(exact), int(exact)
+    if op is None:
+        low, high = int(low), int(high)
+        return min(low, high), max(low, high)
+    bound = int(bound)
+    return {
+        ">": (bound + 1, None),
+        ">=": (bound, None),
+        "<": (None, bound - 1),
+        "<=": (None, bound),
+    }[op]
+
+
+def age_range_clause(min_age, max_age):
+    """(where clause, params) for an inclusive age range, or ("", ()) if unbounded."""
+    if min_age is not None and max_age is not None:
+        return "age BETWEEN ? AND ?", (min_age, max_age)
+    if min_age is not None:
+        return "age >= ?", (min_age,)
+    if max_age is not None:
+        return "age <= ?", (max_age,)
+    return "", ()
+
+
+def search_age(conn, min_age, max_age, limit=DEFAULT_LIMIT):
+    """People in an age range, youngest first, read from the age index."""
+    clause, params = age_range_clause(min_age, max_age)
+    return conn.execute(
+        f"SELECT id, name, age, email FROM people WHERE {clause} ORDER BY age, id LIMIT ?",
+        params + (limit,),
+    ).fetchall()
+
+
+# ---------- Cancellation ----------
+# SQLite VM instructions between checks of a cancellable query's flag; a few
+# thousand take well under a millisecond.
+PROGRESS_OPS = 1000
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+def cancellable(fn, cancelled, every=PROGRESS_OPS):
+    """Wrap fn(conn) so its queries abort with SearchCancelled once cancelled() is true.
+
+    Uses the connection's progress handler rather than Connection.interrupt():
+    a pooled connection may be serving another caller by the time an
+    interrupt from a different thread lands.
+    """
+    def run(conn):
+        conn.set_progress_handler(lambda: 1 if cancelled() else 0, every)
+        try:
+            return fn(conn)
+        except sqlite3.OperationalError as exc:
+            if cancelled():
+                raise SearchCancelled() from exc
+            raise
+        finally:
+            conn.set_progress_handler(None, every)
+    return run
+
+
+def search_path(term, fts_enabled=True):
+    """How search() answers a (stripped) term: "age", "fts" or "like".
+
+    The paths fold case differently: LIKE only folds ASCII letters, the
+    trigram index folds any letter, so "ém" does not find "Émile" while
+    "émi" does.
+    """
+    if parse_age_term(term) is not None:
+        return "age"
+    if fts_enabled and len(term) >= MIN_FTS_TERM:
+        return "fts"
+    return "like"
+
+
+def search(conn, term, limit=DEFAULT_LIMIT, fts_enabled=True):
+    term = term.strip()
+    path = search_path(term, fts_enabled)
+    if path == "age":
+        return search_age(conn, *parse_age_term(term), limit)
+    if path == "fts":
+        rows = search_fts(conn, term, limit)
+        # Rows of a bulk load the index has not caught up with yet. LIKE
+        # folds only ASCII, so until then they miss case-insensitive matches
+        # on other letters.
+        pending = fts_pending(conn)
+        if pending and len(rows) < limit:
+            rows += search_like(conn, term, limit - len(rows), pending)
+        return rows
+    return search_like(conn, term, limit)
+
+
+# ---------- Typeahead lookup ----------
+PICKER_LIMIT = 20
+
+# Sorts after any character, closing a prefix range: prefix <= x < prefix + MAX_CHAR.
+MAX_CHAR = "\U0010ffff"
+
+
+def find_candidates(conn, query, limit=PICKER_LIMIT):
+    """Up to `limit` people whose id equals `query` or whose name/email starts with it.
+
+    Every branch is an index range read, so the cost does not depend on the
+    size of the table. An empty query returns the most recently added people.
+    """
+    query = query.strip()
+    if not query:
+        return conn.execute(
+            "SELECT id, name, age, email FROM people ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    rows = []
+    if query.isascii() and query.isdigit():
+        rows += conn.execute("SELECT id, name, age, email FROM people WHERE id = ?", (int(query),)).fetchall()
+    rows += conn.execute("""
+        SELECT id, name, age, email FROM people
+        WHERE name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?
+        ORDER BY name COLLATE NOCASE
+        LIMIT ?
+    """, (query, query + MAX_CHAR, limit)).fetchall()
+    prefix = ascii_lower(query)
+    rows += conn.execute("""
+        SELECT id, name, age, email FROM people
+        WHERE lower(email) >= ? AND lower(email) < ?
+        ORDER BY lower(email)
+        LIMIT ?
+    """, (prefix, prefix + MAX_CHAR, limit)).fetchall()
+    seen = set()
+    candidates = []
+    for row in rows:
+        if row[0] not in seen:
+            seen.add(row[0])
+            candidates.append(row)
+    return candidates[:limit]
@@ -0,0 +1,285 @@
+# Horizontal partitioning of `people` across several SQLite files.
+#
+# Each shard is an ordinary PeopleStore over its own file, with its own writer
+# connection and group-commit queue, so writes to different shards commit in
+# parallel. Ids are hash-partitioned: global id = local id * shards + shard,
+# so `id % shards` names the shard and ids stay unique without coordination.
+# New rows go to the shard their email key hashes to, which keeps two inserts
+# of one email on the same unique index. Reads that are not by id fan out to
+# every shard on a thread pool and are merged in the order a single database
+# would have returned them.
+import heapq
+import itertools
+import os
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+
+from . import dedupe, paging, search, stats
+from .schema import ascii_lower
+from .filters import SORT_EXPRESSIONS
+from .store import DB_PATH, PeopleStore
+
+DEFAULT_SHARDS = 4
+
+SHARD_TABLE = '''
+    CREATE TABLE IF NOT EXISTS people_shard (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        shard INTEGER NOT NULL,
+        shards INTEGER NOT NULL
+    )
+'''
+
+
+def shard_paths(path, shards):
+    """people.db with 4 shards -> people.0.db ... people.3.db."""
+    root, ext = os.path.splitext(path)
+    return [f"{root}.{i}{ext or '.db'}" for i in range(shards)]
+
+
+def _check_shard(conn, shard, shards):
+    """Record the shard's position on first open and refuse a different layout."""
+    conn.execute(SHARD_TABLE)
+    conn.execute("INSERT OR IGNORE INTO people_shard VALUES (1, ?, ?)", (shard, shards))
+    found = conn.execute("SELECT shard, shards FROM people_shard").fetchone()
+    if found != (shard, shards):
+        raise ValueError(f"Database is shard {found[0]} of {found[1]}, opened as shard {shard} of {shards}")
+
+
+def _local_policy(policy, shard, shards):
+    """A retention policy over global ids, restated over one shard's local ids.
+
+    Global id = local * shards + shard, so global < before_id exactly when
+    local < ceil((before_id - shard) / shards).
+    """
+    if policy is None or policy.before_id is None:
+        return policy
+    return replace(policy, before_id=-(-(policy.before_id - shard) // shards))
+
+
+def _map_future(future, fn):
+    mapped = Future()
+
+    def done(f):
+        if f.exception() is not None:
+            mapped.set_exception(f.exception())
+        else:
+            mapped.set_result(fn(f.result()))
+
+    future.add_done_callback(done)
+    return mapped
+
+
+def _interleave(results):
+    """Round-robin over per-shard result lists, each already in rank order."""
+    return [row for group in itertools.zip_longest(*results) for row in group if row is not None]
+
+
+class ShardedPeopleStore:
+    """PeopleStore API over `shards` database files (see shard_paths).
+
+    The number of shards is fixed when the files are created. Keyword
+    arguments other than `workers` are passed to every shard's PeopleStore;
+    a retention policy's before_id is translated to each shard's local ids,
+    each shard archives to its own file (shard_paths of archive_path)
+    under shard-local ids, and backs up into its own subdirectory of
+    backup_dir.
+    Email uniqueness holds across shards for inserts; an update that moves a
+    person to an email hashed to another shard is checked against that shard
+    when it is made.
+    """
+
+    def __init__(self, path=DB_PATH, shards=DEFAULT_SHARDS, workers=None, **options):
+        if shards < 1:
+            raise ValueError(f"Need at least one shard, got {shards}")
+        self.path = path
+        self.count = shards
+        self.shards = []
+        try:
+            for i, shard_path in enumerate(shard_paths(path, shards)):
+                store = PeopleStore(shard_path, **self._shard_options(options, i, shards))
+                self.shards.append(store)
+                store.pool.write(lambda conn, i=i: _check_shard(conn, i, shards))
+        except BaseException:
+            for store in self.shards:
+                store.close()
+            raise
+        self._executor = ThreadPoolExecutor(max_workers=workers or shards, thread_name_prefix="peopledb-shard")
+        self._spread = itertools.count()
+
+    @staticmethod
+    def _shard_options(options, shard, shards):
+        options = dict(options)
+        if options.get("retention_policy") is not None:
+            options["retention_policy"] = _local_policy(options["retention_policy"], shard, shards)
+        if options.get("archive_path"):
+            options["archive_path"] = shard_paths(options["archive_path"], shards)[shard]
+        if options.get("backup_dir"):
+            # Shards back up on their own schedules; one directory each
+            # keeps one pruning shard from deleting another's new chunks.
+            options["backup_dir"] = os.path.join(options["backup_dir"], f"shard{shard}")
+        return options
+
+    @property
+    def fts_enabled(self):
+        return all(store.fts_enabled for store in self.shards)
+
+    def close(self):
+        self._executor.shutdown()
+        with ThreadPoolExecutor(max_workers=self.count) as closer:
+            list(closer.map(PeopleStore.close, self.shards))
+
+    # ---------- Routing ----------
+    def _locate(self, person_id):
+        return self.shards[person_id % self.count], person_id // self.count
+
+    def _global_id(self, shard, local_id):
+        return local_id * self.count + shard
+
+    def _globalize(self, shard, rows):
+        return [(self._global_id(shard, row[0]), *row[1:]) for row in rows]
+
+    def _home(self, email):
+        key = dedupe.email_key(email)
+        if key is None:
+            # No email to collide on: spread such rows evenly.
+            return next(self._spread) % self.count
+        return zlib.crc32(key.encode()) % self.count
+
+    def _gather(self, fn):
+        """[fn(shard_index, store)] run on every shard in parallel."""
+        return list(self._executor.map(fn, range(self.count), self.shards))
+
+    @staticmethod
+    def _cached(store, key, fn):
+        # Each shard's own cache, invalidated by that shard's writes.
+        return store.cache.get(key, lambda: store.pool.read(fn))
+
+    # ---------- Writes ----------
+    def add_person(self, name, age, email, wait=True, on_duplicate=None):
+        shard = self._home(email)
+        result = self.shards[shard].add_person(name, age, email, wait=wait, on_duplicate=on_duplicate)
+
+        def to_global(local_id):
+            return self._global_id(shard, local_id)
+
+        return to_global(result) if wait else _map_future(result, to_global)
+
+    def update_person(self, person_id, name, age, email, wait=True):
+        store, local_id = self._locate(person_id)
+        home = self._home(email)
+        if home != person_id % self.count:
+            other = self.shards[home].pool.read(lambda conn: dedupe.lookup_email(conn, email))
+            if other is not None:
+                raise dedupe.DuplicateEmailError(f"Someone with the email {email!r} already exists")
+        return store.update_person(local_id, name, age, email, wait=wait)
+
+    def delete_person(self, person_id, wait=True):
+        store, local_id = self._locate(person_id)
+        return store.delete_person(local_id, wait=wait)
+
+    # ---------- Reads ----------
+    def version(self):
+        """Opaque token that changes whenever any shard may have changed."""
+        return tuple(store.version() for store in self.shards)
+
+    def get_person(self, person_id):
+        store, local_id = self._locate(person_id)
+        row = store.get_person(local_id)
+        return row and (person_id, *row[1:])
+
+    def get_all_people(self):
+        return [row for i, rows in enumerate(self._gather(lambda i, s: s.get_all_people()))
+                for row in self._globalize(i, rows)]
+
+    def _page_cursor(self, shard, sort, descending, after):
+        # Rows of this shard after global id g, in (value, local id) terms:
+        # local > floor((g - shard) / n) ascending, < ceil(...) descending.
+        if after is None:
+            return None
+        offset = after[1] - shard
+        local_id = -(-offset // self.count) if descending else offset // self.count
+        return (local_id if sort == "id" else after[0], local_id)
+
+    def get_people_page(self, sort="id", descending=False, after=None, page_size=paging.DEFAULT_PAGE_SIZE):
+        """Same pages and cursors as PeopleStore.get_people_page, merged from every shard."""
+        if sort not in paging.SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}; expected one of {paging.SORT_COLUMNS}")
+        pages = self._gather(lambda i, s: s.get_people_page(
+            sort, descending, self._page_cursor(i, sort, descending, after), page_size
+        ))
+        column = paging.SORT_COLUMNS.index(sort)
+        merged = heapq.merge(
+            *(self._globalize(i, rows) for i, (rows, _) in enumerate(pages)),
+            # SQLite puts NULLs first ascending and last descending.
+            key=lambda row: (row[column] is not None, row[column], row[0]),
+            reverse=descending,
+        )
+        rows = list(itertools.islice(merged, page_size + 1))
+        more = len(rows) > page_size or any(cursor is not None for _, cursor in pages)
+        rows = rows[:page_size]
+        if not more or not rows:
+            return rows, None
+        return rows, (rows[-1][column], rows[-1][0])
+
+    def filter_people(self, people_filter):
+        f = people_filter
+        if f.sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Cannot sort by {f.sort!r}; expected one of {tuple(SORT_EXPRESSIONS)}")
+        column = paging.SORT_COLUMNS.index(f.sort)
+        fold = f.sort in ("name", "email")
+
+        def key(row):
+            value = row[column]
+            if fold and value is not None:
+                # COLLATE NOCASE and lower() fold ASCII only.
+                value = ascii_lower(value)
+            return value is not None, value, row[0]
+
+        results = self._gather(lambda i, s: self._globalize(i, s.filter_people(f)))
+        return list(itertools.islice(heapq.merge(*results, key=key, reverse=f.descending), f.limit))
+
+    def search_people(self, search_term, limit=search.DEFAULT_LIMIT, cancelled=None):
+        results = self._gather(lambda i, s: self._globalize(i, s.search_people(search_term, limit, cancelled)))
+        if search.parse_age_term(search_term.strip()) is not None:
+            # Age matches come back ordered by (age, id).
+            return list(itertools.islice(heapq.merge(*results, key=lambda row: (row[2], row[0])), limit))
+        return _interleave(results)[:limit]
+
+    def find_people(self, query, limit=search.PICKER_LIMIT):
+        query = query.strip()
+        results = self._gather(lambda i, s: self._globalize(i, s.find_people(query, limit)))
+        if not query:
+            return list(itertools.islice(heapq.merge(*results, key=lambda row: -row[0]), limit))
+        rows = _interleave(results)
+        if query.isascii() and query.isdigit():
+            # Each shard matched its own local id; only the global one counts.
+            person_id = int(query)
+            rows = [row for row in rows if row[0] != person_id and (
+                row[1].startswith(query) or (row[3] or "").startswith(query)
+            )]
+            exact = self.get_person(person_id)
+            if exact:
+                rows.insert(0, exact)
+        return rows[:limit]
+
+    # ---------- Statistics ----------
+    # Combined from per-shard partial counts, each cached by its shard.
+    def _totals(self):
+        return stats.combine(self._gather(lambda i, s: self._cached(s, ("totals",), stats.read_totals)))
+
+    def get_stats(self):
+        return stats.summary(self._totals())
+
+    def get_null_counts(self):
+        return stats.null_counts(self._totals())
+
+    def get_age_histogram(self):
+        return stats.age_histogram(stats.combine(
+            self._gather(lambda i, s: self._cached(s, ("age_counts",), stats.read_age_counts))
+        ))
+
+    def get_email_domains(self, limit=10):
+        return stats.top_domains(stats.combine(
+            self._gather(lambda i, s: self._cached(s, ("domain_counts",), stats.read_domain_counts))
+        ), limit)
@@ -0,0 +1,400 @@
+# Columnar in-memory copy of `people` for read-heavy deployments.
+#
+# Memory per row, with NumPy's variable-width StringDType for text:
+#   id     int64                       8 bytes
+#   age    int16 (NULL_AGE for NULL)   2 bytes
+#   name   StringDType                16 bytes, plus its UTF-8 length when
+#   email  StringDType                16 bytes   longer than 15 bytes
+#   email NULL flag, live flag         2 bytes
+#   name/email ASCII-only flags        2 bytes
+#   email domain code int32            4 bytes (domains stored once)
+# About 50 bytes plus the long-string bytes. With typical emails and the
+# arrays' growth headroom that measures ~100 bytes per row, against ~250 for
+# a fetchall() list of (id, name, age, email) tuples (bench.bench_snapshot).
+# Sort orders and lower-cased copies for queries are built on first use.
+import bisect
+import threading
+
+import numpy as np
+
+from .changes import ChangesCompactedError, last_seq, read_changes
+from .filters import SORT_EXPRESSIONS
+from .schema import ascii_lower
+from .search import MAX_CHAR
+
+NULL_AGE = -1
+NO_DOMAIN = -1
+
+MIN_CAPACITY = 1024
+
+# Rows (or change-log entries) pulled per fetchmany() while loading.
+LOAD_BATCH = 50_000
+
+# Deleted rows are only flagged; the arrays are compacted once this share
+# of them is dead.
+COMPACT_SHARE = 0.25
+
+STRING = np.dtypes.StringDType()
+
+
+def email_domain(email):
+    # Same as schema.EMAIL_DOMAIN: everything after the first "@", ASCII lower-cased.
+    return ascii_lower(email[email.find("@") + 1:])
+
+
+class _SortedView:
+    """Sequence of sort keys along an order, for bisect."""
+
+    def __init__(self, order, key):
+        self.order = order
+        self.key = key
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.key(self.order[i])
+
+
+class PeopleSnapshot:
+    """Column arrays of the `people` table, refreshed from `people_changes`.
+
+    load() copies the table; sync(version) applies change-log entries
+    committed since, but only when `version` (QueryCache.version()) moved.
+    Rows are kept in id order, so new rows are appended and updates and
+    deletes find their row by binary search. Queries are vectorized over
+    the arrays and return the same rows, in the same order, as the SQL
+    equivalents in paging.py and filters.py.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.ready = False
+        self.seq = 0
+        self.size = 0
+        self.dead = 0
+        self.reloads = 0
+        self._version = None
+        self._domains = []
+        self._domain_codes = {}
+        self._derived = {}
+        self._lock = threading.RLock()
+        self._reset()
+
+    # ---------- Storage ----------
+    def _allocate(self, capacity):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.ages = np.full(capacity, NULL_AGE, dtype=np.int16)
+        self.names = np.empty(capacity, dtype=STRING)
+        self.emails = np.empty(capacity, dtype=STRING)
+        self.email_null = np.zeros(capacity, dtype=bool)
+        self.domains = np.full(capacity, NO_DOMAIN, dtype=np.int32)
+        self.live = np.zeros(capacity, dtype=bool)
+        # Whether the text is pure ASCII, where np.strings.lower agrees with SQLite.
+        self.name_ascii = np.zeros(capacity, dtype=bool)
+        self.email_ascii = np.zeros(capacity, dtype=bool)
+
+    def _columns(self):
+        return ("ids", "ages", "names", "emails", "email_null", "domains", "live", "name_ascii", "email_ascii")
+
+    def _reserve(self, extra):
+        capacity = len(self.ids)
+        if self.size + extra <= capacity:
+            return
+        while capacity < self.size + extra:
+            capacity *= 2
+        for column in self._columns():
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype) if old.dtype == STRING else np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def _compact(self):
+        keep = np.flatnonzero(self.live[:self.size])
+        for column in self._columns():
+            old = getattr(self, column)
+            old[:len(keep)] = old[keep]
+        self.live[len(keep):self.size] = False
+        self.size = len(keep)
+        self.dead = 0
+
+    def _domain_code(self, email):
+        if email is None:
+            return NO_DOMAIN
+        domain = email_domain(email)
+        code = self._domain_codes.get(domain)
+        if code is None:
+            code = self._domain_codes[domain] = len(self._domains)
+            self._domains.append(domain)
+        return code
+
+    def _set(self, pos, row):
+        _, name, age, email = row
+        self.names[pos] = name
+        self.ages[pos] = NULL_AGE if age is None else age
+        self.emails[pos] = "" if email is None else email
+        self.email_null[pos] = email is None
+        self.domains[pos] = self._domain_code(email)
+        self.name_ascii[pos] = name.isascii()
+        self.email_ascii[pos] = email is None or email.isascii()
+
+    def _append(self, rows):
+        n = len(rows)
+        self._reserve(n)
+        start, end = self.size, self.size + n
+        ids, names, ages, emails = zip(*rows)
+        self.ids[start:end] = ids
+        self.names[start:end] = names
+        self.ages[start:end] = [NULL_AGE if a is None else a for a in ages]
+        self.emails[start:end] = ["" if e is None else e for e in emails]
+        self.email_null[start:end] = [e is None for e in emails]
+        self.domains[start:end] = [self._domain_code(e) for e in emails]
+        self.name_ascii[start:end] = [n.isascii() for n in names]
+        self.email_ascii[start:end] = [e is None or e.isascii() for e in emails]
+        self.live[start:end] = True
+        self.size = end
+
+    def _find(self, person_id):
+        pos = int(np.searchsorted(self.ids[:self.size], person_id))
+        if pos < self.size and self.ids[pos] == person_id:
+            return pos
+        return None
+
+    # ---------- Loading ----------
+    def load(self):
+        """Copy the whole table and note the change-log position it reflects."""
+        def read(conn):
+            self._reset()
+            # One read transaction, so the rows and the sequence number agree.
+            conn.execute("BEGIN")
+            seq = last_seq(conn)
+            cursor = conn.execute("SELECT id, name, age, email FROM people ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(LOAD_BATCH)
+                if not rows:
+                    break
+                self._append(rows)
+            return seq
+
+        with self._lock:
+            self.seq = self.pool.read(read)
+            self.ready = True
+
+    def _reset(self):
+        self.size = self.dead = 0
+        self._domains.clear()
+        self._domain_codes.clear()
+        self._derived.clear()
+        self._allocate(MIN_CAPACITY)
+
+    def sync(self, version):
+        """Apply committed changes if the table changed since the last call."""
+        with self._lock:
+            if version == self._version:
+                return
+            self.refresh()
+            self._version = version
+
+    def refresh(self):
+        """Apply every change-log entry after `seq`; returns how many were applied."""
+        with self._lock:
+            applied = 0
+            while True:
+                try:
+                    batch = self.pool.read(lambda conn: read_changes(conn, self.seq, LOAD_BATCH))
+                except ChangesCompactedError:
+                    batch = None
+                if batch == []:
+                    return applied
+                if batch is None or not self._apply(batch):
+                    # Entries we needed were compacted away, or rows arrived
+                    # out of id order: start over from the table.
+                    self.reloads += 1
+                    self.load()
+                    return applied
+                applied += len(batch)
+
+    def _apply(self, changes):
+        # Only the last change to each id matters.
+        latest = {}
+        for seq, op, person_id, name, age, email in changes:
+            latest[person_id] = (op, (person_id, name, age, email))
+        appended = []
+        last_id = int(self.ids[self.size - 1]) if self.size else 0
+        for person_id, (op, row) in sorted(latest.items()):
+            pos = self._find(person_id)
+            if op == "delete":
+                if pos is not None and self.live[pos]:
+                    self.live[pos] = False
+                    self.dead += 1
+            elif pos is not None:
+                if not self.live[pos]:
+                    self.live[pos] = True
+                    self.dead -= 1
+                self._set(pos, row)
+            elif person_id > last_id:
+                appended.append(row)
+            else:
+                return False
+        if appended:
+            self._append(appended)
+        if self.dead > COMPACT_SHARE * self.size:
+            self._compact()
+        self.seq = changes[-1][0]
+        self._derived.clear()
+        return True
+
+    # ---------- Derived columns ----------
+    # Computed on first use and dropped whenever a change is applied.
+    def _cached(self, key, compute):
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = compute()
+        return value
+
+    def _live_positions(self):
+        return self._cached("live", lambda: np.flatnonzero(self.live[:self.size]))
+
+    def _folded(self, column):
+        """The column lower-cased the way SQLite does, ASCII letters only."""
+        def compute():
+            values = getattr(self, column)[:self.size]
+            folded = np.strings.lower(values)
+            # np.strings.lower folds every script; redo the few non-ASCII
+            # rows in Python, which is much cheaper than np.strings.translate
+            # over the whole column.
+            others = np.flatnonzero(~getattr(self, column[:-1] + "_ascii")[:self.size])
+            if len(others):
+                folded[others] = [ascii_lower(value) for value in values[others].tolist()]
+            return folded
+        return self._cached(("folded", column), compute)
+
+    def _sorted(self, column, folded):
+        """(positions in value order, values in that order) over all rows."""
+        def compute():
+            values = self._folded(column) if folded else getattr(self, column)[:self.size]
+            order = np.argsort(values, kind="stable")
+            return order, values[order]
+        return self._cached(("sorted", column, folded), compute)
+
+    def _rank(self, column, folded):
+        def compute():
+            order, _ = self._sorted(column, folded)
+            rank = np.empty(self.size, dtype=np.int64)
+            rank[order] = np.arange(self.size)
+            return rank
+        return self._cached(("rank", column, folded), compute)
+
+    def _prefix_mask(self, column, prefix):
+        """Rows whose lower-cased `column` starts with `prefix`: one range of the sorted values."""
+        order, values = self._sorted(column, folded=True)
+        low = np.searchsorted(values, prefix)
+        high = np.searchsorted(values, prefix + MAX_CHAR)
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[low:high]] = True
+        return mask
+
+    def _sort_keys(self, positions, sort, folded):
+        """np.lexsort keys (least significant first) for SQLite's ascending order:
+        NULLs first, then the value, then id."""
+        ids = self.ids[positions]
+        if sort == "id":
+            return (ids,)
+        if sort == "age":
+            ages = self.ages[positions]
+            return (ids, ages, ages != NULL_AGE)
+        # Strings are compared through their rank among all rows, computed
+        # once: sorting integers is far cheaper than sorting strings.
+        values = self._rank(sort + "s", folded)[positions]
+        if sort == "email":
+            return (ids, values, ~self.email_null[positions])
+        return (ids, values)
+
+    def _order(self, sort):
+        """Live positions in ascending (sort, id) order, as paging.py reads them."""
+        def compute():
+            positions = self._live_positions()
+            return positions[np.lexsort(self._sort_keys(positions, sort, folded=False))]
+        return self._cached(("order", sort), compute)
+
+    def _key(self, sort, pos):
+        person_id = int(self.ids[pos])
+        if sort == "id":
+            return (person_id,)
+        if sort == "age":
+            age = int(self.ages[pos])
+            return (age != NULL_AGE, None if age == NULL_AGE else age, person_id)
+        if sort == "email" and self.email_null[pos]:
+            return (False, None, person_id)
+        return (True, str(getattr(self, sort + "s")[pos]), person_id)
+
+    def _rows(self, positions):
+        ages = self.ages[positions].tolist()
+        emails = self.emails[positions].tolist()
+        nulls = self.email_null[positions].tolist()
+        return [
+            (person_id, name, None if age == NULL_AGE else age, None if null else email)
+            for person_id, name, age, email, null in zip(
+                self.ids[positions].tolist(), self.names[positions].tolist(), ages, emails, nulls
+            )
+        ]
+
+    # ---------- Queries ----------
+    def fetch_page(self, sort="id", descending=False, after=None, page_size=50):
+        """Same contract as paging.fetch_page."""
+        if sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Cannot sort by {sort!r}; expected one of {tuple(SORT_EXPRESSIONS)}")
+        with self._lock:
+            order = self._order(sort)
+            if after is None:
+                start = len(order) if descending else 0
+            else:
+                value, person_id = after
+                if sort == "id":
+                    cursor = (person_id,)
+                else:
+                    cursor = (value is not None, value, person_id)
+                keys = _SortedView(order, lambda pos: self._key(sort, pos))
+                find = bisect.bisect_left if descending else bisect.bisect_right
+                start = find(keys, cursor)
+            if descending:
+                chunk = order[max(0, start - page_size - 1):start][::-1]
+            else:
+                chunk = order[start:start + page_size + 1]
+            rows = self._rows(chunk)
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        last = rows[-1]
+        return rows, (last[("id", "name", "age", "email").index(sort)], last[0])
+
+    def filter_people(self, people_filter):
+        """Same rows and order as filters.filter_people."""
+        f = people_filter
+        if f.sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Cannot sort by {f.sort!r}; expected one of {tuple(SORT_EXPRESSIONS)}")
+        with self._lock:
+            positions = self._live_positions()
+            mask = np.ones(len(positions), dtype=bool)
+            if f.min_age is not None or f.max_age is not None:
+                ages = self.ages[positions]
+                mask &= ages != NULL_AGE
+                if f.min_age is not None:
+                    mask &= ages >= f.min_age
+                if f.max_age is not None:
+                    mask &= ages <= f.max_age
+            domain = ascii_lower((f.email_domain or "").strip().lstrip("@"))
+            if domain:
+                if f.domain_prefix:
+                    codes = [code for code, d in enumerate(self._domains) if d.startswith(domain)]
+                else:
+                    codes = [self._domain_codes[domain]] if domain in self._domain_codes else []
+                mask &= np.isin(self.domains[positions], codes)
+            name = (f.name_prefix or "").strip()
+            if name:
+                mask &= self._prefix_mask("names", ascii_lower(name))[positions]
+            matched = positions[mask]
+            order = matched[np.lexsort(self._sort_keys(matched, f.sort, folded=True))]
+            if f.descending:
+                order = order[::-1]
+            return self._rows(order[:f.limit])
@@ -0,0 +1,104 @@
+# File size, free space and fragmentation of a database, and reclaiming space.
+#
+# Deleted rows (delete_person, archival) leave their pages on SQLite's
+# freelist: later inserts reuse them, but the file never shrinks, and a
+# table whose pages end up scattered reads slower in key order. Databases
+# created by this package use auto_vacuum=INCREMENTAL (see
+# schema.ensure_schema), so the maintenance thread can return free pages
+# to the filesystem a few at a time; a file created before that needs one
+# full vacuum() to switch modes.
+import os
+import sqlite3
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+# Free pages returned per incremental vacuum run; 2048 pages is 8 MiB at the
+# default page size, a few milliseconds of writer time.
+VACUUM_STEP_PAGES = 2048
+
+# Fewer free pages than this are left for inserts to reuse.
+VACUUM_MIN_FREE_PAGES = 256
+
+# Rows sampled per index by ANALYZE; approximate statistics at a bounded
+# cost instead of a full scan of every index.
+ANALYSIS_LIMIT = 1000
+
+
+def _pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def fragmentation(conn):
+    """Per table and index, the share of leaf pages that do not directly
+    follow the previous leaf on disk (0 is perfectly sequential).
+
+    Reads every page through the dbstat virtual table, so it costs about a
+    full scan of the file; None when SQLite was built without dbstat.
+    """
+    try:
+        cursor = conn.execute("SELECT name, pageno FROM dbstat WHERE pagetype = 'leaf'")
+    except sqlite3.OperationalError:
+        return None
+    leaves = {}
+    jumps = {}
+    previous = (None, None)
+    for name, pageno in cursor:
+        leaves[name] = leaves.get(name, 0) + 1
+        if name == previous[0] and pageno != previous[1] + 1:
+            jumps[name] = jumps.get(name, 0) + 1
+        previous = (name, pageno)
+    return {name: jumps.get(name, 0) / max(count - 1, 1) for name, count in leaves.items()}
+
+
+def space_report(conn, with_fragmentation=False):
+    """Size and free space of the connection's main database file."""
+    page_size = _pragma(conn, "page_size")
+    pages = _pragma(conn, "page_count")
+    free_pages = _pragma(conn, "freelist_count")
+    path = conn.execute("SELECT file FROM pragma_database_list WHERE name = 'main'").fetchone()[0]
+    wal_path = f"{path}-wal"
+    report = {
+        "file_bytes": pages * page_size,
+        "wal_bytes": os.path.getsize(wal_path) if path and os.path.exists(wal_path) else 0,
+        "page_size": page_size,
+        "pages": pages,
+        "free_pages": free_pages,
+        "free_bytes": free_pages * page_size,
+        "free_share": free_pages / pages if pages else 0.0,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum"), "unknown"),
+    }
+    if with_fragmentation:
+        report["fragmentation"] = fragmentation(conn)
+    return report
+
+
+def incremental_vacuum(conn, pages=VACUUM_STEP_PAGES, min_free=VACUUM_MIN_FREE_PAGES):
+    """Return up to `pages` free pages to the filesystem; returns how many.
+
+    Does nothing unless auto_vacuum is INCREMENTAL and at least `min_free`
+    pages are free. Must run outside a transaction.
+    """
+    if _pragma(conn, "auto_vacuum") != 2:
+        return 0
+    before = _pragma(conn, "freelist_count")
+    if before < min_free:
+        return 0
+    # Each step of this PRAGMA frees one page and the sqlite3 module only
+    # steps a row-less statement once; executescript runs it to completion.
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+    return before - _pragma(conn, "freelist_count")
+
+
+def vacuum(conn):
+    """Rebuild the file with auto_vacuum=INCREMENTAL: no free pages, tables
+    and indexes stored in order. Blocks the writer for the whole rebuild and
+    needs free disk space of about the database's size."""
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def analyze(conn, limit=ANALYSIS_LIMIT):
+    """Refresh the query planner's statistics after the table changed a lot."""
+    conn.execute(f"PRAGMA analysis_limit = {int(limit)}")
+    conn.execute("ANALYZE")
+    conn.commit()
@@ -0,0 +1,94 @@
+# Reads of the trigger-maintained summary tables (see schema.py). Each is a
+# handful of primary-key lookups, independent of the size of `people`.
+#
+# The read_*_counts functions return raw, additive partials, so the summaries
+# of several databases (see sharded.py) combine by adding them up.
+#
+# Until migration 6 has created and seeded the tables, the same numbers are
+# counted from `people` itself.
+from collections import Counter
+
+from .schema import EMAIL_DOMAIN, table_exists
+
+STAT_TOTALS = ("total", "age_count", "age_sum", "email_null")
+
+SCAN_TOTALS = "SELECT COUNT(*), COUNT(age), COALESCE(SUM(age), 0), COALESCE(SUM(email IS NULL), 0) FROM people"
+SCAN_AGE_COUNTS = "SELECT age / 10, COUNT(*) FROM people WHERE age IS NOT NULL GROUP BY 1"
+SCAN_DOMAIN_COUNTS = (
+    f"SELECT {EMAIL_DOMAIN.format(email='email')}, COUNT(*) FROM people WHERE instr(email, '@') > 0 GROUP BY 1"
+)
+
+
+def has_tables(conn):
+    return table_exists(conn, "people_stats")
+
+
+def read_totals(conn):
+    """Return the people_stats counters as a dict keyed by STAT_TOTALS."""
+    if has_tables(conn):
+        row = conn.execute("SELECT total, age_count, age_sum, email_null FROM people_stats WHERE id = 1").fetchone()
+    else:
+        row = conn.execute(SCAN_TOTALS).fetchone()
+    return dict(zip(STAT_TOTALS, row))
+
+
+def read_age_counts(conn):
+    """Return {bucket: count} per ten-year age bucket."""
+    sql = "SELECT bucket, count FROM people_age_buckets" if has_tables(conn) else SCAN_AGE_COUNTS
+    return dict(conn.execute(sql).fetchall())
+
+
+def read_domain_counts(conn):
+    """Return {domain: count} for every email domain."""
+    sql = "SELECT domain, count FROM people_email_domains" if has_tables(conn) else SCAN_DOMAIN_COUNTS
+    return dict(conn.execute(sql).fetchall())
+
+
+def combine(partials):
+    """Add up dicts of counts from several databases."""
+    total = Counter()
+    for partial in partials:
+        total.update(partial)
+    return dict(total)
+
+
+def summary(totals):
+    age_count = totals["age_count"]
+    avg_age = round(totals["age_sum"] / age_count, 1) if age_count else 0
+    return totals["total"], avg_age
+
+
+def null_counts(totals):
+    return {"age": totals["total"] - totals["age_count"], "email": totals["email_null"]}
+
+
+def age_histogram(age_counts):
+    return [(f"{bucket * 10}-{bucket * 10 + 9}", count) for bucket, count in sorted(age_counts.items())]
+
+
+def top_domains(domain_counts, limit=10):
+    return sorted(domain_counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def read_summary(conn):
+    """Return (total_people, average_age) with the age rounded like the UI shows it."""
+    return summary(read_totals(conn))
+
+
+def read_null_counts(conn):
+    """Return {column: rows where it is NULL} for the nullable columns."""
+    return null_counts(read_totals(conn))
+
+
+def read_age_histogram(conn):
+    """Return [(label, count)] per ten-year age bucket, youngest first."""
+    return age_histogram(read_age_counts(conn))
+
+
+def read_email_domains(conn, limit=10):
+    """Return the `limit` most common email domains as [(domain, count)]."""
+    if not has_tables(conn):
+        return top_domains(read_domain_counts(conn), limit)
+    return conn.execute(
+        "SELECT domain, count FROM people_email_domains ORDER BY count DESC, domain LIMIT ?", (limit,)
+    ).fetchall()
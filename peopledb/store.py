@@ -0,0 +1,359 @@
+import itertools
+import threading
+import time
+
+from . import (
+    backup, changes, dedupe, export, filters, grid, importer, migrations, paging, retention, schema, search, space,
+    stats,
+)
+from .cache import DEFAULT_MAX_BYTES, QueryCache
+from .instrument import QueryMetrics
+from .maintenance import MaintenanceScheduler
+from .pool import DEFAULT_READERS, ConnectionPool
+from .profiles import load_profile
+from .writequeue import WriteQueue
+
+DB_PATH = 'people.db'
+
+
+class PeopleStore:
+    """Data-access functions for the `people` table, free of any UI code.
+
+    Safe to share between threads: reads run on pooled read-only connections
+    and writes are serialized on a single writer connection. `on_duplicate`
+    is the default dedupe.ON_DUPLICATE policy for add_person. With a
+    `backup_dir`, snapshots are taken every profile.backup_interval seconds.
+    With a `retention_policy` (retention.RetentionPolicy), matching people
+    are moved to `archive_path` (default people.archive.db) when idle.
+    """
+
+    def __init__(self, path=DB_PATH, fts=True, readers=DEFAULT_READERS, profile=None,
+                 cache_bytes=DEFAULT_MAX_BYTES, instrument=True, snapshot=False, on_duplicate="error",
+                 backup_dir=None, retention_policy=None, archive_path=None):
+        self.path = path
+        self.on_duplicate = dedupe.check_policy(on_duplicate)
+        self.profile = profile or load_profile()
+        # Per-query timings, slow-query log and per-run DB time; None when off.
+        self.metrics = QueryMetrics() if instrument else None
+        self.pool = ConnectionPool(path, readers=readers, profile=self.profile, metrics=self.metrics)
+        # Search uses the trigram index once migration 7 has created it.
+        self.fts = fts
+        self._fts_created = False
+        with self.pool.writer() as conn:
+            schema.ensure_schema(conn)
+            with conn:
+                # Left open by a load that was interrupted.
+                schema.close_fts_range(conn)
+            fts_pending = schema.fts_pending(conn)
+        self.cache = QueryCache(self.pool.data_version, max_bytes=cache_bytes)
+        self.writes = WriteQueue(self.pool, on_commit=self.cache.bump)
+        # Pending schema migrations run in the background while the store serves.
+        self.migrator = migrations.Migrator(self.pool, on_commit=self.cache.bump)
+        self.migrator.start()
+        # Optional columnar replica (needs NumPy) for paging and filters; reads
+        # fall back to SQLite until it has loaded.
+        self.snapshot = None
+        if snapshot:
+            from .snapshot import PeopleSnapshot
+            self.snapshot = PeopleSnapshot(self.pool)
+            threading.Thread(target=self._load_snapshot, name="peopledb-snapshot", daemon=True).start()
+        self.backup_dir = backup_dir
+        if retention_policy is not None:
+            # Reject an empty policy here rather than in the maintenance thread.
+            retention_policy.clauses()
+        self.retention_policy = retention_policy
+        self.archive_path = archive_path or retention.archive_path(path)
+        # Jobs flagged True wait until no write has committed for profile.idle_seconds.
+        self.maintenance = MaintenanceScheduler([
+            ("checkpoint", self.profile.checkpoint_interval, self.pool.checkpoint),
+            ("optimize", self.profile.optimize_interval, self.pool.optimize, True),
+            ("vacuum", self.profile.vacuum_interval, self.incremental_vacuum, True),
+            ("archive", retention_policy and self.profile.archive_interval, self.archive_people, True),
+            ("backup", backup_dir and self.profile.backup_interval, self.create_backup),
+        ], is_idle=self.is_idle)
+        self.maintenance.start()
+        self._closing = threading.Event()
+        self._fts_thread = None
+        if fts_pending:
+            # A deferred bulk load was still being indexed when the last process stopped.
+            self._start_fts_catch_up()
+
+    @property
+    def fts_enabled(self):
+        """Whether search uses the FTS index: False with fts=False, before
+        the migration that creates it has run, or when SQLite lacks FTS5."""
+        if self.fts and not self._fts_created:
+            self._fts_created = self.pool.read(lambda conn: schema.table_exists(conn, "people_fts"))
+        return self.fts and self._fts_created
+
+    def _load_snapshot(self):
+        # The change log the snapshot follows is created by a migration.
+        self.migrator.wait()
+        if not self.migrator.error:
+            self.snapshot.load()
+
+    def close(self):
+        self._closing.set()
+        if self._fts_thread is not None:
+            self._fts_thread.join()
+        self.migrator.stop()
+        self.writes.close()
+        self.maintenance.stop()
+        self.pool.optimize()
+        self.pool.close()
+
+    # ---------- Writes ----------
+    # Writes are group-committed by the write queue. With wait=False they
+    # return a Future instead, resolving once the write has committed.
+    def _write(self, fn, wait):
+        future = self.writes.submit(fn)
+        return future.result() if wait else future
+
+    def add_person(self, name, age, email, wait=True, on_duplicate=None):
+        """Insert a person; returns the new id, or the existing one if the
+        email was taken and the policy did not raise DuplicateEmailError."""
+        on_duplicate = dedupe.check_policy(on_duplicate or self.on_duplicate)
+        return self._write(lambda conn: dedupe.insert_person(conn, name, age, email, on_duplicate), wait)
+
+    def update_person(self, person_id, name, age, email, wait=True):
+        """Update a person; returns the number of rows changed. Raises
+        DuplicateEmailError if someone else already has the email."""
+        return self._write(lambda conn: dedupe.update_person(conn, person_id, name, age, email), wait)
+
+    def delete_person(self, person_id, wait=True):
+        """Delete a person; returns the number of rows removed."""
+        return self._write(
+            lambda conn: conn.execute("DELETE FROM people WHERE id = ?", (person_id,)).rowcount,
+            wait,
+        )
+
+    def import_people(self, source, fmt="csv", **options):
+        """Bulk-load a file; see importer.import_people. The writer is released
+        between batches, so queued writes carry on during the load. After a
+        load with defer_indexes, a background thread adds its rows to the FTS
+        index."""
+        # Not retried: a failed import may already have committed batches.
+        try:
+            return importer.import_people(self.pool.writer, source, fmt, **options)
+        finally:
+            self.cache.bump()
+            if self.pool.read(schema.fts_pending):
+                self._start_fts_catch_up()
+
+    def _start_fts_catch_up(self):
+        if self._fts_thread is None or not self._fts_thread.is_alive():
+            self._fts_thread = threading.Thread(target=self.catch_up_fts, name="peopledb-fts", daemon=True)
+            self._fts_thread.start()
+
+    def catch_up_fts(self, pause=migrations.BATCH_PAUSE):
+        """Index the rows a deferred bulk load left out of the FTS index, one
+        batch per transaction; returns the number of ids covered."""
+        covered = 0
+        while not self._closing.is_set():
+            count = self.pool.write(schema.catch_up_fts)
+            if not count:
+                break
+            covered += count
+            self.cache.bump()
+            time.sleep(pause)
+        return covered
+
+    def create_backup(self, keep=backup.DEFAULT_KEEP, progress=None):
+        """Snapshot the database into backup_dir; see backup.backup."""
+        if not self.backup_dir:
+            raise RuntimeError("This store has no backup directory")
+        return backup.backup(self.path, self.backup_dir, keep=keep, progress=progress)
+
+    # ---------- Retention and space ----------
+    def is_idle(self):
+        """Whether no write has committed for profile.idle_seconds."""
+        idle = self.profile.idle_seconds or 0
+        return time.monotonic() - self.writes.last_commit >= idle
+
+    def archive_people(self, policy=None, batch_rows=retention.ARCHIVE_BATCH_ROWS, max_batches=None):
+        """Move people matching `policy` (default: the store's) to the archive
+        database, a batch per transaction; see retention.py."""
+        policy = policy or self.retention_policy
+        if policy is None:
+            raise RuntimeError("This store has no retention policy")
+        report = retention.ArchiveReport()
+        start = time.perf_counter()
+        archive = retention.open_archive(self.archive_path)
+        try:
+            report.recovered = self.pool.write(lambda conn: retention.recover(conn, archive))
+            while max_batches is None or report.batches < max_batches:
+                moved = self.pool.write(lambda conn: retention.archive_batch(conn, archive, policy, batch_rows))
+                if not moved:
+                    break
+                self.cache.bump()
+                report.rows += moved
+                report.batches += 1
+                time.sleep(retention.ARCHIVE_PAUSE)
+        finally:
+            archive.close()
+        if report.recovered:
+            self.cache.bump()
+        if report.rows:
+            # The planner's statistics describe the table before the move.
+            with self.pool.writer() as conn:
+                space.analyze(conn)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def space_report(self, fragmentation=False):
+        """File size, free pages and, optionally, fragmentation; see space.space_report."""
+        return self.pool.read(lambda conn: space.space_report(conn, fragmentation))
+
+    def incremental_vacuum(self, pages=space.VACUUM_STEP_PAGES):
+        """Return up to `pages` free pages to the filesystem; returns how many."""
+        with self.pool.writer() as conn:
+            return space.incremental_vacuum(conn, pages)
+
+    def vacuum(self):
+        """Rebuild the file compactly, in incremental auto_vacuum mode. Blocks
+        every write until done: run it in a maintenance window."""
+        with self.pool.writer() as conn:
+            space.vacuum(conn)
+
+    # ---------- Reads ----------
+    # Cached by query and parameters until the next committed write. Results
+    # are shared between callers, so treat them as read-only.
+    def version(self):
+        """Opaque token that changes whenever the table may have changed."""
+        return self.cache.version()
+
+    def _read(self, key, fn, from_snapshot=None):
+        if from_snapshot is not None and self.snapshot is not None and self.snapshot.ready:
+            def compute():
+                self.snapshot.sync(self.version())
+                return from_snapshot(self.snapshot)
+            return self.cache.get(("snapshot",) + key, compute)
+        return self.cache.get(key, lambda: self.pool.read(fn))
+
+    def get_all_people(self):
+        return self._read(("all",), lambda conn: conn.execute("SELECT id, name, age, email FROM people").fetchall())
+
+    def get_people_page(self, sort="id", descending=False, after=None, page_size=paging.DEFAULT_PAGE_SIZE):
+        return self._read(
+            ("page", sort, descending, after, page_size),
+            lambda conn: paging.fetch_page(conn, sort, descending, after, page_size),
+            lambda snap: snap.fetch_page(sort, descending, after, page_size),
+        )
+
+    def get_people_window(self, start, sort="id", descending=False, size=grid.WINDOW_ROWS):
+        """`size` rows from row `start` in sort order, as an Arrow table (needs pyarrow).
+
+        Reads and caches whole chunks (see grid.py), so scrolling within a
+        chunk does not touch SQLite.
+        """
+        first = start // grid.CHUNK_ROWS
+        batches = []
+        after = None
+        for chunk in range(first, (start + max(size, 1) - 1) // grid.CHUNK_ROWS + 1):
+            data, after = self._read(
+                ("grid", sort, descending, chunk),
+                lambda conn, chunk=chunk, after=after: grid.fetch_chunk(conn, sort, descending, chunk, after),
+            )
+            batches.append(grid.decode(data))
+        return grid.window(batches, start, first, size)
+
+    def filter_people(self, people_filter):
+        """People matching a filters.PeopleFilter, in its sort order."""
+        return self._read(
+            ("filter", people_filter),
+            lambda conn: filters.filter_people(conn, people_filter),
+            lambda snap: snap.filter_people(people_filter),
+        )
+
+    def search_people(self, search_term, limit=search.DEFAULT_LIMIT, cancelled=None):
+        """Search results; with `cancelled`, the query aborts with
+        search.SearchCancelled as soon as cancelled() returns True."""
+        fts_enabled = self.fts_enabled
+
+        def run(conn):
+            return search.search(conn, search_term, limit, fts_enabled=fts_enabled)
+
+        return self._read(("search", search_term, limit), search.cancellable(run, cancelled) if cancelled else run)
+
+    def find_people(self, query, limit=search.PICKER_LIMIT):
+        return self._read(("find", query, limit), lambda conn: search.find_candidates(conn, query, limit))
+
+    def get_person(self, person_id):
+        return self._read(
+            ("person", person_id),
+            lambda conn: conn.execute(
+                "SELECT id, name, age, email FROM people WHERE id = ?", (person_id,)
+            ).fetchone(),
+        )
+
+    def export_people(self, fmt="csv", batch_size=export.DEFAULT_BATCH_SIZE):
+        return self.pool.read(lambda conn: export.export_people(conn, fmt, batch_size))
+
+    def export_with_seq(self, fmt="csv", batch_size=export.DEFAULT_BATCH_SIZE):
+        """(seq, file): a full export and the change-log position it reflects;
+        see export.export_with_seq."""
+        return self.pool.read(lambda conn: export.export_with_seq(conn, fmt, batch_size))
+
+    # ---------- Change log ----------
+    # Not cached: consumers poll with a moving cursor.
+    def changes_since(self, since=0, limit=changes.DEFAULT_BATCH_SIZE):
+        """Changes with seq > `since`, oldest first; see changes.read_changes."""
+        return self.pool.read(lambda conn: changes.read_changes(conn, since, limit))
+
+    def iter_changes(self, since=0, batch_size=changes.DEFAULT_BATCH_SIZE):
+        """Yield batches of changes after `since` until caught up."""
+        while True:
+            batch = self.changes_since(since, batch_size)
+            if not batch:
+                return
+            yield batch
+            since = batch[-1][0]
+
+    def compact_changes(self, through=None, keep=0):
+        """Delete log entries up to seq `through`, or all but the newest `keep`.
+
+        Runs in small transactions between other writes; returns the number
+        of entries removed.
+        """
+        if through is None:
+            through = self.pool.read(changes.last_seq) - keep
+        removed = 0
+        while True:
+            count = self.pool.write(lambda conn: changes.compact_changes(conn, through))
+            if not count:
+                return removed
+            removed += count
+
+    # ---------- Duplicates ----------
+    def find_duplicates(self, threshold=dedupe.DEFAULT_THRESHOLD, window=dedupe.DEFAULT_WINDOW):
+        """Replace the stored near-duplicate candidates with a fresh scan.
+
+        Streams the table once per neighbour order on one reader while the
+        pairs are written in small batches; returns the number of pairs.
+        """
+        # The results table is created by a migration.
+        self.migrator.wait()
+        self.pool.write(lambda conn: conn.execute("DELETE FROM people_duplicates"))
+        with self.pool.reader() as conn:
+            pairs = dedupe.iter_near_duplicates(conn, threshold, window)
+            while batch := list(itertools.islice(pairs, dedupe.PAIR_BATCH)):
+                self.pool.write(lambda writer: dedupe.save_pairs(writer, batch))
+        self.cache.bump()
+        return self.pool.read(lambda conn: conn.execute("SELECT COUNT(*) FROM people_duplicates").fetchone()[0])
+
+    def get_duplicates(self, limit=100):
+        """Stored candidate pairs as (score, id, name, email, id, name, email)."""
+        return self._read(("duplicates", limit), lambda conn: dedupe.read_duplicates(conn, limit))
+
+    # ---------- Statistics ----------
+    def get_stats(self):
+        return self._read(("stats",), stats.read_summary)
+
+    def get_null_counts(self):
+        return self._read(("nulls",), stats.read_null_counts)
+
+    def get_age_histogram(self):
+        return self._read(("ages",), stats.read_age_histogram)
+
+    def get_email_domains(self, limit=10):
+        return self._read(("domains", limit), lambda conn: stats.read_email_domains(conn, limit))
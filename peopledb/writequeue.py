@@ -0,0 +1,124 @@
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .pool import is_busy, retry_busy
+
+# Gather writes for at most this long after the first one arrives...
+DEFAULT_WINDOW = 0.005
+# ...or until this many are waiting, then commit them together.
+DEFAULT_MAX_BATCH = 500
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Group-commits writes from many threads on one background writer.
+
+    submit(fn) queues fn(conn) and returns a Future that resolves to fn's
+    return value once the transaction containing it has committed. Each write
+    runs in its own savepoint, so one failing write only fails its own Future.
+    fn runs in a copy of the submitting thread's context, so per-request
+    context variables (such as the instrumentation run) still apply.
+    """
+
+    def __init__(self, pool, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH, on_commit=None):
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self.batches = 0
+        self.writes = 0
+        # time.monotonic() of the last commit, for idle-time maintenance.
+        self.last_commit = time.monotonic()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="peopledb-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn):
+        if self._closed:
+            raise RuntimeError("Write queue is closed")
+        future = Future()
+        context = contextvars.copy_context()
+        self._queue.put((lambda conn: context.run(fn, conn), future))
+        return future
+
+    def flush(self):
+        """Block until everything submitted so far is committed."""
+        self.submit(lambda conn: None).result()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    # ---------- Writer thread ----------
+    def _collect(self):
+        """Wait for one write, then gather more until the window closes."""
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _apply(self, batch):
+        outcomes = []
+        with self.pool.writer() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for fn, _ in batch:
+                    conn.execute("SAVEPOINT queued_write")
+                    try:
+                        outcomes.append((True, fn(conn)))
+                    except Exception as exc:
+                        if is_busy(exc):
+                            raise
+                        conn.execute("ROLLBACK TO queued_write")
+                        outcomes.append((False, exc))
+                    conn.execute("RELEASE queued_write")
+                conn.commit()
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+        return outcomes
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if not batch:
+                continue
+            batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outcomes = retry_busy(lambda: self._apply(batch))
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.writes += len(batch)
+            self.last_commit = time.monotonic()
+            if self.on_commit:
+                self.on_commit()
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
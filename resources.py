@@ -0,0 +1,76 @@
+"""Process-wide resources for the Streamlit app.
+
+Streamlit re-executes main.py on every interaction. Everything here is built
+on the first run in the server process and reused by every later rerun and
+session, so a rerun only pays for the widgets and queries of its own page.
+"""
+import os
+
+import streamlit as st
+
+from peopledb import DB_PATH, LiveSearch, PeopleStore, grid
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Set to 1 to serve the View page and filters from an in-memory snapshot (needs NumPy).
+SNAPSHOT_ENV = "PEOPLEDB_SNAPSHOT"
+
+# Directory for scheduled backups (see peopledb/backup.py); unset disables them.
+BACKUP_DIR_ENV = "PEOPLEDB_BACKUP_DIR"
+
+# Pause in typing, in the browser, before the live search box reports a term.
+LIVE_SEARCH_DEBOUNCE_MS = 250
+
+
+@st.cache_resource
+def get_store():
+    # One connection pool per server process, shared by every session and
+    # rerun; the schema is only checked when the pool is first created.
+    return PeopleStore(
+        DB_PATH,
+        snapshot=os.environ.get(SNAPSHOT_ENV) == "1",
+        backup_dir=os.environ.get(BACKUP_DIR_ENV) or None,
+    )
+
+
+@st.cache_resource
+def page_style():
+    """The app's CSS as a <style> block, read from disk once."""
+    with open(os.path.join(ASSETS_DIR, "style.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+
+def dataframe(data, columns=None):
+    # pandas takes longer to import than the rest of the app together, so
+    # only pages that actually show a table or chart pay for it.
+    import pandas as pd
+
+    return pd.DataFrame(data, columns=columns)
+
+
+def people_table(rows):
+    """(id, name, age, email) rows for st.dataframe: an Arrow table when
+    pyarrow is installed, which Streamlit sends as is, else a DataFrame."""
+    if grid.arrow_available():
+        return grid.to_table(rows)
+    return dataframe(rows, columns=grid.GRID_COLUMNS)
+
+
+@st.cache_resource
+def _live_search_component():
+    # Declared once per process; the component is a static page in assets/.
+    import streamlit.components.v1 as components
+
+    return components.declare_component("live_search", path=os.path.join(ASSETS_DIR, "live_search"))
+
+
+def live_search_box(placeholder, key, debounce_ms=LIVE_SEARCH_DEBOUNCE_MS):
+    """A text box that returns its term once the user pauses typing ("" until then)."""
+    return _live_search_component()(placeholder=placeholder, debounce_ms=debounce_ms, key=key, default="")
+
+
+def live_search(limit):
+    """This session's LiveSearch, so a new term only cancels the same user's query."""
+    if "live_search" not in st.session_state:
+        st.session_state.live_search = LiveSearch(get_store(), limit)
+    return st.session_state.live_search
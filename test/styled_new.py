@@ -1,20 +1,20 @@
 
 import streamlit as st
 import sqlite3
+import os
+import sys
+
+# Share the storage profile (WAL, pragmas) and schema of the main app.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from peopledb import schema
+from peopledb.profiles import load_profile
 
 # ---------- Database setup ----------
 conn = sqlite3.connect('people.db', check_same_thread=False)
+load_profile().apply(conn)
 c = conn.cursor()
 
-c.execute('''
-    CREATE TABLE IF NOT EXISTS people (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        age INTEGER,
-        email TEXT
-    )
-''')
-conn.commit()
+schema.ensure_schema(conn)
 
 # ---------- Database functions ----------
 def add_person(name, age, email):
@@ -0,0 +1,62 @@
+"""AsyncPeopleStore: concurrent writes, errors and streaming from asyncio."""
+import asyncio
+
+import pytest
+
+from peopledb import DuplicateEmailError
+from peopledb.aio import AsyncPeopleStore
+
+
+def run(path, scenario):
+    async def main():
+        async with AsyncPeopleStore(path, cache_bytes=0, instrument=False) as people:
+            await asyncio.get_running_loop().run_in_executor(None, people.store.migrator.wait)
+            return await scenario(people)
+    return asyncio.run(main())
+
+
+def test_concurrent_writes_and_reads(tmp_path):
+    async def scenario(people):
+        ids = await asyncio.gather(*(people.add_person(f"p{i}", 20 + i, f"p{i}@mail.io") for i in range(30)))
+        assert sorted(ids) == list(range(1, 31))
+        assert await people.update_person(ids[0], "renamed", 99, "renamed@mail.io") == 1
+        assert await people.delete_person(ids[1]) == 1
+        assert await people.get_person(ids[0]) == (ids[0], "renamed", 99, "renamed@mail.io")
+        assert (await people.get_stats())[0] == 29
+        assert [row[0] for row in await people.find_people("renamed")] == [ids[0]]
+
+    run(str(tmp_path / "people.db"), scenario)
+
+
+def test_write_errors_reach_the_caller(tmp_path):
+    async def scenario(people):
+        await people.add_person("Ada", 36, "ada@mail.io")
+        with pytest.raises(DuplicateEmailError):
+            await people.add_person("Ada", 36, "ADA@mail.io")
+        # The queue keeps serving after a failed write.
+        assert await people.add_person("Bob", 41, "bob@mail.io") == 2
+
+    run(str(tmp_path / "people.db"), scenario)
+
+
+def test_streams_cross_batch_boundaries(tmp_path):
+    async def scenario(people):
+        for i in range(10):
+            await people.add_person(f"p{i}", None if i % 3 == 0 else i, f"p{i}@mail.io")
+        streamed = [row async for row in people.iter_people(sort="age", descending=True, batch_size=3)]
+        pages, after = [], None
+        while True:
+            rows, after = await people.get_people_page("age", True, after, page_size=100)
+            pages += rows
+            if after is None:
+                break
+        assert streamed == pages
+        assert len(streamed) == 10
+
+        batches = [batch async for batch in people.iter_changes(batch_size=4)]
+        assert [len(batch) for batch in batches] == [4, 4, 2]
+        assert [entry[0] for batch in batches for entry in batch] == sorted(
+            entry[0] for batch in batches for entry in batch
+        )
+
+    run(str(tmp_path / "people.db"), scenario)
@@ -0,0 +1,48 @@
+"""Databases sharing a backup directory keep their snapshots apart."""
+import sqlite3
+
+import pytest
+
+from peopledb import backup
+
+
+def make_db(path, rows):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO people (name) VALUES (?)", [(f"p{i}",) for i in range(rows)])
+    conn.close()
+
+
+def count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_shared_directory(tmp_path):
+    directory = str(tmp_path / "backups")
+    a, b = str(tmp_path / "a.db"), str(tmp_path / "b.db")
+    make_db(a, 10)
+    make_db(b, 20)
+    for _ in range(3):
+        backup.backup(a, directory, keep=2, pause=0)
+    backup.backup(b, directory, keep=2, pause=0)
+    backup.backup(a, directory, keep=2, pause=0)
+
+    store = backup.BackupStore(directory)
+    assert len(store.snapshots(a)) == 2
+    assert len(store.snapshots(b)) == 1
+    assert store.sources() == sorted([a, b])
+    assert all(store.verify(snapshot) == [] for snapshot in store.snapshots())
+
+    # The newest snapshot overall is a's; b still restores its own.
+    make_db(str(tmp_path / "c.db"), 0)
+    backup.restore(directory, b)
+    assert count(b) == 20
+    backup.restore(directory, str(tmp_path / "c.db"), source=b)
+    assert count(str(tmp_path / "c.db")) == 20
+    with pytest.raises(backup.BackupError):
+        backup.restore(directory, str(tmp_path / "c.db"))
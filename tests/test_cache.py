@@ -0,0 +1,55 @@
+"""Cached reads are dropped by any commit, including another connection's."""
+import sqlite3
+
+import pytest
+
+from peopledb import PeopleStore
+from peopledb.cache import QueryCache
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PeopleStore(str(tmp_path / "people.db"), instrument=False)
+    store.migrator.wait()
+    yield store
+    store.close()
+
+
+def test_commit_from_another_connection_invalidates(store):
+    store.add_person("Ada", 36, "ada@mail.io")
+    assert len(store.get_all_people()) == 1
+    assert len(store.get_all_people()) == 1
+    hits = store.cache.hits
+
+    # Another process: only PRAGMA data_version can tell the store.
+    other = sqlite3.connect(store.path)
+    with other:
+        other.execute("INSERT INTO people (name, age, email) VALUES ('Bob', 41, 'bob@mail.io')")
+    other.close()
+    assert [row[1] for row in store.get_all_people()] == ["Ada", "Bob"]
+    assert store.cache.hits == hits
+
+
+def test_own_writes_invalidate(store):
+    assert store.get_stats() == (0, 0)
+    store.add_person("Ada", 36, "ada@mail.io")
+    assert store.get_stats() == (1, 36)
+    store.delete_person(1)
+    assert store.get_stats() == (0, 0)
+
+
+def test_result_of_a_read_racing_a_write_is_not_kept():
+    version = [0]
+    cache = QueryCache(lambda: version[0])
+
+    def compute():
+        # A commit lands while the read runs.
+        version[0] += 1
+        return "stale"
+
+    assert cache.get("key", compute) == "stale"
+    assert len(cache) == 0
+    assert cache.get("key", lambda: "fresh") == "fresh"
+    assert cache.get("key", lambda: "unused") == "fresh"
+    cache.bump()
+    assert cache.get("key", lambda: "after bump") == "after bump"
@@ -0,0 +1,97 @@
+"""Each on_duplicate policy, for single inserts and for imports alike."""
+import io
+
+import pytest
+
+from peopledb import DuplicateEmailError, PeopleStore, migrations, schema
+from peopledb.pool import ConnectionPool
+
+EXISTING = [("Ada", None, "ada@mail.io"), ("Bob", 41, "bob@mail.io"), ("Cy", 50, None)]
+
+# Colliding with existing rows (whatever the case and surrounding spaces) and
+# with each other; rows without an email never collide.
+INCOMING = [
+    ("Ada Lovelace", 36, " ADA@mail.io "),
+    ("Robert", 42, "Bob@Mail.io"),
+    ("Dee", 29, "dee@mail.io"),
+    ("Deirdre", None, "dee@mail.io"),
+    ("Cy Two", 51, None),
+    ("Eve", 22, ""),
+]
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    stores = []
+
+    def make(name="people.db"):
+        store = PeopleStore(str(tmp_path / name), cache_bytes=0, instrument=False)
+        store.migrator.wait()
+        for person in EXISTING:
+            store.add_person(*person)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def people(store):
+    return [row[1:] for row in store.get_all_people()]
+
+
+EXPECTED = {
+    "skip": EXISTING + [("Dee", 29, "dee@mail.io"), ("Cy Two", 51, None), ("Eve", 22, "")],
+    "update": [("Ada Lovelace", 36, " ADA@mail.io "), ("Robert", 42, "Bob@Mail.io"), ("Cy", 50, None),
+               ("Deirdre", None, "dee@mail.io"), ("Cy Two", 51, None), ("Eve", 22, "")],
+    "merge": [("Ada", 36, "ada@mail.io"), ("Bob", 41, "bob@mail.io"), ("Cy", 50, None),
+              ("Dee", 29, "dee@mail.io"), ("Cy Two", 51, None), ("Eve", 22, "")],
+}
+
+
+@pytest.mark.parametrize("policy", EXPECTED)
+def test_insert_policies(make_store, policy):
+    store = make_store()
+    ids = [store.add_person(*person, on_duplicate=policy) for person in INCOMING]
+    assert ids[:2] == [1, 2] and ids[2] == ids[3]
+    assert len(set(ids)) == 5
+    assert people(store) == EXPECTED[policy]
+
+
+@pytest.mark.parametrize("policy", EXPECTED)
+def test_import_matches_inserts(make_store, policy):
+    # The importer trims emails and rejects rows without one.
+    incoming = [(name, age, email.strip()) for name, age, email in INCOMING if email]
+    inserted, imported = make_store("inserted.db"), make_store("imported.db")
+    for person in incoming:
+        inserted.add_person(*person, on_duplicate=policy)
+    lines = ["name,age,email"] + [f"{name},{'' if age is None else age},{email}" for name, age, email in incoming]
+    report = imported.import_people(io.BytesIO("\n".join(lines).encode()), on_duplicate=policy)
+    assert (report.read, report.imported + report.duplicates) == (4, 4)
+    assert people(imported) == people(inserted)
+
+
+def test_error_policy(make_store):
+    store = make_store()
+    with pytest.raises(DuplicateEmailError):
+        store.add_person("Ada again", 1, "Ada@Mail.IO")
+    with pytest.raises(DuplicateEmailError):
+        store.update_person(2, "Bob", 41, "ada@mail.io ")
+    assert people(store) == EXISTING
+
+
+def test_migration_merges_existing_duplicates(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "people.db"))
+    try:
+        with pool.writer() as conn:
+            schema.ensure_schema(conn)
+        pool.write(lambda conn: conn.executemany(
+            "INSERT INTO people (name, age, email) VALUES (?, ?, ?)",
+            [("Ada", 36, "ada@mail.io"), ("Ada L", 37, "ADA@mail.io"), ("Bob", 41, None), ("Bob", 41, None)],
+        ))
+        assert migrations.Migrator(pool, pause=0).run()
+        assert pool.read(lambda conn: conn.execute("SELECT id FROM people ORDER BY id").fetchall()) == [(1,), (3,), (4,)]
+        assert pool.read(lambda conn: conn.execute("SELECT id, kept_id FROM people_merged").fetchall()) == [(2, 1)]
+    finally:
+        pool.close()
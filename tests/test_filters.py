@@ -0,0 +1,50 @@
+"""PeopleFilter predicates, sorts and limits against a small known table."""
+import pytest
+
+from peopledb import PeopleFilter, PeopleStore
+
+PEOPLE = [
+    ("Ann", 25, "a@ÉCOLE.fr"),
+    ("bob", 35, "b@école.fr"),
+    ("Cleo", 45, "c@Example.COM"),
+    ("dave", None, "d@example.com"),
+    ("Éva", 18, "e@examples.org"),
+    ("anna", 60, None),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PeopleStore(str(tmp_path / "people.db"), cache_bytes=0, instrument=False)
+    for person in PEOPLE:
+        store.add_person(*person)
+    yield store
+    store.close()
+
+
+def names(rows):
+    return [row[1] for row in rows]
+
+
+@pytest.mark.parametrize("people_filter, expected", [
+    (PeopleFilter(email_domain="ÉCOLE.fr"), ["Ann"]),
+    (PeopleFilter(email_domain="école.FR"), ["bob"]),
+    (PeopleFilter(email_domain="@example.com"), ["Cleo", "dave"]),
+    (PeopleFilter(email_domain="EXAMPLE", domain_prefix=True), ["Cleo", "dave", "Éva"]),
+    (PeopleFilter(min_age=25, max_age=45), ["Ann", "bob", "Cleo"]),
+    (PeopleFilter(min_age=40), ["Cleo", "anna"]),
+    (PeopleFilter(name_prefix="AN"), ["Ann", "anna"]),
+    (PeopleFilter(name_prefix="é"), []),
+    (PeopleFilter(name_prefix="a", min_age=30), ["anna"]),
+])
+def test_predicates(store, people_filter, expected):
+    assert names(store.filter_people(people_filter)) == expected
+
+
+def test_sort_and_limit(store):
+    assert names(store.filter_people(PeopleFilter(sort="name"))) == ["Ann", "anna", "bob", "Cleo", "dave", "Éva"]
+    assert names(store.filter_people(PeopleFilter(sort="age", descending=True, limit=3))) == ["anna", "Cleo", "bob"]
+    with pytest.raises(ValueError):
+        store.filter_people(PeopleFilter(sort="salary"))
+    with pytest.raises(ValueError):
+        store.filter_people(PeopleFilter(min_age=50, max_age=20))
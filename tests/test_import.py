@@ -0,0 +1,82 @@
+"""A bulk load with deferred indexes leaves FTS to a catch-up that search covers for."""
+import io
+
+import pytest
+
+from peopledb import PeopleStore, importer, schema, search
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PeopleStore(str(tmp_path / "people.db"), cache_bytes=0, instrument=False)
+    store.migrator.wait()
+    if not store.fts_enabled:
+        pytest.skip("SQLite has no FTS5 trigram tokenizer")
+    yield store
+    store.close()
+
+
+def csv_file(rows):
+    lines = ["name,age,email"] + [f"{name},{age},{email}" for name, age, email in rows]
+    return io.BytesIO("\n".join(lines).encode())
+
+
+def fts_integrity(conn):
+    conn.execute("INSERT INTO people_fts (people_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_deferred_fts(store):
+    store.add_person("Anna Before", 30, "anna.before@mail.io")
+    rows = [(f"Anna Bulk{i}", i % 90, f"anna.bulk{i}@mail.io") for i in range(250)]
+    with store.pool.writer() as conn:
+        for chunk in ([rows[:100]], [rows[100:]]):
+            report = importer.import_chunks(conn, ((2, part) for part in chunk), defer_indexes=True)
+            assert report.imported == len(chunk[0])
+        assert schema.fts_pending(conn) == (1, 251)
+        assert len(search.search(conn, "anna", limit=500)) == 251
+        # Rows the index has not seen yet can still change.
+        conn.execute("UPDATE people SET name = 'Zed Renamed' WHERE id = 5")
+        conn.execute("DELETE FROM people WHERE id = 6")
+        conn.execute("UPDATE people SET email = 'kept@mail.io' WHERE id = 1")
+        conn.commit()
+
+    assert store.catch_up_fts() == 250
+    with store.pool.writer() as conn:
+        assert schema.fts_pending(conn) is None
+        fts_integrity(conn)
+        assert len(search.search_fts(conn, "anna", limit=500)) == 250
+        assert [row[0] for row in search.search_fts(conn, "renamed")] == [5]
+        assert search.search_fts(conn, "anna.before") == []
+
+
+def test_store_catches_up_after_import(store):
+    rows = [(f"Bo {i}", 40, f"bo{i}@mail.io") for i in range(100)]
+    report = store.import_people(csv_file(rows), defer_indexes=True)
+    assert report.imported == 100
+    assert len(store.search_people("bo", limit=500)) == 100
+    store._fts_thread.join()
+    with store.pool.writer() as conn:
+        assert schema.fts_pending(conn) is None
+        fts_integrity(conn)
+        assert len(search.search_fts(conn, "mail.io", limit=500)) == 100
+
+
+def test_writes_go_through_during_import(store):
+    rows = [(f"Cy {i}", 40, f"cy{i}@mail.io") for i in range(50)]
+    added = []
+
+    def progress(report):
+        # The writer is free between batches, so a queued write commits mid-load.
+        if not added:
+            added.append(store.add_person("Cy Queued", 41, "cy.queued@mail.io", wait=False).result(timeout=5))
+
+    report = store.import_people(csv_file(rows), chunk_size=10, commit_rows=10, defer_indexes=True,
+                                 progress=progress)
+    assert report.imported == 50
+    assert 1 < added[0] < 51
+    store._fts_thread.join()
+    with store.pool.writer() as conn:
+        assert schema.fts_pending(conn) is None
+        fts_integrity(conn)
+        assert len(search.search_fts(conn, "mail.io", limit=500)) == 51
+        assert [row[0] for row in search.search_fts(conn, "cy.queued")] == added
@@ -0,0 +1,68 @@
+"""Instrumented cursors report each statement once, and never query from __del__."""
+import gc
+import sqlite3
+
+import pytest
+
+from peopledb.instrument import InstrumentedConnection, QueryMetrics
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+    # slow_ms=0 sends every statement to the slow log.
+    conn.metrics = QueryMetrics(slow_ms=0)
+    conn.execute("CREATE TABLE numbers (value INTEGER)")
+    conn.executemany("INSERT INTO numbers VALUES (?)", [(i,) for i in range(10)])
+    conn.metrics.reset()
+    yield conn
+    conn.close()
+
+
+def recorded(conn, sql):
+    return {row["query"]: row for row in conn.metrics.summary()}.get(sql)
+
+
+def test_iteration_reports_once_exhausted(conn):
+    sql = "SELECT value FROM numbers"
+    cursor = conn.execute(sql)
+    rows = 0
+    for _ in cursor:
+        rows += 1
+        assert recorded(conn, sql) is None
+    assert rows == 10
+    assert recorded(conn, sql)["calls"] == 1
+    assert recorded(conn, sql)["rows"] == 10
+
+
+def test_fetchmany_reports_on_short_batch(conn):
+    sql = "SELECT value FROM numbers"
+    cursor = conn.execute(sql)
+    assert len(cursor.fetchmany(5)) == 5
+    assert len(cursor.fetchmany(5)) == 5
+    assert recorded(conn, sql) is None
+    assert cursor.fetchmany(5) == []
+    assert recorded(conn, sql)["rows"] == 10
+
+
+def test_abandoned_cursor_is_recorded_without_querying(conn):
+    sql = "SELECT value FROM numbers WHERE value > ?"
+    statements = []
+    conn.set_trace_callback(statements.append)
+    cursor = conn.execute(sql, (3,))
+    assert cursor.fetchone() == (4,)
+    del cursor
+    gc.collect()
+    assert not any(statement.startswith("EXPLAIN") for statement in statements)
+    conn.set_trace_callback(None)
+
+    assert recorded(conn, sql)["rows"] == 1
+    [entry] = [entry for entry in conn.metrics.slow_log if entry["query"] == sql]
+    assert entry["plan"] is None
+
+
+def test_finished_statement_gets_a_plan(conn):
+    sql = "SELECT value FROM numbers WHERE value > ?"
+    assert len(conn.execute(sql, (3,)).fetchall()) == 6
+    [entry] = [entry for entry in conn.metrics.slow_log if entry["query"] == sql]
+    assert "SCAN numbers" in entry["plan"]
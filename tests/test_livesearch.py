@@ -0,0 +1,46 @@
+"""Narrowed live-search results must equal a fresh search."""
+import pytest
+
+from peopledb import LiveSearch, PeopleStore
+
+PEOPLE = [
+    ("Émile Zola", 62, "emile@zola.fr"),
+    ("émilie Roux", 30, "e.roux@mail.io"),
+    ("Emil Nolde", 88, "EMIL@nolde.de"),
+    ("Anna Ärger", 41, "anna@ärger.de"),
+    ("Anne Bell", 29, "anne@bell.io"),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PeopleStore(str(tmp_path / "people.db"), cache_bytes=0, instrument=False)
+    store.migrator.wait()
+    for person in PEOPLE:
+        store.add_person(*person)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("terms", [
+    ["ém", "émi"],
+    ["Ém", "Émil"],
+    ["em", "emi", "emil"],
+    ["an", "ann", "anna", "anna ä"],
+    ["Ä", "Är"],
+    ["ÄR", "ärg"],
+])
+def test_narrowing_matches_fresh_search(store, terms):
+    live = LiveSearch(store)
+    for term in terms:
+        assert sorted(live.search(term)) == sorted(store.search_people(term)), term
+
+
+def test_narrows_within_one_path(store):
+    live = LiveSearch(store)
+    live.search("emi")
+    live.search("emil")
+    assert (live.queries, live.narrowed) == (1, 1)
+    live.search("em")
+    live.search("emi")
+    assert (live.queries, live.narrowed) == (3, 1)
@@ -0,0 +1,112 @@
+"""Migrations run in batches, resume after a crash and upgrade old databases."""
+import pytest
+
+from peopledb import migrations, schema, search, stats
+from peopledb.migrations import Backfill, Migration, Migrator, Statements
+from peopledb.pool import ConnectionPool
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "people.db"))
+    with pool.writer() as conn:
+        schema.ensure_schema(conn)
+    yield pool
+    pool.close()
+
+
+def add_people(pool, rows):
+    pool.write(lambda conn: conn.executemany("INSERT INTO people (name, age, email) VALUES (?, ?, ?)", rows))
+
+
+def user_version(pool):
+    return pool.read(migrations.schema_version)
+
+
+FLAG = [Migration(1, "flag", [
+    Statements("ALTER TABLE people ADD COLUMN flag INTEGER"),
+    Backfill("people", "flag = age * 2", where="age IS NOT NULL", batch_rows=10),
+])]
+
+
+def test_backfill_resumes_after_interrupt(pool):
+    add_people(pool, [(f"p{i}", None if i % 7 == 0 else i, f"p{i}@mail.io") for i in range(1, 36)])
+    commits = []
+
+    def crash_after_three():
+        commits.append(1)
+        if len(commits) == 3:
+            raise Crash
+
+    # Commits: the ALTER, then ids 1-10 and 11-20 of the backfill.
+    with pytest.raises(Crash):
+        Migrator(pool, FLAG, on_commit=crash_after_three, pause=0).run()
+    assert user_version(pool) == 0
+    assert pool.read(lambda conn: conn.execute(
+        "SELECT last_id, rows, done FROM schema_migrations WHERE version = 1 AND step = 1"
+    ).fetchone()) == (20, 18, 0)
+    flagged = pool.read(lambda conn: conn.execute("SELECT MAX(id) FROM people WHERE flag IS NOT NULL").fetchone())
+    assert flagged == (20,)
+
+    commits.clear()
+    migrator = Migrator(pool, FLAG, on_commit=lambda: commits.append(1), pause=0)
+    assert migrator.run()
+    # Ids 21-30, 31-35, then the transaction that finds nothing left.
+    assert len(commits) == 3
+    assert migrator.progress[(1, 1)]["rows"] == 30
+    assert user_version(pool) == 1
+    rows = pool.read(lambda conn: conn.execute("SELECT age, flag FROM people").fetchall())
+    assert all(flag == (age * 2 if age is not None else None) for age, flag in rows)
+
+
+def test_stopped_migration_restarts(pool):
+    add_people(pool, [(f"p{i}", i, None) for i in range(25)])
+    migrator = Migrator(pool, FLAG, on_commit=lambda: migrator.stop(), pause=0)
+    assert not migrator.run()
+    assert user_version(pool) == 0
+    assert Migrator(pool, FLAG, pause=0).run()
+    assert pool.read(lambda conn: conn.execute("SELECT COUNT(*) FROM people WHERE flag IS NULL").fetchone()) == (0,)
+
+
+def test_existing_database_is_upgraded(pool):
+    rows = [(f"Dora {i}", i % 80 if i % 5 else None, f"dora{i}@{'mail.io' if i % 3 else 'post.org'}")
+            for i in range(1, 301)]
+    add_people(pool, rows)
+    # Only the baseline exists; the dashboard counts from `people` meanwhile.
+    assert not pool.read(lambda conn: schema.index_exists(conn, "people_age_idx"))
+    assert not pool.read(stats.has_tables)
+    before = pool.read(lambda conn: (stats.read_totals(conn), stats.read_age_counts(conn),
+                                     stats.read_email_domains(conn)))
+
+    assert Migrator(pool, pause=0).run()
+    assert user_version(pool) == migrations.MIGRATIONS[-1].version
+    assert all(pool.read(lambda conn: [schema.index_exists(conn, name) for name in schema.SECONDARY_INDEXES]))
+    assert pool.read(stats.has_tables)
+    assert pool.read(lambda conn: (stats.read_totals(conn), stats.read_age_counts(conn),
+                                   stats.read_email_domains(conn))) == before
+
+    with pool.writer() as conn:
+        if not schema.table_exists(conn, "people_fts"):
+            pytest.skip("SQLite has no FTS5 trigram tokenizer")
+        assert schema.fts_pending(conn) is None
+        conn.execute("INSERT INTO people_fts (people_fts, rank) VALUES ('integrity-check', 1)")
+        assert len(search.search_fts(conn, "post.org", limit=500)) == 100
+
+
+def test_fts_index_is_pending_until_caught_up(pool):
+    add_people(pool, [(f"Eli {i}", 30, f"eli{i}@mail.io") for i in range(40)])
+    with pool.writer() as conn, conn:
+        if not schema.create_fts_index(conn):
+            pytest.skip("SQLite has no FTS5 trigram tokenizer")
+    with pool.reader() as conn:
+        assert schema.fts_pending(conn) == (0, 40)
+        assert search.search_fts(conn, "eli") == []
+        assert len(search.search(conn, "eli", limit=100)) == 40
+    assert pool.write(lambda conn: migrations.CatchUpFts().apply(conn, 0)) == (40, 40)
+    with pool.reader() as conn:
+        assert schema.fts_pending(conn) is None
+        assert len(search.search_fts(conn, "eli", limit=100)) == 40
@@ -0,0 +1,69 @@
+"""Walking keyset pages returns every row once, in order, across ties and NULLs."""
+import math
+import random
+import sqlite3
+
+import pytest
+
+from peopledb import paging, schema
+
+
+def make_people(count=37, seed=5):
+    rnd = random.Random(seed)
+    # Few distinct values, so ties straddle page boundaries.
+    return [
+        (rnd.choice(["Ann", "Bob", "Cy"]), rnd.choice([None, 20, 30, 40]), rnd.choice([None, "a@x.io", "b@x.io"]))
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = sqlite3.connect(":memory:")
+    schema.ensure_schema(conn)
+    with conn:
+        conn.executemany("INSERT INTO people (name, age, email) VALUES (?, ?, ?)", make_people())
+    yield conn
+    conn.close()
+
+
+def expected_order(rows, sort, descending):
+    column = paging.SORT_COLUMNS.index(sort)
+    nulls = sorted((row for row in rows if row[column] is None), key=lambda row: row[0], reverse=descending)
+    values = sorted((row for row in rows if row[column] is not None),
+                    key=lambda row: (row[column], row[0]), reverse=descending)
+    # SQLite sorts NULLs first ascending and last descending.
+    return values + nulls if descending else nulls + values
+
+
+def walk(conn, sort, descending, page_size):
+    pages, after = [], None
+    while True:
+        rows, after = paging.fetch_page(conn, sort, descending, after, page_size)
+        pages.append(rows)
+        if after is None:
+            return pages
+
+
+@pytest.mark.parametrize("sort", paging.SORT_COLUMNS)
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("page_size", [1, 4, 37, 50])
+def test_walk_covers_every_row_in_order(conn, sort, descending, page_size):
+    everyone = conn.execute("SELECT id, name, age, email FROM people").fetchall()
+    pages = walk(conn, sort, descending, page_size)
+    assert [row for page in pages for row in page] == expected_order(everyone, sort, descending)
+    # A full last page is not followed by an empty one.
+    assert len(pages) == math.ceil(len(everyone) / page_size)
+    assert all(pages)
+
+
+def test_empty_table():
+    conn = sqlite3.connect(":memory:")
+    schema.ensure_schema(conn)
+    assert paging.fetch_page(conn, "age", True) == ([], None)
+    conn.close()
+
+
+def test_unknown_sort(conn):
+    with pytest.raises(ValueError):
+        paging.fetch_page(conn, "rowid")
@@ -0,0 +1,60 @@
+"""Archiving moves each person exactly once, even when a write is retried."""
+import sqlite3
+
+import pytest
+
+from peopledb import PeopleStore, retention, schema
+from peopledb.pool import retry_busy
+
+
+@pytest.fixture
+def conns(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "people.db"))
+    schema.ensure_schema(conn)
+    with conn:
+        conn.executemany("INSERT INTO people (name, age, email) VALUES (?, ?, ?)",
+                         [(f"p{i}", i, f"p{i}@mail.io") for i in range(10)])
+    archive = retention.open_archive(str(tmp_path / "people.archive.db"))
+    yield conn, archive
+    archive.close()
+    conn.close()
+
+
+def archived_ids(archive):
+    return [row[0] for _, _, rows in retention.iter_archived(archive) for row in rows]
+
+
+def test_retried_batch_is_archived_once(conns):
+    conn, archive = conns
+    policy = retention.RetentionPolicy(before_id=100)
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def attempt():
+        with conn:
+            moved = retention.archive_batch(conn, archive, policy, batch_rows=4)
+            if failures:
+                # The archive block has committed; the delete has not.
+                raise failures.pop()
+        return moved
+
+    assert retry_busy(attempt, backoff=0) == 4
+    assert archived_ids(archive) == [1, 2, 3, 4]
+    assert retry_busy(attempt, backoff=0) == 4
+    assert archived_ids(archive) == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert conn.execute("SELECT id FROM people").fetchall() == [(9,), (10,)]
+
+
+def test_store_archives_in_batches(tmp_path):
+    store = PeopleStore(str(tmp_path / "people.db"), cache_bytes=0, instrument=False,
+                        retention_policy=retention.RetentionPolicy(before_id=6))
+    try:
+        for i in range(8):
+            store.add_person(f"p{i}", i, f"p{i}@mail.io")
+        report = store.archive_people(batch_rows=2)
+        assert (report.rows, report.batches) == (5, 3)
+        assert [row[0] for row in store.get_all_people()] == [6, 7, 8]
+        archive = retention.open_archive(store.archive_path)
+        assert archived_ids(archive) == [1, 2, 3, 4, 5]
+        archive.close()
+    finally:
+        store.close()
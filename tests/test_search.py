@@ -0,0 +1,48 @@
+"""LIKE search matches the term literally, wildcards and escapes included."""
+import sqlite3
+
+import pytest
+
+from peopledb import schema, search
+
+PEOPLE = [
+    ("Full 100%", 30, "full@mail.io"),
+    ("Ten 10x", 31, "ten@mail.io"),
+    ("snake_case", 32, "snake_case@mail.io"),
+    ("snakeXcase", 33, "snakexcase@mail.io"),
+    ("back\\slash", 34, "back@mail.io"),
+    ("backslash", 35, "backslash@mail.io"),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    schema.ensure_schema(conn)
+    with conn:
+        conn.executemany("INSERT INTO people (name, age, email) VALUES (?, ?, ?)", PEOPLE)
+    yield conn
+    conn.close()
+
+
+def names(rows):
+    return sorted(row[1] for row in rows)
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("0%", ["Full 100%"]),
+    ("%", ["Full 100%"]),
+    ("e_c", ["snake_case"]),
+    ("_", ["snake_case"]),
+    ("k\\s", ["back\\slash"]),
+    ("\\", ["back\\slash"]),
+    ("SNAKE", ["snakeXcase", "snake_case"]),
+])
+def test_like_is_literal(conn, term, expected):
+    assert names(search.search_like(conn, term)) == expected
+    assert names(search.search(conn, term, fts_enabled=False)) == expected
+
+
+def test_like_over_id_range(conn):
+    assert names(search.search_like(conn, "_", id_range=(0, 2))) == []
+    assert names(search.search_like(conn, "_", id_range=(2, 3))) == ["snake_case"]
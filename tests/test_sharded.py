@@ -0,0 +1,82 @@
+"""A sharded store must return what one database with the same rows returns."""
+import random
+
+import pytest
+
+from peopledb import LiveSearch, PeopleFilter, PeopleStore, ShardedPeopleStore, paging
+
+NAMES = ["alice", "Alice", "ÉMILE", "émile", "Zoë", "zoe", "bob", "Bob", "Éva", "eva"]
+DOMAINS = ["example.com", "Example.COM", "école.fr", "ÉCOLE.fr", "mail.io"]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    single = PeopleStore(str(tmp_path / "single.db"), cache_bytes=0, instrument=False)
+    sharded = ShardedPeopleStore(str(tmp_path / "people.db"), shards=3, cache_bytes=0, instrument=False)
+    # Both answer searches through the same path once every migration has run.
+    for store in (single, *sharded.shards):
+        store.migrator.wait()
+    rnd = random.Random(3)
+    ids = {}
+    for i in range(120):
+        name = f"{rnd.choice(NAMES)} {rnd.choice(NAMES)}"
+        age = None if rnd.random() < 0.15 else rnd.randint(0, 100)
+        email = None if rnd.random() < 0.1 else f"p{i}@{rnd.choice(DOMAINS)}"
+        ids[sharded.add_person(name, age, email)] = (name, age, email)
+    # The single database gets the same rows under the same (global) ids.
+    single.pool.write(lambda conn: conn.executemany(
+        "INSERT INTO people (id, name, age, email) VALUES (?, ?, ?, ?)",
+        [(person_id, *row) for person_id, row in ids.items()],
+    ))
+    single.cache.bump()
+    yield single, sharded
+    single.close()
+    sharded.close()
+
+
+@pytest.mark.parametrize("sort", paging.SORT_COLUMNS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_filters_match_one_database(stores, sort, descending):
+    single, sharded = stores
+    for f in (
+        PeopleFilter(sort=sort, descending=descending, limit=500),
+        PeopleFilter(name_prefix="é", sort=sort, descending=descending, limit=500),
+        PeopleFilter(email_domain="école.fr", sort=sort, descending=descending, limit=40),
+        PeopleFilter(min_age=30, sort=sort, descending=descending, limit=25),
+    ):
+        assert sharded.filter_people(f) == single.filter_people(f)
+
+
+def all_pages(store, sort):
+    rows, after = [], None
+    while True:
+        page, after = store.get_people_page(sort=sort, after=after, page_size=23)
+        rows.extend(page)
+        if after is None:
+            return rows
+
+
+@pytest.mark.parametrize("sort", paging.SORT_COLUMNS)
+def test_pages_match_one_database(stores, sort):
+    single, sharded = stores
+    assert all_pages(sharded, sort) == all_pages(single, sort)
+
+
+@pytest.mark.parametrize("query", ["7", "²", "٣", "ali", "ÉMILE z", "p11"])
+def test_find_people(stores, query):
+    single, sharded = stores
+    expected = single.find_people(query)
+    found = sharded.find_people(query)
+    assert sorted(found) == sorted(expected)
+    if query == "7":
+        assert found[0] == single.get_person(7)
+
+
+def test_live_search_sees_writes(stores):
+    for store in stores:
+        live = LiveSearch(store)
+        live.search("ali")
+        version = store.version()
+        person_id = store.add_person("Alina Newrow", 30, "alina.newrow@mail.io")
+        assert store.version() != version
+        assert store.get_person(person_id) in live.search("alin")
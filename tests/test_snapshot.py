@@ -0,0 +1,87 @@
+"""The in-memory snapshot must answer pages and filters exactly like SQLite."""
+import itertools
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from peopledb import PeopleFilter, PeopleStore, filters, paging  # noqa: E402
+
+NAMES = ["alice", "Alice", "ÉMILE", "émile", "Zoë", "zoe", "Ünal", "bob", "Bob", "ß", "Ω", "", "Éva", "eva"]
+DOMAINS = ["example.com", "Example.COM", "école.fr", "ÉCOLE.fr", "mail.io"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PeopleStore(str(tmp_path / "people.db"), snapshot=True, cache_bytes=0, instrument=False)
+    rnd = random.Random(7)
+    rows = []
+    for i in range(400):
+        name = f"{rnd.choice(NAMES)}{rnd.choice(['', ' Smith', ' smith', ' Øre'])}"
+        age = None if rnd.random() < 0.15 else rnd.randint(0, 100)
+        email = None if rnd.random() < 0.1 else f"{rnd.choice(NAMES) or 'x'}{i}@{rnd.choice(DOMAINS)}"
+        rows.append((name, age, email))
+    store.pool.write(lambda conn: conn.executemany("INSERT INTO people (name, age, email) VALUES (?, ?, ?)", rows))
+    store.cache.bump()
+    store.migrator.wait()
+    store.snapshot.load()
+    yield store
+    store.close()
+
+
+def sql(store, fn):
+    return store.pool.read(fn)
+
+
+def all_pages(fetch, sort, descending, page_size):
+    rows, after = [], None
+    while True:
+        page, after = fetch(sort, descending, after, page_size)
+        rows.extend(page)
+        if after is None:
+            return rows
+
+
+@pytest.mark.parametrize("sort", paging.SORT_COLUMNS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages_match_sql(store, sort, descending):
+    expected = all_pages(
+        lambda *args: sql(store, lambda conn: paging.fetch_page(conn, *args)), sort, descending, 37
+    )
+    assert all_pages(store.snapshot.fetch_page, sort, descending, 37) == expected
+    assert len(expected) == 400
+
+
+FILTERS = [
+    PeopleFilter(name_prefix="é"),
+    PeopleFilter(name_prefix="É"),
+    PeopleFilter(name_prefix="alice"),
+    PeopleFilter(name_prefix="z", sort="name"),
+    PeopleFilter(email_domain="école.fr"),
+    PeopleFilter(email_domain="ÉCOLE.fr"),
+    PeopleFilter(email_domain="example.com", sort="email", descending=True),
+    PeopleFilter(email_domain="ex", domain_prefix=True, sort="email"),
+    PeopleFilter(min_age=20, max_age=40, sort="age", descending=True),
+    PeopleFilter(max_age=10, sort="name", limit=500),
+]
+
+
+@pytest.mark.parametrize("sort", filters.SORT_EXPRESSIONS)
+@pytest.mark.parametrize("people_filter", FILTERS, ids=repr)
+def test_filters_match_sql(store, people_filter, sort):
+    for f in (people_filter, PeopleFilter(**{**people_filter.__dict__, "sort": sort, "limit": 500})):
+        expected = sql(store, lambda conn: filters.filter_people(conn, f))
+        assert store.snapshot.filter_people(f) == expected
+
+
+def test_changes_keep_snapshot_in_step(store):
+    for i, name in zip(range(1, 60, 3), itertools.cycle(NAMES)):
+        store.update_person(i, f"{name} Updated", None, f"Ü{i}@ÉCOLE.fr")
+    for i in range(2, 60, 5):
+        store.delete_person(i)
+    store.snapshot.sync(store.version())
+    f = PeopleFilter(email_domain="École.fr", sort="email", limit=500)
+    assert store.snapshot.filter_people(f) == sql(store, lambda conn: filters.filter_people(conn, f))
+    expected = all_pages(lambda *args: sql(store, lambda conn: paging.fetch_page(conn, *args)), "name", False, 50)
+    assert all_pages(store.snapshot.fetch_page, "name", False, 50) == expected
@@ -0,0 +1,64 @@
+"""The trigger-maintained statistics always equal a full scan of `people`."""
+import io
+
+import pytest
+
+from peopledb import PeopleStore, stats
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PeopleStore(str(tmp_path / "people.db"), cache_bytes=0, instrument=False)
+    store.migrator.wait()
+    assert store.pool.read(stats.has_tables)
+    yield store
+    store.close()
+
+
+def maintained(conn):
+    return stats.read_totals(conn), stats.read_age_counts(conn), stats.read_domain_counts(conn)
+
+
+def scanned(conn):
+    return (
+        dict(zip(stats.STAT_TOTALS, conn.execute(stats.SCAN_TOTALS).fetchone())),
+        dict(conn.execute(stats.SCAN_AGE_COUNTS).fetchall()),
+        dict(conn.execute(stats.SCAN_DOMAIN_COUNTS).fetchall()),
+    )
+
+
+def check(store):
+    with store.pool.reader() as conn:
+        assert maintained(conn) == scanned(conn)
+
+
+def test_stats_follow_every_write(store):
+    ids = [store.add_person(f"p{i}", i * 7 if i % 4 else None, f"p{i}@{'mail.io' if i % 3 else 'Post.ORG'}")
+           for i in range(12)]
+    store.add_person("no email", 30, None)
+    check(store)
+    assert store.get_stats() == (13, round((7 * (1 + 2 + 3 + 5 + 6 + 7 + 9 + 10 + 11) + 30) / 10, 1))
+
+    # Moves between age buckets and domains, to and from NULL.
+    store.update_person(ids[1], "p1", None, "p1@other.net")
+    store.update_person(ids[0], "p0", 99, None)
+    store.update_person(ids[2], "p2", 3, "p2@mail.io")
+    check(store)
+
+    for person_id in ids[:6]:
+        store.delete_person(person_id)
+    check(store)
+    # Emptied buckets and domains disappear rather than staying at zero.
+    with store.pool.reader() as conn:
+        assert 0 not in stats.read_age_counts(conn).values()
+        assert 0 not in stats.read_domain_counts(conn).values()
+
+
+@pytest.mark.parametrize("defer_indexes", [False, True])
+def test_stats_follow_imports(store, defer_indexes):
+    store.add_person("before", 40, "before@mail.io")
+    lines = ["name,age,email"] + [f"i{i},{'' if i % 5 == 0 else i % 90},i{i}@d{i % 4}.io" for i in range(300)]
+    store.import_people(io.BytesIO("\n".join(lines).encode()), chunk_size=70, commit_rows=100,
+                        defer_indexes=defer_indexes)
+    check(store)
+    assert store.get_stats()[0] == 301
@@ -0,0 +1,63 @@
+"""Queued writes commit together, and one failing write fails alone."""
+import pytest
+
+from peopledb import schema
+from peopledb.pool import ConnectionPool
+from peopledb.writequeue import WriteQueue
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "people.db"))
+    with pool.writer() as conn:
+        schema.ensure_schema(conn)
+    yield pool
+    pool.close()
+
+
+def insert(name):
+    return lambda conn: conn.execute("INSERT INTO people (name) VALUES (?)", (name,)).lastrowid
+
+
+def names(pool):
+    return pool.read(lambda conn: [row[0] for row in conn.execute("SELECT name FROM people ORDER BY id")])
+
+
+def test_writes_are_group_committed(pool):
+    commits = []
+    # A wide window, so everything submitted below lands in one batch.
+    writes = WriteQueue(pool, window=0.5, on_commit=lambda: commits.append(1))
+    try:
+        futures = [writes.submit(insert(f"p{i}")) for i in range(20)]
+        assert [future.result(timeout=5) for future in futures] == list(range(1, 21))
+    finally:
+        writes.close()
+    assert (writes.batches, writes.writes, len(commits)) == (1, 20, 1)
+    assert names(pool) == [f"p{i}" for i in range(20)]
+
+
+def test_failed_write_rolls_back_alone(pool):
+    def insert_then_fail(conn):
+        insert("failed")(conn)
+        raise ValueError("rejected")
+
+    writes = WriteQueue(pool, window=0.5)
+    try:
+        futures = [writes.submit(insert("before")), writes.submit(insert_then_fail), writes.submit(insert("after"))]
+        assert futures[0].result(timeout=5) == 1
+        with pytest.raises(ValueError, match="rejected"):
+            futures[1].result(timeout=5)
+        assert futures[2].result(timeout=5) == 2
+    finally:
+        writes.close()
+    assert writes.batches == 1
+    assert names(pool) == ["before", "after"]
+
+
+def test_closed_queue_rejects_writes(pool):
+    writes = WriteQueue(pool)
+    writes.submit(insert("last")).result(timeout=5)
+    writes.close()
+    with pytest.raises(RuntimeError):
+        writes.submit(insert("too late"))
+    assert names(pool) == ["last"]